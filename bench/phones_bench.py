@@ -0,0 +1,116 @@
+# bench/phones_bench.py
+"""
+Benchmark ekstrakcji telefonów: dotychczasowa ścieżka PL (extract.PHONE_RE + clean_phone)
+vs phones.PhoneEngine — ten sam kraj i wiele krajów jednym skanem vs osobny skan na kraj (kraj domyślny w pełni,
+pozostałe tylko +CC/00CC — ten sam wynik co silnik łączony). W obu porównaniach wyniki muszą być identyczne.
+
+    python -m bench.phones_bench --pages 300 --repeat 5
+    python -m bench.phones_bench --countries PL,DE,FR,ES,IT,NL,CZ,SK,AT,BE
+
+Tekst stron: bench.synth_site (jak run_bench) + wstawki numerów z konfigurowanych krajów w różnych zapisach.
+Raport: MB/s i µs/stronę (najlepszy z --repeat), liczba numerów.
+"""
+import argparse
+import random
+import time
+
+from bs4 import BeautifulSoup
+
+from phorn.extract import PHONE_RE, clean_phone
+from phorn.phones import PLANS, PhoneEngine
+from bench.synth_site import SiteSpec, render_page
+
+def _sample_number(rng: random.Random, country: str, intl00: bool = True) -> str:
+    p = PLANS[country]
+    nsn = str(rng.randint(1, 9)) + "".join(str(rng.randint(0, 9)) for _ in range(rng.randint(p.min_len, p.max_len) - 1))
+    groups = " ".join(nsn[i:i + 3] for i in range(0, len(nsn), 3))
+    forms = [f"+{p.cc} {groups}", f"+{p.cc}-{nsn}", f"{p.trunk}{groups}"] + ([f"00{p.cc}{nsn}"] if intl00 else [])
+    return rng.choice(forms)
+
+def make_texts(pages: int, countries: list[str], seed: int = 1, intl00: bool = True) -> list[str]:
+    spec = SiteSpec(pages=pages, contact=0.5, seed=seed)
+    rng = random.Random(seed)
+    out = []
+    for n in range(pages):
+        text = BeautifulSoup(render_page(spec, n), "html.parser").get_text(" ", strip=True)
+        extra = " ".join(f"tel. {_sample_number(rng, rng.choice(countries), intl00)}" for _ in range(rng.randint(0, 3)))
+        out.append(f"{text} {extra}")
+    return out
+
+def legacy(text: str) -> set[str]:
+    out = set()
+    for m in PHONE_RE.finditer(text):
+        ph = clean_phone(m.group(0))
+        if ph: out.add(ph)
+    return out
+
+def timed(fn, texts: list[str], repeat: int) -> tuple[float, int]:
+    best, found = float("inf"), 0
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        found = sum(len(fn(t)) for t in texts)
+        best = min(best, time.perf_counter() - t0)
+    return best, found
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="PHORN phone extraction benchmark")
+    ap.add_argument("--pages", type=int, default=300)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--countries", default="PL,DE,FR,ES,IT,NL,CZ,SK,AT,BE")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+    countries = [c.strip().upper() for c in args.countries.split(",") if c.strip()]
+
+    # bez "0048…": stara ścieżka robi z nich śmieci (prefiks 00 nieznany), silnik — poprawne numery
+    pl_texts = make_texts(args.pages, ["PL"], args.seed, intl00=False)
+    mix_texts = make_texts(args.pages, countries, args.seed)
+    mb_pl = sum(map(len, pl_texts)) / 2**20
+    mb_mix = sum(map(len, mix_texts)) / 2**20
+
+    pl = PhoneEngine.for_countries(["PL"])
+    diff = [i for i, t in enumerate(pl_texts) if legacy(t) != pl.findall(t)]
+    print(f"PL: legacy vs engine — {len(pl_texts) - len(diff)}/{len(pl_texts)} pages identical"
+          + (f"; differ: {diff[:10]}" if diff else ""))
+    assert not diff, "PL: PhoneEngine differs from legacy"
+
+    def report(label, fn, texts, mb):
+        t, n = timed(fn, texts, args.repeat)
+        print(f"  {label:<34} {mb / t:7.1f} MB/s  {t / len(texts) * 1e6:8.1f} µs/page  numbers={n}")
+        return t
+
+    print(f"[PL only] {len(pl_texts)} pages, {mb_pl:.1f} MB")
+    t_old = report("legacy PHONE_RE + clean_phone", legacy, pl_texts, mb_pl)
+    t_new = report("PhoneEngine([PL])", pl.findall, pl_texts, mb_pl)
+    print(f"  engine/legacy time: {t_new / t_old:.2f}x")
+
+    engines = [PhoneEngine.for_countries(countries[:1])] + [PhoneEngine([PLANS[c]], national=False) for c in countries[1:]]
+    multi = PhoneEngine.for_countries(countries)
+
+    def separate(text: str) -> set[str]:
+        # dopasowania wszystkich przebiegów, nakładające się rozstrzygane jak w jednym skanie: pierwsze od lewej,
+        # przy tym samym początku +CC/00CC (przebiegi krajów niedomyślnych) przed numerem krajowym
+        spans = sorted((m.start(), -k, m.end(), e) for k, e in enumerate(engines) for m in e.regex.finditer(text))
+        out, end = set(), 0
+        for start, _k, stop, e in spans:
+            if start < end: continue
+            ph = e.clean(text[start:stop])
+            end = stop
+            if ph: out.add(ph)
+        return out
+    diff = [i for i, t in enumerate(mix_texts) if separate(t) != multi.findall(t)]
+    print(f"{len(countries)} countries: separate vs combined — {len(mix_texts) - len(diff)}/{len(mix_texts)} pages identical"
+          + (f"; differ: {diff[:10]}" if diff else ""))
+    assert not diff, "separate passes differ from the combined engine"
+    print(f"[{len(countries)} countries] {len(mix_texts)} pages, {mb_mix:.1f} MB")
+    t_sep = report("separate pass per country", separate, mix_texts, mb_mix)
+    t_one = report("one combined PhoneEngine", multi.findall, mix_texts, mb_mix)
+    print(f"  combined/separate time: {t_one / t_sep:.2f}x")
+
+    cands = [m.group(0) for t in pl_texts for m in PHONE_RE.finditer(t)] * 20
+    t_re, _ = timed(lambda _t: list(map(clean_phone, cands)), [None], args.repeat)
+    t_tr, _ = timed(lambda _t: list(map(pl.clean, cands)), [None], args.repeat)
+    print(f"[normalize] {len(cands)} PL candidates: clean_phone (re.sub) {t_re / len(cands) * 1e9:.0f} ns, "
+          f"PhoneEngine.clean (translate) {t_tr / len(cands) * 1e9:.0f} ns")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# bench/run_bench.py
+"""
+Benchmark crawl() na lokalnej syntetycznej witrynie.
+
+    python -m bench.run_bench --pages 500 --fanout 8 --concurrency 8 --repeat 3
+    python -m bench.run_bench ... --save baseline          # zapis do bench/baselines/baseline.json
+    python -m bench.run_bench ... --compare baseline       # porównanie z zapisanym wynikiem
+
+Raport: pages/s, hits/s, CPU (user+sys), peak RSS i czasy etapów z phorn.metrics
+(dns / connect / ttfb / body / fetch / parse / extract / render — sumowane po wszystkich workerach,
+więc przy concurrency > 1 mogą przekraczać wall), mediana z --repeat przebiegów.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from phorn.crawl import crawl
+from phorn.frontier import LocalFrontier
+from phorn.metrics import Metrics
+from bench.synth_site import SiteSpec, start_site
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+async def run_once(spec: SiteSpec, *, concurrency: int, mode: int, max_pages: int | None, timeout_s: float) -> dict:
+    runner, base = await start_site(spec)
+    try:
+        found = 0
+        scanned = errors = 0
+        def on_found(_h):
+            nonlocal found
+            found += 1
+        def on_status(s, q, f, e):
+            nonlocal scanned, errors
+            scanned, errors = s, e
+        budget = max_pages or spec.pages
+        ru0 = resource.getrusage(resource.RUSAGE_SELF)
+        t0 = time.perf_counter()
+        metrics = Metrics()
+        # tylko adres syntetycznej witryny: domyślne seedy http(s)://127.0.0.1/ (port 80/443), robots
+        # i sitemap to odmowy połączeń i ponowienia, czyli szum w pomiarze
+        frontier = LocalFrontier()
+        await frontier.put(base, 0)
+        await asyncio.wait_for(
+            crawl(
+                "127.0.0.1", mode, budget,
+                lambda _u: None, on_found, on_status,
+                start_url=base, concurrency=concurrency, metrics=metrics,
+                frontier=frontier, seed_frontier=False, obey_robots=False, use_sitemap=False,
+            ),
+            timeout=timeout_s,
+        )
+        wall = time.perf_counter() - t0
+        ru1 = resource.getrusage(resource.RUSAGE_SELF)
+    finally:
+        await runner.cleanup()
+    cpu = (ru1.ru_utime - ru0.ru_utime) + (ru1.ru_stime - ru0.ru_stime)
+    return {
+        "wall_s": wall,
+        "scanned": scanned,
+        "errors": errors,
+        "hits": found,
+        "pages_per_s": scanned / wall if wall else 0.0,
+        "hits_per_s": found / wall if wall else 0.0,
+        "cpu_s": cpu,
+        "cpu_util": cpu / wall if wall else 0.0,
+        # Linux: KB, macOS: bajty
+        "peak_rss_mb": ru1.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+        "stages_s": {k[:-len("_seconds")]: h.sum for k, h in metrics.hist.items()},
+        "stage_p95_s": {k[:-len("_seconds")]: h.quantile(0.95) for k, h in metrics.hist.items()},
+        "bytes": metrics.counters.get("bytes_total", 0),
+    }
+
+def summarize(runs: list[dict]) -> dict:
+    keys = ("wall_s", "pages_per_s", "hits_per_s", "cpu_s", "cpu_util", "peak_rss_mb")
+    out = {k: statistics.median(r[k] for r in runs) for k in keys}
+    out["scanned"] = runs[-1]["scanned"]; out["hits"] = runs[-1]["hits"]; out["errors"] = runs[-1]["errors"]
+    stages = sorted({s for r in runs for s in r["stages_s"]})
+    out["stages_s"] = {s: statistics.median(r["stages_s"].get(s, 0.0) for r in runs) for s in stages}
+    return out
+
+def print_report(summary: dict, baseline: dict | None = None):
+    def line(label, key, fmt="{:.2f}", better="higher"):
+        v = summary[key]
+        s = f"  {label:<14} " + fmt.format(v)
+        if baseline and key in baseline.get("summary", {}):
+            b = baseline["summary"][key]
+            if b:
+                d = (v - b) / b * 100
+                good = (d > 0) == (better == "higher")
+                s += f"   (baseline {fmt.format(b)}, {d:+.1f}% {'✓' if good or abs(d) < 2 else '✗'})"
+        print(s)
+    print(f"  scanned={summary['scanned']} hits={summary['hits']} errors={summary['errors']}")
+    line("wall [s]", "wall_s", better="lower")
+    line("pages/s", "pages_per_s")
+    line("hits/s", "hits_per_s")
+    line("CPU [s]", "cpu_s", better="lower")
+    line("CPU util", "cpu_util", better="lower")
+    line("peak RSS [MB]", "peak_rss_mb", fmt="{:.1f}", better="lower")
+    for stage, v in summary["stages_s"].items():
+        b = (baseline or {}).get("summary", {}).get("stages_s", {}).get(stage)
+        print(f"  stage {stage:<8} {v:.3f}s" + (f"   (baseline {b:.3f}s)" if b else ""))
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="PHORN crawl benchmark (lokalna syntetyczna witryna)")
+    ap.add_argument("--pages", type=int, default=500)
+    ap.add_argument("--fanout", type=int, default=8)
+    ap.add_argument("--contact", type=float, default=0.3)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--filler-kb", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--mode", type=int, default=3)
+    ap.add_argument("--max-pages", type=int, default=None)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--timeout", type=float, default=600.0)
+    ap.add_argument("--save", metavar="NAME")
+    ap.add_argument("--compare", metavar="NAME")
+    args = ap.parse_args(argv)
+
+    spec = SiteSpec(
+        pages=args.pages, fanout=args.fanout, contact=args.contact,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        filler_kb=args.filler_kb, seed=args.seed,
+    )
+    params = {"site": spec.as_dict(), "concurrency": args.concurrency, "mode": args.mode, "max_pages": args.max_pages}
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text(encoding="utf-8"))
+        if baseline.get("params") != params:
+            print("⚠ baseline params differ — comparison is not apples-to-apples")
+
+    runs = []
+    for i in range(max(1, args.repeat)):
+        r = asyncio.run(run_once(spec, concurrency=args.concurrency, mode=args.mode,
+                                 max_pages=args.max_pages, timeout_s=args.timeout))
+        print(f"[run {i+1}] {r['pages_per_s']:.1f} pages/s  {r['hits_per_s']:.1f} hits/s  wall={r['wall_s']:.2f}s")
+        runs.append(r)
+
+    summary = summarize(runs)
+    print("[summary]")
+    print_report(summary, baseline)
+
+    if args.save:
+        BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+        out = {
+            "params": params, "summary": summary, "runs": runs,
+            "python": platform.python_version(), "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        path = BASELINE_DIR / f"{args.save}.json"
+        path.write_text(json.dumps(out, indent=2), encoding="utf-8")
+        print("saved baseline:", path)
+
+if __name__ == "__main__":
+    main()
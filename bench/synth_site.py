@@ -0,0 +1,100 @@
+# bench/synth_site.py
+"""
+Syntetyczna witryna do benchmarków (aiohttp.web, 127.0.0.1).
+
+Strony /p/<n> dla n = 0..pages-1, deterministyczne względem `seed`:
+  - fanout     — ile linków wewnętrznych na stronę (zawsze też link do n+1, więc całość jest osiągalna),
+  - contact    — odsetek stron z telefonem/e-mailem (część jako tel:/mailto:),
+  - latency_ms — opóźnienie odpowiedzi (+ jitter),
+  - error_rate — odsetek stron odpowiadających 500,
+  - filler_kb  — ile KB tekstu-wypełniacza i powtarzalnych skryptów na stronę.
+"""
+import asyncio
+import random
+from dataclasses import dataclass, asdict
+
+from aiohttp import web
+
+@dataclass
+class SiteSpec:
+    pages: int = 500
+    fanout: int = 8
+    contact: float = 0.3
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    filler_kb: int = 20
+    seed: int = 1
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+_WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+          "incididunt ut labore et dolore magna aliqua oferta kontakt firma usługi cennik").split()
+
+# powtarzalny na każdej stronie (jak analityka/framework) + fingerprinting
+_COMMON_SCRIPT = (
+    "<script>(function(){var c=document.createElement('canvas');c.toDataURL();"
+    "var n=navigator.hardwareConcurrency;window.dataLayer=window.dataLayer||[];})();</script>"
+)
+
+def _phone(rng: random.Random) -> str:
+    d = "".join(str(rng.randint(0, 9)) for _ in range(8))
+    return f"+48 5{d[:2]} {d[2:5]} {d[5:]}"
+
+def render_page(spec: SiteSpec, n: int) -> str:
+    rng = random.Random(spec.seed * 1_000_003 + n)
+    links = {(n + 1) % spec.pages}
+    while len(links) < min(spec.fanout, spec.pages):
+        links.add(rng.randrange(spec.pages))
+    body = [f"<h1>Strona {n}</h1>"]
+    words_needed = max(1, spec.filler_kb * 1024 // 7)
+    filler = " ".join(rng.choice(_WORDS) for _ in range(words_needed))
+    body.append(f"<p>{filler}</p>")
+    if rng.random() < spec.contact:
+        ph = _phone(rng)
+        body.append(f"<div class='contact'>Telefon: {ph}, e-mail: biuro{n}@example.com</div>")
+        if rng.random() < 0.5:
+            body.append(f"<a href='tel:{ph.replace(' ', '')}'>zadzwoń</a> <a href='mailto:kontakt{n}@example.com'>napisz</a>")
+    body.append("<ul>" + "".join(f"<li><a href='/p/{k}'>strona {k}</a></li>" for k in sorted(links)) + "</ul>")
+    body.append(f"<script>var server='10.{n % 256}.0.1';</script>")
+    body.append(_COMMON_SCRIPT)
+    return (f"<!doctype html><html><head><title>Synth {n}</title></head>"
+            f"<body>{''.join(body)}</body></html>")
+
+def make_app(spec: SiteSpec) -> web.Application:
+    cache: dict[int, str] = {}
+    err_rng = random.Random(spec.seed ^ 0x5EED)
+    errors = {n for n in range(spec.pages) if err_rng.random() < spec.error_rate}
+    lat_rng = random.Random(spec.seed ^ 0x1A7)
+
+    async def page(req: web.Request):
+        try:
+            n = int(req.match_info.get("n", "0"))
+        except ValueError:
+            raise web.HTTPNotFound()
+        if not (0 <= n < spec.pages):
+            raise web.HTTPNotFound()
+        delay = spec.latency_ms + (lat_rng.uniform(0, spec.jitter_ms) if spec.jitter_ms else 0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if n in errors:
+            return web.Response(status=500, text="synthetic error")
+        html = cache.get(n)
+        if html is None:
+            html = cache[n] = render_page(spec, n)
+        return web.Response(text=html, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/", page)
+    app.router.add_get("/p/{n}", page)
+    return app
+
+async def start_site(spec: SiteSpec, host: str = "127.0.0.1", port: int = 0):
+    """Startuje serwer; zwraca (runner, base_url). Zatrzymanie: await runner.cleanup()."""
+    runner = web.AppRunner(make_app(spec), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    sock = site._server.sockets[0]
+    return runner, f"http://{host}:{sock.getsockname()[1]}/"
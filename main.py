@@ -2,12 +2,12 @@ import sys
 import argparse
 import asyncio
 import curses
-import csv
 import time
 from datetime import datetime
 import aiohttp
 import signal
 import socket  # dodano DNS/IP domeny
+from contextlib import nullcontext
 
 try:
     import yaml  # opcjonalnie dla CLI
@@ -16,96 +16,62 @@ except Exception:
 
 from phorn.ui_curses import CursesUI
 from phorn.crawl import crawl
-from phorn.net import get_public_ip
-
-def save_csv(domain: str, hits: list):
-    fname = f"contacts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    with open(fname, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=["source_domain","username","phone","email","url"])
-        w.writeheader()
-        for h in hits:
-            w.writerow(dict(
-                source_domain=h.source_domain, username=h.username,
-                phone=h.phone, email=h.email, url=h.url
-            ))
-    return fname
-
-# ---------- Uniwersalny CSV stream saver ----------
-class CSVStream:
-    def __init__(self, filename: str, fieldnames: list[str]):
-        self.filename = filename
-        self._f = open(filename, "w", newline="", encoding="utf-8")
-        self._w = csv.DictWriter(self._f, fieldnames=fieldnames)
-        self._w.writeheader()
-        self._closed = False
-    def write(self, row: dict):
-        if self._closed: return
-        self._w.writerow(row); self._f.flush()
-    def close(self):
-        if not self._closed:
-            try: self._f.flush()
-            except Exception: pass
-            try: self._f.close()
-            except Exception: pass
-            self._closed = True
+from phorn.net import get_public_ip, NetProfile
+from phorn.sinks import CSVStream, SinkWriter, StreamSaver, save_csv
+from phorn.frontier import open_frontier
+from phorn.models import Hit
+from phorn.metrics import Metrics, start_metrics_server
+from phorn.profiling import CrawlProfiler
+from phorn.events import EventLog
+from phorn.batch import load_targets, crawl_batch
+from phorn.offline import extract_corpus
+from phorn.service import CrawlService, serve
 
 async def detect_netinfo_async(proxy: str | None) -> str:
     timeout = aiohttp.ClientTimeout(total=10, connect=5, sock_connect=5, sock_read=5)
     async with aiohttp.ClientSession(timeout=timeout) as session:
-        v4 = await get_public_ip(session, family="ipv4", proxy=proxy)
-        v6 = await get_public_ip(session, family="ipv6", proxy=proxy)
+        v4, v6 = await asyncio.gather(
+            get_public_ip(session, family="ipv4", proxy=proxy),
+            get_public_ip(session, family="ipv6", proxy=proxy),
+        )
     via = "via Proxy" if proxy else "direct"
     warn = ""
     if (not proxy) and v6:
         warn = "  ⚠ IPv6 aktywne — jeśli VPN nie tuneluje IPv6, rozważ wyłączenie IPv6."
     return f"Network: IPv4 {v4 or '-'} | IPv6 {v6 or '-'} ({via}){warn}"
 
-# ---------- STREAMING AUTOSAVE kontaktów ----------
-class StreamSaver:
-    def __init__(self, domain: str, *, dedupe: bool = True):
-        self.filename = f"contacts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        self._f = open(self.filename, "w", newline="", encoding="utf-8")
-        self._w = csv.DictWriter(self._f, fieldnames=["source_domain","username","phone","email","url"])
-        self._w.writeheader()
-        self._dedupe = dedupe
-        self._seen = set() if dedupe else None
-        self._closed = False
-
-    def write_hit(self, h):
-        if self._closed:
-            return
-        key = (getattr(h,"phone",""), getattr(h,"email",""), getattr(h,"url",""))
-        if self._seen is not None:
-            if key in self._seen:
-                return
-            self._seen.add(key)
-        self._w.writerow(dict(
-            source_domain=getattr(h,"source_domain",""),
-            username=getattr(h,"username",""),
-            phone=getattr(h,"phone",""),
-            email=getattr(h,"email",""),
-            url=getattr(h,"url",""),
-        ))
-        self._f.flush()
-
-    def close(self):
-        if not self._closed:
-            try: self._f.flush()
-            except Exception: pass
-            try: self._f.close()
-            except Exception: pass
-            self._closed = True
+async def resolve_domain_ips_async(name: str) -> str:
+    # A/AAAA równolegle przez resolver pętli (bez blokowania); wypisz kilka pierwszych
+    loop = asyncio.get_running_loop()
+    ips = set()
+    for res in await asyncio.gather(
+        *(loop.getaddrinfo(name, None, family=fam, type=socket.SOCK_STREAM) for fam in (socket.AF_INET, socket.AF_INET6)),
+        return_exceptions=True,
+    ):
+        if isinstance(res, BaseException): continue
+        ips.update(r[4][0] for r in res if r[4][0])
+    if not ips:
+        return "-"
+    # pokaż max 3, posortowane
+    out = sorted(ips)
+    return ", ".join(out[:3]) + (" …" if len(out) > 3 else "")
+
+async def startup_info_async(domain: str, proxy: str | None) -> tuple[str, str]:
+    ip, net = await asyncio.gather(resolve_domain_ips_async(domain), detect_netinfo_async(proxy), return_exceptions=True)
+    if isinstance(ip, BaseException): ip = "-"
+    if isinstance(net, BaseException): net = "Network: (failed to detect IP)"
+    return ip, net
 
 # -------------------- CLI (opcjonalne) --------------------
-def run_cli(cfg: dict):
-    loop = asyncio.new_event_loop(); asyncio.set_event_loop(loop)
-
-    domain  = cfg["domain"]
-    mode    = int(cfg.get("mode", 1))
-    pages   = int(cfg.get("max_pages", 200))
-
-    # mapuj resztę opcji jak w TUI:
-    kwargs = {
+def _phone_countries(cfg: dict) -> list[str] | None:
+    # "PL, DE" albo [PL, DE]; puste → domyślne PL (extract.PHONE_RE)
+    v = cfg.get("phone_countries")
+    if isinstance(v, str): v = [c.strip() for c in v.split(",")]
+    return [c for c in v if c] or None if v else None
+
+def _crawl_kwargs(cfg: dict) -> dict:
+    # mapuj opcje YAML jak w TUI:
+    return {
         "start_url": cfg.get("start_url"),
         "delay_ms": int(cfg.get("delay_ms", 0)),
         "render_mode": int(cfg.get("render_mode", 0)),
@@ -124,25 +90,120 @@ def run_cli(cfg: dict):
         "cookies_in_file": cfg.get("cookies_in_file") or "",
         "cookies_out_file": cfg.get("cookies_out_file") or "",
         "extras_only_on_phone": bool(cfg.get("extras_only_on_phone", False)),
+        "render_pool_size": None if cfg.get("render_pool_size") in (None,"") else int(cfg.get("render_pool_size")),
+        "render_recycle_after": int(cfg.get("render_recycle_after", 50)),
+        "render_timeout_ms": int(cfg.get("render_timeout_ms", 15000)),
+        "render_block_resources": bool(cfg.get("render_block_resources", True)),
+        "render_settle_ms": None if cfg.get("render_settle_ms", 400) in (None,"","-1",-1) else int(cfg.get("render_settle_ms", 400)),
+        "max_retries": int(cfg.get("max_retries", 2)),
+        "retry_backoff_s": float(cfg.get("retry_backoff_s", 0.5)),
+        "retry_max_delay_s": float(cfg.get("retry_max_delay_s", 30)),
+        "net": NetProfile.from_dict(cfg.get("net")),
+        "near_dup": bool(cfg.get("near_dup", False)),
+        "near_dup_distance": int(cfg.get("near_dup_distance", 3)),
+        "traps": bool(cfg.get("traps", False)),
+        "trap_max_per_pattern": int(cfg.get("trap_max_per_pattern", 500)),
+        "trap_max_param_values": int(cfg.get("trap_max_param_values", 50)),
+        "trap_max_url_len": int(cfg.get("trap_max_url_len", 2048)),
+        "extract_mode": str(cfg.get("extract_mode", "dom")),
+        "stats_interval_s": float(cfg.get("stats_interval_s", 1.0)),
+        "warc": cfg.get("warc") or None,
+        "warc_max_mb": int(cfg.get("warc_max_mb", 1024)),
+        "replay": cfg.get("replay") or None,
+        "phone_countries": _phone_countries(cfg),
     }
 
-    print(f"[PHORN/CLI] target={domain} mode={mode} max_pages={pages}")
-    hits_live = []
-    saver = StreamSaver(domain, dedupe=True)
-    ips_csv = CSVStream(f"ips_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", ["ip","url"])
-    fp_csv  = CSVStream(f"fp_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", ["url","indicator","evidence"])
-
-    # graceful SIGTERM
+def _open_sinks(domain: str = "", cfg: dict | None = None):
+    # pliki wynikowe pisze jeden wątek (sink_queue: rozmiar kolejki, sink_policy: block | drop)
+    cfg = cfg or {}
+    sinks = SinkWriter(max_queue=int(cfg.get("sink_queue", 10000)), policy=str(cfg.get("sink_policy", "block")).lower())
+    saver = StreamSaver(domain, dedupe=True, writer=sinks)
+    ips_csv = CSVStream(f"ips_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", ["ip","url"], writer=sinks)
+    fp_csv  = CSVStream(f"fp_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", ["url","indicator","evidence"], writer=sinks)
+    return sinks, saver, ips_csv, fp_csv
+
+def _sink_report(sinks: SinkWriter) -> str:
+    parts = []
+    if sinks.dropped: parts.append(f"sink queue full — dropped {sinks.dropped} rows")
+    if sinks.errors: parts.append(f"write errors: {sinks.errors} (last: {sinks.error})")
+    return "; ".join(parts)
+
+def _close_sinks(sinks: SinkWriter, tag: str = "CLI"):
+    sinks.close()
+    report = _sink_report(sinks)
+    if report: print(f"[PHORN/{tag}] {report}")
+
+def _install_sigterm():
+    # graceful SIGTERM: jak Ctrl+C — wyjątek w wątku głównym, pliki dopisuje i zamyka except KeyboardInterrupt
+    # (nie z handlera: sygnał może przyjść w trakcie put() do kolejki, zamknięcie tam by się zakleszczyło)
     def _sigterm_handler(signum, frame):
-        print("\n[PHORN/CLI] SIGTERM — closing files…")
-        try: saver.close(); ips_csv.close(); fp_csv.close()
-        except Exception: pass
+        print("\n[PHORN/CLI] SIGTERM — flushing files…")
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
         raise KeyboardInterrupt
     try:
         signal.signal(signal.SIGTERM, _sigterm_handler)
     except Exception:
         pass
 
+def _start_metrics(loop, cfg: dict):
+    # metrics_port → endpoint Prometheus (/metrics) + /metrics.json; metrics_json → podsumowanie na koniec
+    if not (cfg.get("metrics_port") or cfg.get("metrics_json")):
+        return None, None
+    metrics = Metrics(); runner = None
+    if cfg.get("metrics_port"):
+        try:
+            runner = loop.run_until_complete(start_metrics_server(metrics, port=int(cfg["metrics_port"])))
+            print(f"[PHORN/CLI] metrics: http://127.0.0.1:{int(cfg['metrics_port'])}/metrics")
+        except Exception as e:
+            print("[PHORN/CLI] metrics endpoint failed:", e)
+    return metrics, runner
+
+def _finish_metrics(loop, cfg: dict, metrics, runner):
+    if metrics is None: return
+    path = cfg.get("metrics_json") or f"metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    try:
+        metrics.write_json(path); print("[PHORN/CLI] metrics summary:", path)
+    except Exception as e:
+        print("[PHORN/CLI] metrics summary failed:", e)
+    if runner is not None:
+        try: loop.run_until_complete(runner.cleanup())
+        except Exception: pass
+
+def _open_event_log(cfg: dict):
+    # event_log: ścieżka NDJSON; event_log_level: debug|info|warn|error; event_log_sample: {typ: co_ile}
+    if not cfg.get("event_log"):
+        return None
+    return EventLog(
+        cfg["event_log"],
+        level=str(cfg.get("event_log_level", "info")).lower(),
+        max_bytes=int(float(cfg.get("event_log_max_mb", 50)) * 1024 * 1024),
+        backups=int(cfg.get("event_log_backups", 3)),
+        sample=cfg.get("event_log_sample") or {"links.enqueued": 10},
+    )
+
+def run_cli(cfg: dict):
+    loop = asyncio.new_event_loop(); asyncio.set_event_loop(loop)
+
+    domain  = cfg["domain"]
+    mode    = int(cfg.get("mode", 1))
+    pages   = int(cfg.get("max_pages", 200))
+
+    kwargs = _crawl_kwargs(cfg)
+
+    # rozproszony crawl: wspólny frontier (sqlite:///plik.db | redis://…); worker nie seeduje
+    role = (cfg.get("role") or "coordinator").lower()
+    frontier = open_frontier(cfg.get("frontier"))
+    kwargs["frontier"] = frontier
+    kwargs["seed_frontier"] = role != "worker"
+    metrics, metrics_runner = _start_metrics(loop, cfg)
+    kwargs["metrics"] = metrics
+    event_log = kwargs["event_log"] = _open_event_log(cfg)
+
+    print(f"[PHORN/CLI] target={domain} mode={mode} max_pages={pages}" + (f" frontier={cfg.get('frontier')} role={role}" if frontier.shared else ""))
+    hits_live = []
+    sinks, saver, ips_csv, fp_csv = _open_sinks(domain, cfg)
+    _install_sigterm()
+
     try:
         hits = loop.run_until_complete(
             crawl(
@@ -153,17 +214,141 @@ def run_cli(cfg: dict):
                 on_detail=lambda m: print("[DETAIL]", m),
                 on_ip=lambda ih: ips_csv.write({"ip": ih.ip, "url": ih.url}),
                 on_fp=lambda ev: fp_csv.write({"url": ev.url, "indicator": ev.indicator, "evidence": ev.evidence}),
+                backpressure=sinks.wait_ready,
                 **kwargs
             )
         )
-        saver.close(); ips_csv.close(); fp_csv.close()
+        _close_sinks(sinks)
         print("[PHORN/CLI] saved (stream):", saver.filename)
+        if frontier.shared and role == "coordinator":
+            merged = loop.run_until_complete(frontier.hits())
+            fname = save_csv(domain, [Hit(**r) for r in merged],
+                             filename=f"contacts_merged_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+            print(f"[PHORN/CLI] merged hits from all workers ({len(merged)}):", fname)
     except KeyboardInterrupt:
-        saver.close(); ips_csv.close(); fp_csv.close()
+        _close_sinks(sinks)
         if hits_live:
             print("\n[PHORN/CLI] Interrupted — partial results in:", saver.filename)
         else:
             print("\n[PHORN/CLI] Interrupted — no results.")
+    finally:
+        _finish_metrics(loop, cfg, metrics, metrics_runner)
+        if event_log: event_log.close()
+        loop.run_until_complete(frontier.close())
+
+# -------------------- batch (wiele domen, jeden proces) --------------------
+def run_batch(cfg: dict, targets_file: str):
+    loop = asyncio.new_event_loop(); asyncio.set_event_loop(loop)
+
+    domains = load_targets(targets_file)
+    mode    = int(cfg.get("mode", 1))
+    pages   = int(cfg.get("max_pages", 200))
+    kwargs  = _crawl_kwargs(cfg)
+    kwargs.pop("start_url", None)       # start_url dotyczy jednej domeny
+    kwargs.pop("cookies_in_file", None); kwargs.pop("cookies_out_file", None)
+    kwargs.pop("seed_cookie_header", None)
+    metrics, metrics_runner = _start_metrics(loop, cfg)
+    kwargs["metrics"] = metrics
+    event_log = kwargs["event_log"] = _open_event_log(cfg)
+
+    print(f"[PHORN/BATCH] targets={len(domains)} mode={mode} max_pages={pages}")
+    found = 0
+    sinks, saver, ips_csv, fp_csv = _open_sinks("", cfg)
+    _install_sigterm()
+
+    def on_found(h):
+        nonlocal found
+        found += 1; saver.write_hit(h)
+        print("[FOUND]", h.source_domain, h.phone, h.email, h.url)
+
+    def on_domain_done(domain, n, err):
+        print(f"[DONE] {domain} hits={n}" + (f" error={err}" if err else ""))
+
+    try:
+        loop.run_until_complete(
+            crawl_batch(
+                domains, mode, pages,
+                on_found=on_found,
+                on_ip=lambda ih: ips_csv.write({"ip": ih.ip, "url": ih.url}),
+                on_fp=lambda ev: fp_csv.write({"url": ev.url, "indicator": ev.indicator, "evidence": ev.evidence}),
+                on_domain_done=on_domain_done,
+                on_stats=lambda up, ue, top: print(f"[STATS] phones≈{up} emails≈{ue} top={top}"),
+                stats_hll=bool(cfg.get("stats_hll", True)),
+                parallel_domains=int(cfg.get("parallel_domains", 4)),
+                total_concurrency=int(cfg.get("total_concurrency", 16)),
+                domain_timeout_s=float(cfg["domain_timeout_s"]) if cfg.get("domain_timeout_s") else None,
+                backpressure=sinks.wait_ready,
+                **kwargs
+            )
+        )
+        _close_sinks(sinks, "BATCH")
+        print(f"[PHORN/BATCH] found={found} saved (stream):", saver.filename)
+    except KeyboardInterrupt:
+        _close_sinks(sinks, "BATCH")
+        print("\n[PHORN/BATCH] Interrupted — partial results in:", saver.filename)
+    finally:
+        _finish_metrics(loop, cfg, metrics, metrics_runner)
+        if event_log: event_log.close()
+
+def run_extract(cfg: dict, paths: list[str], workers: int | None = None):
+    # offline: lokalne zrzuty HTML (katalogi / tar) → te same pliki wynikowe co crawl
+    mode = int(cfg.get("mode", 1))
+    domain = cfg.get("domain") or ""
+    print(f"[PHORN/EXTRACT] inputs={len(paths)} mode={mode} workers={workers or 'auto'}")
+    found = errors = 0
+    sinks, saver, ips_csv, fp_csv = _open_sinks(domain, cfg)
+    _install_sigterm()
+
+    def on_progress(files, nbytes, secs):
+        print(f"[STAT] files={files} MB={nbytes/2**20:.1f} MB/s={nbytes/2**20/max(secs, 1e-9):.1f} found={found} e={errors}")
+
+    try:
+        for r in extract_corpus(paths, mode, workers=workers, on_progress=on_progress,
+                                extras_only_on_phone=bool(cfg.get("extras_only_on_phone", False)),
+                                phone_countries=_phone_countries(cfg)):
+            if r.error:
+                errors += 1; print("[ERROR]", r.url, r.error); continue
+            for uname, ph, em in r.hits:
+                found += 1; saver.write_hit(Hit(domain, uname, ph, em, r.url))
+                print("[FOUND]", ph, em, r.url)
+            for ip in r.ips:
+                ips_csv.write({"ip": ip, "url": r.url})
+            for label, evid in r.fps:
+                fp_csv.write({"url": r.url, "indicator": label, "evidence": evid[:200]})
+        _close_sinks(sinks, "EXTRACT")
+        print(f"[PHORN/EXTRACT] found={found} saved (stream):", saver.filename)
+    except KeyboardInterrupt:
+        _close_sinks(sinks, "EXTRACT")
+        print("\n[PHORN/EXTRACT] Interrupted — partial results in:", saver.filename)
+
+def run_serve(cfg: dict, addr: str):
+    # usługa: API HTTP/JSON z kolejką zadań; sesja, pula przeglądarki i cache zostają między zadaniami
+    loop = asyncio.new_event_loop(); asyncio.set_event_loop(loop)
+    host, _, port = addr.rpartition(":")
+    host = host or "127.0.0.1"
+    kwargs = _crawl_kwargs(cfg)
+    kwargs.pop("start_url", None); kwargs.pop("cookies_out_file", None)
+    metrics, metrics_runner = _start_metrics(loop, cfg)
+    kwargs["metrics"] = metrics
+    event_log = kwargs["event_log"] = _open_event_log(cfg)
+    service = CrawlService(kwargs, max_jobs=int(cfg.get("max_jobs", 2)),
+                           total_concurrency=int(cfg.get("total_concurrency", 16)),
+                           keep_jobs=int(cfg.get("keep_jobs", 200)))
+    stop = asyncio.Event()
+    try: loop.add_signal_handler(signal.SIGTERM, stop.set)
+    except Exception: pass
+    runner = loop.run_until_complete(serve(service, host=host, port=int(port or 8765)))
+    print(f"[PHORN/SERVE] http://{host}:{int(port or 8765)}/jobs max_jobs={service.max_jobs}")
+    try:
+        loop.run_until_complete(stop.wait())
+        print("[PHORN/SERVE] SIGTERM — stopping…")
+    except KeyboardInterrupt:
+        print("\n[PHORN/SERVE] Interrupted — stopping…")
+    finally:
+        loop.run_until_complete(runner.cleanup())
+        loop.run_until_complete(service.close())
+        _finish_metrics(loop, cfg, metrics, metrics_runner)
+        if event_log: event_log.close()
 
 # -------------------- TUI --------------------
 def curses_main(stdscr):
@@ -234,32 +419,9 @@ def curses_main(stdscr):
     cookies_out_file = (cout_path or "").strip()
     extras_only_on_phone = (extras_only or "").strip().lower() in ("y","yes","1","true")
 
-    # Rozwiąż IP domeny (A/AAAA); wypisz kilka pierwszych
-    def _resolve_domain_ips(name: str) -> str:
-        ips = set()
-        for fam in (socket.AF_INET, socket.AF_INET6):
-            try:
-                infos = socket.getaddrinfo(name, None, fam, socket.SOCK_STREAM)
-                for res in infos:
-                    addr = res[4][0]
-                    if addr:
-                        ips.add(addr)
-            except Exception:
-                continue
-        if not ips:
-            return "-"
-        # pokaż max 3, posortowane
-        out = sorted(ips)
-        return ", ".join(out[:3]) + (" …" if len(out) > 3 else "")
-
-    domain_ip = _resolve_domain_ips(domain)
-
-    # Net info
+    # IP domeny + publiczne IP (v4/v6) — wszystko równolegle
     loop = asyncio.new_event_loop(); asyncio.set_event_loop(loop)
-    try:
-        netinfo = loop.run_until_complete(detect_netinfo_async(proxy))
-    except Exception:
-        netinfo = "Network: (failed to detect IP)"
+    domain_ip, netinfo = loop.run_until_complete(startup_info_async(domain, proxy))
     curses.curs_set(0)
 
     # UI
@@ -290,9 +452,7 @@ def curses_main(stdscr):
     )
     ui.set_start_time(time.time())
 
-    saver = StreamSaver(domain, dedupe=True)
-    ips_csv = CSVStream(f"ips_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", ["ip","url"])
-    fp_csv  = CSVStream(f"fp_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", ["url","indicator","evidence"])
+    sinks, saver, ips_csv, fp_csv = _open_sinks(domain)
     hits_live = []
 
     # Callbacks
@@ -348,31 +508,70 @@ def curses_main(stdscr):
                 exclude_re=exclude_re,
                 cookies_in_file=cookies_in_file,
                 cookies_out_file=cookies_out_file,
+                backpressure=sinks.wait_ready,
             )
         )
         curses.curs_set(1)
-        saver.close(); ips_csv.close(); fp_csv.close()
-        ui._safe_add(ui.status_row, 0, f"Saved (stream) to {saver.filename}")
+        sinks.close()
+        report = _sink_report(sinks)
+        ui._safe_add(ui.status_row, 0, f"Saved (stream) to {saver.filename}" + (f" — {report}" if report else ""))
         ui.stdscr.getch()
     except KeyboardInterrupt:
         curses.curs_set(1)
-        saver.close(); ips_csv.close(); fp_csv.close()
+        sinks.close()
+        report = _sink_report(sinks)
         if hits_live:
-            ui._safe_add(ui.status_row, 0, f"Interrupted — partial results in {saver.filename}")
+            ui._safe_add(ui.status_row, 0, f"Interrupted — partial results in {saver.filename}" + (f" — {report}" if report else ""))
         else:
-            ui._safe_add(ui.status_row, 0, "Interrupted — no results.")
+            ui._safe_add(ui.status_row, 0, "Interrupted — no results." + (f" {report}" if report else ""))
         ui.stdscr.getch()
 
 if __name__ == "__main__":
     # tryb CLI: --cli --config cfg.yaml
     if "--cli" in sys.argv:
         ap = argparse.ArgumentParser()
-        ap.add_argument("--config", required=True)
+        ap.add_argument("--cli", action="store_true")
+        ap.add_argument("--config")
+        ap.add_argument("--targets", help="plik z listą domen (tryb batch)")
+        ap.add_argument("--replay", nargs="+", metavar="WARC",
+                        help="ekstrakcja z archiwów WARC (pliki/katalogi) zamiast sieci")
+        ap.add_argument("--extract", nargs="+", metavar="PATH",
+                        help="ekstrakcja offline z katalogów / archiwów tar z HTML-em (bez crawla)")
+        ap.add_argument("--workers", type=int, default=None, help="--extract: liczba procesów (domyślnie CPU)")
+        ap.add_argument("--serve", nargs="?", const="127.0.0.1:8765", default=None, metavar="HOST:PORT",
+                        help="tryb usługi: API HTTP/JSON z kolejką zadań crawl")
+        ap.add_argument("--profile", nargs="?", const="phorn_profile", default=None, metavar="PREFIX",
+                        help="profiluj przebieg: PREFIX.collapsed (flamegraph) + PREFIX.top.txt")
+        ap.add_argument("--profile-mode", choices=("sample", "cprofile"), default="sample")
+        ap.add_argument("--profile-interval-ms", type=float, default=5.0)
+        ap.add_argument("--profile-top", type=int, default=30)
         args = ap.parse_args()
-        if yaml is None:
+        if not args.config and not (args.extract or args.serve):
+            ap.error("--config is required")
+        if args.config and yaml is None:
             print("Install PyYAML: pip install pyyaml"); sys.exit(1)
-        with open(args.config, "r", encoding="utf-8") as f:
-            cfg = yaml.safe_load(f)
-        run_cli(cfg)
+        cfg = {}
+        if args.config:
+            with open(args.config, "r", encoding="utf-8") as f:
+                cfg = yaml.safe_load(f) or {}
+        if args.replay:
+            cfg["replay"] = args.replay
+        targets = args.targets or cfg.get("targets")
+        prof = nullcontext()
+        if args.profile:
+            prof = CrawlProfiler(args.profile, mode=args.profile_mode,
+                                 interval_ms=args.profile_interval_ms, top=args.profile_top)
+        with prof:
+            if args.serve:
+                run_serve(cfg, args.serve)
+            elif args.extract:
+                run_extract(cfg, args.extract, args.workers)
+            elif targets:
+                run_batch(cfg, targets)
+            else:
+                run_cli(cfg)
+        if args.profile:
+            print(f"[PHORN/CLI] profile: {args.profile}.collapsed, {args.profile}.top.txt"
+                  + (f", {args.profile}.prof" if args.profile_mode == "cprofile" else ""))
     else:
         curses.wrapper(curses_main)
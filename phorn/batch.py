@@ -0,0 +1,125 @@
+# phorn/batch.py
+import asyncio
+
+import aiohttp
+
+from .crawl import crawl
+from .net import DEFAULT_NET, make_httpx_client
+from .render import BrowserPool
+from .stats import CrawlStats, stats_loop
+from .warc import WarcArchive
+
+def load_targets(path: str) -> list[str]:
+    """Plik z domenami: jedna na linię, '#' = komentarz, duplikaty pomijane (kolejność zachowana)."""
+    out, seen = [], set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            d = line.split("#", 1)[0].strip().lower()
+            if d.startswith(("http://", "https://")):
+                d = d.split("://", 1)[1]
+            d = d.strip("/")
+            if d and d not in seen:
+                seen.add(d); out.append(d)
+    return out
+
+async def crawl_batch(
+    domains: list[str],
+    mode: int,
+    max_pages: int,
+    *,
+    on_scan=None,
+    on_found=None,
+    on_status=None,
+    on_detail=None,
+    on_ip=None,
+    on_fp=None,
+    on_domain_done=None,
+    on_stats=None,
+    stats_hll: bool = True,
+    parallel_domains: int = 4,
+    total_concurrency: int = 16,
+    domain_timeout_s: float | None = None,
+    **crawl_kwargs,
+) -> dict[str, int]:
+    """
+    Crawl wielu domen w jednym procesie: wspólny aiohttp session i klient httpx (pule połączeń
+    + jeden cache DNS, timeouty z crawl_kwargs["net"]), wspólna pula Playwright i globalny budżet równoległych pobrań (total_concurrency).
+    Callbacki jak w crawl(), z wyjątkiem on_status(domain, s, q, f, e) i on_detail(domain, msg).
+    on_stats — łącznie dla batcha (unikaty przez HyperLogLog, jeśli stats_hll), co stats_interval_s.
+    replay — jedno archiwum WARC (indeks budowany raz) dla wszystkich domen; warc — pliki osobno per domena.
+    Zwraca {domena: liczba trafień}.
+    """
+    per_domain = max(1, int(crawl_kwargs.pop("concurrency", 1)))
+    proxy = crawl_kwargs.get("proxy")
+
+    budget = asyncio.Semaphore(max(1, total_concurrency))
+    dom_sem = asyncio.Semaphore(max(1, parallel_domains))
+    results: dict[str, int] = {}
+
+    def _noop(*_a, **_kw): ...
+
+    pool = None
+    if crawl_kwargs.get("render_pool") is None:
+        # bez profilu per-domena — jedna przeglądarka dla całego batcha; startuje leniwie, także gdy
+        # render_mode == 0 (domena z CF przełącza się na renderowanie i nie powinna odpalać własnej)
+        pool = BrowserPool(
+            proxy,
+            size=crawl_kwargs.pop("render_pool_size", None) or min(total_concurrency, 4),
+            recycle_after=crawl_kwargs.pop("render_recycle_after", 50),
+            timeout_ms=crawl_kwargs.pop("render_timeout_ms", 15000),
+            block_resources=crawl_kwargs.pop("render_block_resources", True),
+            settle_ms=crawl_kwargs.pop("render_settle_ms", 400),
+            on_detail=(lambda m: on_detail("*", m)) if on_detail else None,
+        )
+        crawl_kwargs["render_pool"] = pool
+
+    net = crawl_kwargs.get("net") or DEFAULT_NET
+    resolver = net.resolver()
+    conn = aiohttp.TCPConnector(
+        limit=net.limit or max(20, 2*total_concurrency), limit_per_host=net.limit_per_host or max(2, per_domain),
+        ttl_dns_cache=int(net.dns_ttl_s), resolver=resolver,
+    )
+    try: client = make_httpx_client(net, proxy=proxy, resolver=resolver, concurrency=total_concurrency)
+    except Exception: client = None
+    metrics = crawl_kwargs.get("metrics")
+    stats = crawl_kwargs.pop("stats", None) or CrawlStats(hll=stats_hll)
+    stats_interval_s = float(crawl_kwargs.pop("stats_interval_s", 1.0))
+    if crawl_kwargs.get("replay") and not isinstance(crawl_kwargs["replay"], WarcArchive):
+        crawl_kwargs["replay"] = WarcArchive(crawl_kwargs["replay"])
+    traces = [metrics.trace_config()] if metrics is not None else None
+
+    async def one(domain: str):
+        async with dom_sem:
+            n = 0; err = None
+            try:
+                coro = crawl(
+                    domain, mode, max_pages,
+                    on_scan or _noop,
+                    on_found or _noop,
+                    (lambda s,q,f,e: on_status(domain, s, q, f, e)) if on_status else _noop,
+                    on_detail=(lambda m: on_detail(domain, m)) if on_detail else None,
+                    on_ip=on_ip, on_fp=on_fp,
+                    concurrency=per_domain,
+                    session=session, httpx_client=client, budget=budget, stats=stats,
+                    **crawl_kwargs,
+                )
+                hits = await (asyncio.wait_for(coro, domain_timeout_s) if domain_timeout_s else coro)
+                n = len(hits)
+            except asyncio.TimeoutError:
+                err = "timeout"
+            except Exception as e:
+                err = str(e) or e.__class__.__name__
+            results[domain] = n
+            if on_domain_done: on_domain_done(domain, n, err)
+
+    ticker = asyncio.create_task(stats_loop(stats, on_stats, stats_interval_s)) if on_stats else None
+    try:
+        async with aiohttp.ClientSession(timeout=net.aiohttp_timeout(), connector=conn, trace_configs=traces) as session:
+            await asyncio.gather(*(one(d) for d in domains))
+        if on_stats: on_stats(*stats.snapshot())
+    finally:
+        if ticker is not None: ticker.cancel()
+        if client is not None: await client.aclose()
+        await resolver.close()
+        if pool: await pool.close()
+    return results
@@ -2,6 +2,7 @@
 import asyncio
 import re
 import time
+from contextlib import AsyncExitStack, nullcontext
 from pathlib import Path
 from collections import Counter
 from urllib.parse import unquote, urlparse
@@ -16,30 +17,35 @@ except Exception:
 
 from .extract import (
     PHONE_RE, EMAIL_RE, clean_phone, guess_username,
-    find_ips, detect_fingerprint_indicators
+    scan_extras, ScriptScanCache
 )
 from .net import (
-    fetch_html, fetch_html_aggr,
-    same_domain, defrag_and_norm, detect_cloudflare, UA
+    fetch_page, fetch_page_aggr, probe_page, FetchResult, NetProfile, DEFAULT_NET, make_httpx_client,
+    same_domain, defrag_and_norm, classify_page, url_template, BASE_HEADERS
 )
+from .render import BrowserPool, _interactive_unlock, _cookie_header_from
+from .frontier import LocalFrontier
+from .metrics import NULL_METRICS
+from .events import Events, EventLog
+from .retry import RetryPolicy
+from .dedupe import NearDupIndex
+from .traps import TrapGuard
+from .stream import StreamExtractor
+from .stats import CrawlStats, stats_loop
+from .warc import WarcWriter, WarcArchive
+from .phones import PhoneEngine, country_for_domain
+
+# extract_mode="stream": prefiks tekstu strony trzymany dla SimHash (near_dup)
+_STREAM_DEDUPE_TEXT = 256 * 1024
 
-_CF_SIGNS = (
-    "attention required! | cloudflare",
-    "checking your browser before accessing",
-    "just a moment...",
-    "cf-chl-bypass",
-    "cf-browser-verification",
-)
+def _looks_js_or_cf(html: str | None) -> bool:
+    # wspólny, zapamiętany werdykt z net.classify_page (te same znaki CF co _looks_cloudflare)
+    return classify_page(html).js_or_cf
 
-LAUNCH_ARGS = ["--disable-blink-features=AutomationControlled","--no-sandbox","--disable-dev-shm-usage"]
+def _no_event(*_a, **_kw): ...
 
-def _looks_js_or_cf(html: str | None) -> bool:
-    if not html: return True
-    low = html.lower()
-    if any(s in low for s in _CF_SIGNS): return True
-    if low.count("<a ") < 3 and low.count("<script") >= 3: return True
-    if "<noscript" in low: return True
-    return False
+async def _const(v):
+    return v
 
 def _normalize_host(netloc: str) -> str:
     return netloc.split(":", 1)[0].lower()
@@ -48,16 +54,6 @@ def _host_of(u: str) -> str:
     try: return _normalize_host(urlparse(u).netloc)
     except Exception: return ""
 
-def _cookie_header_from(pw_cookies: list[dict]) -> str:
-    parts = []
-    for c in pw_cookies:
-        n,v = c.get("name"), c.get("value")
-        if n and v: parts.append(f"{n}={v}")
-    return "; ".join(parts)
-
-def _has_cf_clearance(cookies: list[dict]) -> bool:
-    return any(c.get("name","").lower().startswith("cf_clearance") for c in cookies)
-
 def _put_cookie(cookie_hdr: dict[str,str], host: str, header: str):
     if not host or not header: return
     cookie_hdr[host] = header
@@ -65,119 +61,20 @@ def _put_cookie(cookie_hdr: dict[str,str], host: str, header: str):
         parent = host.split(".",1)[1]
         cookie_hdr[parent] = header
 
-def _profile_dir_for(domain: str) -> str:
-    base = Path.home() / ".phorn" / "profiles"
-    base.mkdir(parents=True, exist_ok=True)
-    return str(base / domain.replace(":", "_"))
-
-def _cleanup_chrome_singleton(profile_dir: str, on_detail=None):
-    if not profile_dir: return
-    for name in ("SingletonLock","SingletonCookie","SingletonSocket"):
-        p = Path(profile_dir) / name
-        try:
-            if p.exists():
-                p.unlink()
-        except Exception as e:
-            if on_detail: on_detail(f"cleanup warn: {e}")
-
-# ------------ Playwright helpers ------------
-async def _render_html(browser_ctx, url: str, timeout_ms: int) -> str | None:
-    try:
-        page = browser_ctx["page"]
-        await page.goto(url, wait_until="networkidle", timeout=timeout_ms)
-        await page.wait_for_timeout(1200)
-        return await page.content()
-    except Exception:
-        return None
-
-async def _ensure_browser(existing_ctx, proxy, *, headless=True, domain_for_profile=None, on_detail=None):
-    if existing_ctx is not None:
-        return existing_ctx, None
-    try:
-        from playwright.async_api import async_playwright
-        pw = await async_playwright().start()
-        ctx_opts = dict(locale="pl-PL", user_agent=UA, viewport={"width":1366,"height":768})
-        if proxy: ctx_opts["proxy"] = {"server": proxy}
-        context = None; browser = None
-        profile_dir = _profile_dir_for(domain_for_profile) if domain_for_profile else None
-        use_channel = "chrome"
-        if profile_dir: _cleanup_chrome_singleton(profile_dir, on_detail)
-        if profile_dir:
-            try:
-                context = await pw.chromium.launch_persistent_context(
-                    profile_dir, channel=use_channel, headless=headless, args=LAUNCH_ARGS, **ctx_opts
-                )
-            except Exception:
-                pass
-        if context is None:
-            try:
-                browser = await pw.chromium.launch(channel=use_channel, headless=headless, args=LAUNCH_ARGS)
-            except Exception:
-                browser = await pw.chromium.launch(headless=headless, args=LAUNCH_ARGS)
-            context = await browser.new_context(**ctx_opts)
-        page = await context.new_page()
-        try:
-            from playwright_stealth import stealth_async
-            await stealth_async(page)
-        except Exception:
-            pass
-        return {"browser": browser, "context": context, "page": page}, pw
-    except Exception as e:
-        if on_detail: on_detail(f"browser launch failed: {e}")
-        return None, None
-
-async def _interactive_unlock(url, proxy, *, timeout_s, on_detail, domain_for_profile):
-    ctx, pw = await _ensure_browser(None, proxy, headless=False, domain_for_profile=domain_for_profile, on_detail=on_detail)
-    if not ctx:
-        on_detail("interactive: cannot start browser (missing deps?)")
-        return None, None
-    try:
-        page = ctx["page"]
-        await page.goto(url, wait_until="domcontentloaded", timeout=30000)
-        start = time.time()
-        while time.time() - start < timeout_s:
-            try:
-                sel = ("button:has-text('Akceptuj'), button:has-text('Zgadzam'), "
-                       "button:has-text('Accept'),   button:has-text('I agree'), "
-                       "button:has-text('OK'),       button:has-text('Got it')")
-                btn = page.locator(sel).first
-                if await btn.is_visible():
-                    await btn.click(); on_detail("interactive: clicked cookie banner")
-                    await page.wait_for_timeout(500); await page.reload(wait_until="domcontentloaded")
-            except Exception: pass
-            try:
-                cookies = await ctx["context"].cookies()
-                if _has_cf_clearance(cookies):
-                    html = await page.content()
-                    return html, _cookie_header_from(cookies)
-            except Exception: pass
-            waited = int(time.time() - start)
-            if waited and waited % 5 == 0:
-                on_detail(f"interactive: waiting… {waited}s/{timeout_s}s → reload")
-                try: await page.reload(wait_until="domcontentloaded")
-                except Exception: pass
-            await page.wait_for_timeout(1000)
-        on_detail("interactive: timeout")
-        return None, None
-    finally:
-        try:
-            await ctx["context"].close()
-            if ctx.get("browser"): await ctx["browser"].close()
-            if pw: await pw.stop()
-        except Exception: pass
-
 # ------------ robots.txt ------------
-async def _fetch_robots(session: aiohttp.ClientSession, domain: str, proxy: str | None, on_detail):
+async def _fetch_robots(session: aiohttp.ClientSession, domain: str, proxy: str | None,
+                        net: NetProfile = DEFAULT_NET):
     url = f"https://{domain}/robots.txt"
+    timeout = net.aiohttp_timeout(net.probe_s)
     try:
-        async with session.get(url, proxy=proxy, timeout=8) as r:
+        async with session.get(url, proxy=proxy, timeout=timeout) as r:
             if r.status != 200:
                 return []
             txt = await r.text(errors="ignore")
     except Exception:
         # spróbuj http
         try:
-            async with session.get(f"http://{domain}/robots.txt", proxy=proxy, timeout=8) as r:
+            async with session.get(f"http://{domain}/robots.txt", proxy=proxy, timeout=timeout) as r:
                 if r.status != 200:
                     return []
                 txt = await r.text(errors="ignore")
@@ -197,9 +94,31 @@ async def _fetch_robots(session: aiohttp.ClientSession, domain: str, proxy: str
             cur_block = agent
         elif k == "disallow" and (cur_block in ("*","phorn","phorn-bot")):
             rules.append(v or "/")
-    on_detail(f"robots: {len(rules)} disallow rules")
     return rules
 
+# ------------ sitemap.xml ------------
+_LOC_RE = re.compile(r"<loc>\s*([^<\s]+)\s*</loc>", re.I)
+
+async def _fetch_sitemap(session: aiohttp.ClientSession, domain: str, proxy: str | None,
+                         net: NetProfile = DEFAULT_NET) -> list[str]:
+    timeout = net.aiohttp_timeout(net.probe_s)
+    async def one(path: str) -> str:
+        for scheme in ("https", "http"):
+            try:
+                async with session.get(f"{scheme}://{domain}{path}", headers=BASE_HEADERS,
+                                       proxy=proxy, timeout=timeout) as r:
+                    if r.status == 200:
+                        return await r.text(errors="ignore")
+            except Exception:
+                continue
+        return ""
+    out = []
+    for xml in await asyncio.gather(one("/sitemap.xml"), one("/sitemap_index.xml")):
+        for m in _LOC_RE.finditer(xml):
+            u = m.group(1).strip()
+            if same_domain(u, domain): out.append(u)
+    return out
+
 def _robots_allowed(url: str, domain: str, rules: list[str]) -> bool:
     try:
         p = urlparse(url).path or "/"
@@ -243,9 +162,47 @@ async def crawl(
     exclude_re: str = "",
     cookies_in_file: str = "",
     cookies_out_file: str = "",
+    render_pool_size: int | None = None,
+    render_recycle_after: int = 50,
+    render_timeout_ms: int = 15000,
+    render_pool: BrowserPool | None = None,
+    render_block_resources: bool = True,
+    render_settle_ms: int | None = 400,
+    session: aiohttp.ClientSession | None = None,
+    budget: asyncio.Semaphore | None = None,
+    frontier=None,
+    seed_frontier: bool = True,
+    metrics=None,
+    event_log: EventLog | None = None,
+    max_retries: int = 2,
+    retry_backoff_s: float = 0.5,
+    retry_max_delay_s: float = 30.0,
+    net: NetProfile | None = None,
+    httpx_client=None,
+    near_dup: bool | NearDupIndex = False,
+    near_dup_distance: int = 3,
+    traps: bool | TrapGuard = False,
+    trap_max_per_pattern: int = 500,
+    trap_max_param_values: int = 50,
+    trap_max_url_len: int = 2048,
+    extract_mode: str = "dom",
+    stats: CrawlStats | None = None,
+    stats_interval_s: float = 1.0,
+    warc: str | WarcWriter | None = None,
+    warc_max_mb: int = 1024,
+    replay=None,
+    script_cache: ScriptScanCache | None = None,
+    phone_countries: list[str] | None = None,
+    backpressure=None,
 ) -> list[Hit]:
-    def detail(msg: str):
-        if on_detail: on_detail(msg)
+    # zdarzenia: on_detail (tekst dla TUI) i/lub event_log (NDJSON); wyłączone → no-op bez formatowania
+    events = Events(domain, on_detail=on_detail, log=event_log)
+    emit = events.emit if events.active else _no_event
+    detail = events.note if events.active else _no_event
+
+    met = metrics or NULL_METRICS
+    if extract_mode not in ("dom", "stream"):
+        raise ValueError(f"extract_mode must be 'dom' or 'stream', got {extract_mode!r}")
 
     # no-op callbacks
     if on_ip is None:
@@ -256,12 +213,46 @@ async def crawl(
     hits: list[Hit] = []
     scanned = found = errors = 0
 
-    uniq_phones, uniq_emails = set(), set()
-    path_counter = Counter()
-
-    q: asyncio.Queue = asyncio.Queue()
-    visited: set[str] = set()
-    vlock = asyncio.Lock()
+    # statystyki przyrostowe; on_stats co stats_interval_s (nie co stronę). stats można współdzielić (batch, HLL)
+    st = stats if stats is not None else CrawlStats()
+
+    # ponowienia przejściowych błędów (DNS/connect/timeout/5xx/429) — URL wraca do frontiera z opóźnieniem
+    retry = RetryPolicy(max_retries=max_retries, base_s=retry_backoff_s, cap_s=retry_max_delay_s)
+    attempts: dict[str, int] = {}
+    err_classes, retried = Counter(), Counter()
+
+    # prawie-duplikaty (SimHash): bez ekstrakcji; szablony URL-i z samymi duplikatami nie rozwijają linków
+    ndi = near_dup if isinstance(near_dup, NearDupIndex) else (NearDupIndex(max_distance=near_dup_distance) if near_dup else None)
+    # pułapki (kalendarze, fasety, sesje w URL-u): limity na wzorzec/parametr przy dodawaniu linków
+    guard = traps if isinstance(traps, TrapGuard) else (TrapGuard(
+        max_per_pattern=trap_max_per_pattern, max_param_values=trap_max_param_values, max_url_len=trap_max_url_len,
+    ) if traps else None)
+
+    # telefony: domyślnie PL (PHONE_RE/clean_phone); phone_countries → jeden wzorzec dla kilku krajów,
+    # numery krajowe bez +CC wg kraju z TLD domeny (albo pierwszego z listy)
+    if phone_countries:
+        countries = [c.upper() for c in phone_countries]
+        eng = PhoneEngine.for_countries(countries, country_for_domain(domain, countries))
+        phone_re, clean_ph = eng.regex, eng.clean
+    else:
+        phone_re, clean_ph = PHONE_RE, clean_phone
+
+    # wyniki skanu IP/FP skryptów inline, kluczem hash treści (na ten crawl albo współdzielone, np. w usłudze)
+    if script_cache is None:
+        script_cache = ScriptScanCache()
+
+    # WARC: zapis stron w postaci widzianej przez ekstrakcję; replay = archiwum zamiast sieci (phorn/warc.py)
+    own_warc = isinstance(warc, (str, Path)) and bool(warc)
+    warc_w = WarcWriter(warc, prefix=domain, max_bytes=warc_max_mb * 1024 * 1024) if own_warc else (warc or None)
+    archive = WarcArchive(replay) if replay and not isinstance(replay, WarcArchive) else (replay or None)
+    if archive is not None:
+        # HTML w archiwum jest już po renderze; bez robots/sitemap/odblokowania i bez opóźnień
+        render_mode, delay_ms = 0, 0
+        obey_robots = use_sitemap = interactive_unlock = False
+
+    # kolejka + „widziane”: lokalnie albo współdzielone między procesami (phorn/frontier.py)
+    if frontier is None:
+        frontier = LocalFrontier()
 
     inc_re = re.compile(include_re) if include_re else None
     exc_re = re.compile(exclude_re) if exclude_re else None
@@ -269,248 +260,423 @@ async def crawl(
     seeds = []
     if start_url: seeds.append((start_url, 0))
     seeds += [(f"https://{domain}/", 0), (f"http://{domain}/", 0)]
-    for u,d in seeds: await q.put((u,d))
+    if archive is not None:
+        # każda zarchiwizowana strona domeny (także te z sitemap); linki poza archiwum nie trafiają do kolejki
+        seeds = [(u, d) for u, d in seeds if u in archive] + [(u, 0) for u in archive.urls() if same_domain(u, domain)]
+    if seed_frontier:
+        for u,d in seeds: await frontier.put(u, d)
 
     cookie_hdr: dict[str,str] = {}
 
     if seed_cookie_header:
-        _put_cookie(cookie_hdr, domain.lower(), seed_cookie_header); detail("cookies: seeded (UI)")
+        _put_cookie(cookie_hdr, domain.lower(), seed_cookie_header); emit("cookies.seeded", source="UI")
     if cookies_in_file:
         try:
             with open(cookies_in_file, "r", encoding="utf-8") as f:
                 hdr = f.read().strip()
             if hdr:
-                _put_cookie(cookie_hdr, domain.lower(), hdr); detail("cookies: seeded (file)")
+                _put_cookie(cookie_hdr, domain.lower(), hdr); emit("cookies.seeded", source="file")
         except Exception as e:
-            detail(f"cookies import error: {e}")
-
-    browser_ctx = None; pw = None
-    render_sem = asyncio.Semaphore(1)
+            emit("cookies.error", error=str(e))
+
+    # pula renderująca: własna (leniwy start) albo współdzielona z zewnątrz
+    own_pool = render_pool is None
+    pool = render_pool or BrowserPool(
+        proxy, size=(render_pool_size or min(max(1, concurrency), 4)),
+        recycle_after=render_recycle_after, timeout_ms=render_timeout_ms,
+        headless=True, domain_for_profile=domain, on_detail=detail,
+        block_resources=render_block_resources, settle_ms=render_settle_ms,
+    )
     interact_sem = asyncio.Semaphore(1)
 
-    timeout = aiohttp.ClientTimeout(total=12, connect=6, sock_connect=6, sock_read=8)
-    conn = aiohttp.TCPConnector(limit=max(20, 5*concurrency), ttl_dns_cache=300)
-
-    async with aiohttp.ClientSession(timeout=timeout, connector=conn) as session:
-
-        robots_rules = []
+    net = net or DEFAULT_NET
+
+    async with AsyncExitStack() as stack:
+        # wspólny cache DNS dla aiohttp i httpx (tylko gdy sesję/klienta tworzymy sami)
+        resolver = None
+        if session is None and archive is None:
+            resolver = net.resolver()
+            stack.push_async_callback(resolver.close)
+            traces = [metrics.trace_config()] if metrics is not None else None
+            session = await stack.enter_async_context(aiohttp.ClientSession(
+                timeout=net.aiohttp_timeout(), trace_configs=traces,
+                connector=net.connector(concurrency=concurrency, resolver=resolver),
+            ))
+        if httpx_client is None and archive is None:
+            try: httpx_client = make_httpx_client(net, proxy=proxy, resolver=resolver, concurrency=concurrency)
+            except Exception: httpx_client = None
+            if httpx_client is not None:
+                await stack.enter_async_context(httpx_client)
+
+        # sondy startowe równolegle: robots.txt, sitemap i GET seeda (werdykt CF; treść zostaje jako
+        # pierwsze pobranie tej strony, zamiast drugiego identycznego żądania). render_mode 2 nie potrzebuje sondy.
+        seed_url = start_url or f"https://{domain}/"
+        seed_host = _host_of(seed_url)
+        robots_rules, (is_cf, seed_res), sitemap_urls = await asyncio.gather(
+            _fetch_robots(session, domain, proxy, net) if obey_robots else _const([]),
+            probe_page(session, seed_url, proxy=proxy, metrics=metrics, profile=net,
+                       extra_headers={"Cookie": cookie_hdr[seed_host]} if seed_host in cookie_hdr else None)
+            if render_mode != 2 and archive is None else _const((False, FetchResult(None))),
+            _fetch_sitemap(session, domain, proxy, net) if use_sitemap else _const([]),
+        )
         if obey_robots:
-            robots_rules = await _fetch_robots(session, domain, proxy, detail)
-
-        try:
-            seed_url = start_url or f"https://{domain}/"
-            if await detect_cloudflare(session, seed_url, proxy=proxy) and render_mode == 0:
-                render_mode = 1
-        except Exception: pass
-
-        if use_sitemap:
-            try:
-                from .net import fetch_html as _fh
-                for path in ("/sitemap.xml", "/sitemap_index.xml"):
-                    html = await _fh(session, f"https://{domain}{path}", proxy=proxy) or \
-                           await _fh(session, f"http://{domain}{path}",  proxy=proxy)
-                    if not html: continue
-                    for m in re.finditer(r"<loc>\s*([^<\s]+)\s*</loc>", html, re.I):
-                        u = m.group(1).strip()
-                        if same_domain(u, domain):
-                            await q.put((u,0))
-            except Exception: pass
-
-        async def _get_html(u: str, extra_headers: dict[str,str] | None):
-            if aggr_net:
-                return await fetch_html_aggr(u, proxy=proxy, extra_headers=extra_headers)
-            else:
-                return await fetch_html(session, u, proxy=proxy, extra_headers=extra_headers)
-
-        async def worker(wid:int):
-            nonlocal scanned, found, errors, browser_ctx, pw
-            while (scanned < max_pages):
+            emit("robots.rules", rules=len(robots_rules))
+        if is_cf and render_mode == 0:
+            render_mode = 1
+        prefetched: dict[str, FetchResult] = {}
+        # sonda to zwykły GET aiohttp: zastępuje pierwsze pobranie tylko tam, gdzie fetch_page poszedłby
+        # tą samą ścieżką (bez aggr_net/httpx) i bez CF; inaczej seed pobieramy normalnie
+        if seed_res.text is not None and not is_cf and not aggr_net:
+            prefetched[seed_url] = seed_res
+        for u in sitemap_urls:
+            await frontier.put(u, 0)
+        if seed_frontier:
+            # dopiero teraz wspólny frontier może być uznany za opróżniony (workery czekają na seedy)
+            await frontier.mark_seeded()
+
+        async def _get_html(u: str, extra_headers: dict[str,str] | None, sink=None):
+            if archive is not None:
+                emit("fetch.replay", url=u)
+                return archive.get(u) or FetchResult(None, 0, "http")
+            if prefetched:
+                pre = prefetched.pop(u, None)
+                if pre is not None:
+                    emit("fetch.prefetched", url=u)
+                    return pre
+            with met.time("fetch_seconds"):
+                if aggr_net:
+                    coro = fetch_page_aggr(u, proxy=proxy, extra_headers=extra_headers, profile=net,
+                                           client=httpx_client, sink=sink)
+                else:
+                    coro = fetch_page(session, u, proxy=proxy, extra_headers=extra_headers,
+                                      metrics=metrics, profile=net, client=httpx_client, sink=sink)
                 try:
-                    url, depth = await asyncio.wait_for(q.get(), timeout=1.0)
+                    return await asyncio.wait_for(coro, net.page_s)
                 except asyncio.TimeoutError:
-                    if scanned >= max_pages: break
-                    await asyncio.sleep(0.05)
-                    continue
-                async with vlock:
-                    if url in visited:
-                        q.task_done()
-                        on_status(scanned, q.qsize(), found, errors)
+                    return FetchResult(None, 0, "timeout")
+
+        def _plan_retry(u: str, res) -> float | None:
+            """Liczy błąd wg klasy; zwraca opóźnienie ponowienia albo None (nieponawialny / limit)."""
+            cls = res.error or "other"
+            err_classes[cls] += 1; met.inc(f"fetch_errors_{cls}_total")
+            n = attempts[u] = attempts.get(u, 0) + 1
+            if not retry.should_retry(cls, n):
+                attempts.pop(u, None)
+                emit("fetch.error", url=u, error=cls, status=res.status, attempts=n)
+                return None
+            d = retry.delay(n, res.retry_after)
+            retried[cls] += 1; met.inc("retries_total")
+            emit("fetch.retry", url=u, error=cls, status=res.status, attempt=n, delay=round(d, 2))
+            return d
+
+        async def _render(u: str, **kw):
+            with met.time("render_seconds"):
+                return await pool.render(u, **kw)
+
+        async def _emit(hit: Hit):
+            nonlocal found
+            # wspólny frontier: trafienie zgłaszamy tylko jeśli nie znalazł go już inny proces
+            if frontier.shared and not await frontier.add_hit(hit):
+                return
+            hits.append(hit); found += 1; on_found(hit)
+
+        async def _enqueue_links(base: str, depth: int, hrefs) -> int:
+            added = 0
+            for href in hrefs:
+                nxt=defrag_and_norm(base, href)
+                if not nxt: continue
+                if not nxt[:8].lower().startswith(("http://", "https://")): continue   # tel:, mailto:, javascript:
+                if not same_domain(nxt, domain): continue
+                if archive is not None and nxt not in archive: continue
+                if inc_re and not inc_re.search(nxt): continue
+                if exc_re and exc_re.search(nxt): continue
+                nd = depth + 1
+                if (max_depth is not None) and (nd > max_depth): continue
+                # pułapki po tanich filtrach — odrzucone i tak linki nie zużywają limitów wzorców
+                if guard is not None:
+                    n_rules = len(guard.rejected)
+                    raw, (nxt, reason) = nxt, guard.admit(nxt)
+                    if nxt is None:
+                        met.inc("trap_rejected_total")
+                        # zdarzenie raz na (powód, wzorzec) — przy pierwszym odrzuceniu
+                        if reason and len(guard.rejected) > n_rules:
+                            emit("trap.throttled", reason=reason, pattern=url_template(raw))
                         continue
-                    visited.add(url)
-
-                if inc_re and not inc_re.search(url): 
-                    q.task_done(); on_status(scanned, q.qsize(), found, errors); continue
-                if exc_re and exc_re.search(url): 
-                    q.task_done(); on_status(scanned, q.qsize(), found, errors); continue
-                if (max_depth is not None) and (depth > max_depth):
-                    q.task_done(); on_status(scanned, q.qsize(), found, errors); continue
-                if obey_robots and not _robots_allowed(url, domain, robots_rules):
-                    detail("robots: disallow"); q.task_done(); on_status(scanned, q.qsize(), found, errors); continue
-
-                on_scan(url); detail("start")
-
-                host = _host_of(url)
-                extra = {"Cookie": cookie_hdr[host]} if host in cookie_hdr else {}
-
-                html = None
-                if render_mode == 0:
-                    detail("fetch: HTTP")
-                    html = await _get_html(url, extra)
-                elif render_mode == 2:
-                    detail("render: Playwright (always)")
-                    async with render_sem:
-                        if browser_ctx is None:
-                            browser_ctx, pw = await _ensure_browser(browser_ctx, proxy, headless=True, domain_for_profile=domain, on_detail=detail)
-                        html = await _render_html(browser_ctx, url, timeout_ms=15000) if browser_ctx else None
-                        if html and browser_ctx:
-                            try:
-                                ck = await browser_ctx["context"].cookies(url)
+                if await frontier.put(nxt, nd): added += 1
+            return added
+
+        async def _page(url: str, depth: int) -> float | None:
+            """Obsługa jednego URL-a; zwraca opóźnienie ponowienia albo None (URL zakończony)."""
+            nonlocal scanned, errors
+            if inc_re and not inc_re.search(url): 
+                on_status(scanned, frontier.qsize(), found, errors); return None
+            if exc_re and exc_re.search(url): 
+                on_status(scanned, frontier.qsize(), found, errors); return None
+            if (max_depth is not None) and (depth > max_depth):
+                on_status(scanned, frontier.qsize(), found, errors); return None
+            if obey_robots and not _robots_allowed(url, domain, robots_rules):
+                emit("robots.disallow", url=url); on_status(scanned, frontier.qsize(), found, errors); return None
+
+            on_scan(url); emit("page.start", url=url, depth=depth)
+
+            host = _host_of(url)
+            extra = {"Cookie": cookie_hdr[host]} if host in cookie_hdr else {}
+
+            # extract_mode="stream": tokenizer karmiony w trakcie pobierania (tylko czysty HTTP, bez renderu)
+            sx = spool = None
+            if extract_mode == "stream" and render_mode == 0:
+                sx = StreamExtractor(phones=mode in (1,3), emails=mode in (2,3),
+                                     keep_text=_STREAM_DEDUPE_TEXT if ndi is not None else 0,
+                                     phone_re=phone_re, phone_clean=clean_ph)
+                if warc_w is not None: spool = warc_w.spool()
+                # linki zostają w sx.links do końca: do frontiera dopiero po przyjęciu strony
+                # (nie przy retry, przerwanym strumieniu, duplikacie przekierowania ani blokadzie CF)
+                async def _sink(base: str, piece: str):
+                    sx.feed(piece)
+                    if spool is not None: spool.write(piece.encode("utf-8"))
+
+            try:                            # spool WARC zamykany także przy retry i wyjątku
+                met.add("inflight", 1)
+                res = retry_in = None
+                try:
+                    async with (budget or nullcontext()):
+                        html = None
+                        if render_mode == 0:
+                            emit("fetch.http", url=url)
+                            res = await _get_html(url, extra, _sink if sx is not None else None); html = res.text
+                        elif render_mode == 2:
+                            emit("render.always", url=url)
+                            html = await _render(url)
+                            if html:
+                                ck = await pool.cookies(url)
                                 if ck:
                                     _put_cookie(cookie_hdr, host, _cookie_header_from(ck))
-                                    detail("cookies: captured (render)")
-                            except Exception: pass
-                    if not html:
-                        detail("render failed → fallback HTTP")
-                        html = await _get_html(url, extra)
-                else:
-                    detail("fetch: HTTP (fallback first)")
-                    html = await _get_html(url, extra)
-                    if _looks_js_or_cf(html):
-                        detail("CF/JS detected → render headless")
-                        async with render_sem:
-                            if browser_ctx is None:
-                                browser_ctx, pw = await _ensure_browser(browser_ctx, proxy, headless=True, domain_for_profile=domain, on_detail=detail)
-                            if browser_ctx:
-                                html2 = await _render_html(browser_ctx, url, timeout_ms=12000)
+                                    emit("cookies.captured", source="render", host=host)
+                            if not html:
+                                emit("render.failed", url=url)
+                                res = await _get_html(url, extra); html = res.text
+                        else:
+                            emit("fetch.fallback", url=url)
+                            res = await _get_html(url, extra); html = res.text
+                            # przejściowy błąd sieci → ponów później zamiast renderować
+                            if html is None: retry_in = _plan_retry(url, res)
+                            if retry_in is None and _looks_js_or_cf(html):
+                                emit("render.cf", url=url)
+                                html2 = await _render(url, timeout_ms=min(12000, pool.timeout_ms))
                                 if html2:
                                     html = html2
-                                    try:
-                                        ck = await browser_ctx["context"].cookies(url)
-                                        if ck:
-                                            _put_cookie(cookie_hdr, host, _cookie_header_from(ck))
-                                            detail("cookies: captured (render)")
-                                    except Exception: pass
-                    if _looks_js_or_cf(html) and interactive_unlock:
-                        detail("still blocked → interactive unlock (opens browser)")
-                        async with interact_sem:
-                            html2, ck_hdr = await _interactive_unlock(
-                                url, proxy, timeout_s=interactive_timeout_s,
-                                on_detail=detail, domain_for_profile=domain,
-                            )
-                        if html2:
-                            html = html2
-                            if ck_hdr:
-                                _put_cookie(cookie_hdr, host, ck_hdr)
-                                detail("cookies: captured (interactive)")
-
-                scanned += 1
-                if _looks_js_or_cf(html):
-                    errors += 1; detail("skip: CF/timeout")
-                    on_status(scanned, q.qsize(), found, errors)
-                    q.task_done()
-                    if delay_ms: await asyncio.sleep(delay_ms/1000)
-                    continue
+                                    ck = await pool.cookies(url)
+                                    if ck:
+                                        _put_cookie(cookie_hdr, host, _cookie_header_from(ck))
+                                        emit("cookies.captured", source="render", host=host)
+                            if retry_in is None and _looks_js_or_cf(html) and interactive_unlock:
+                                emit("unlock.start", url=url)
+                                async with interact_sem:
+                                    html2, ck_hdr = await _interactive_unlock(
+                                        url, proxy, timeout_s=interactive_timeout_s,
+                                        on_detail=detail, domain_for_profile=domain,
+                                    )
+                                if html2:
+                                    html = html2
+                                    if ck_hdr:
+                                        _put_cookie(cookie_hdr, host, ck_hdr)
+                                        emit("cookies.captured", source="interactive", host=host)
+                finally:
+                    met.add("inflight", -1)
+
+                if html is None and res is not None and render_mode != 1:
+                    retry_in = _plan_retry(url, res)
+                if retry_in is not None:
+                    # nie liczymy do scanned — strona wróci do kolejki (worker woła frontier.retry)
+                    on_status(scanned, frontier.qsize(), found, errors)
+                    return retry_in
+                attempts.pop(url, None)
+                if warc_w is not None and html is not None:
+                    via_http = res is not None and html is res.text
+                    body = spool if via_http and res.streamed else html
+                    if body is spool: spool = None          # zamyka writer po zapisie
+                    await warc_w.write_page_async(url, body,
+                                                  status=res.status if via_http else 200, source="http" if via_http else "render",
+                                                  final_url=res.final_url if via_http else None,
+                                                  redirects=res.redirects if via_http else ())
+                    met.inc("warc_records_total")
+            finally:
+                if spool is not None: spool.close()
+            if sx is not None:
+                if html: sx.feed(html)       # nie strumieniowane (np. sonda startowa) — całość naraz
+                sx.close()
+
+            scanned += 1; met.inc("pages_total")
+            # przekierowania: wszystkie adresy łańcucha są „widziane”; cel już widziany → ta sama strona co gdzie indziej
+            if res is not None and res.final_url and res.final_url != url:
+                for hop in res.redirects:
+                    if hop != url: await frontier.add_seen(hop)
+                if not await frontier.add_seen(res.final_url):
+                    met.inc("redirect_dup_total"); emit("page.redirect_dup", url=url, to=res.final_url)
+                    on_status(scanned, frontier.qsize(), found, errors)
+                    return None
+                emit("fetch.redirect", url=url, to=res.final_url, hops=len(res.redirects))
+                url = res.final_url          # linki i trafienia względem adresu końcowego
+            if (sx.verdict.js_or_cf if sx is not None else _looks_js_or_cf(html)):
+                errors += 1; met.inc("errors_total"); emit("page.skip_blocked", url=url)
+                on_status(scanned, frontier.qsize(), found, errors)
+                if delay_ms: await asyncio.sleep(delay_ms/1000)
+                return None
 
-                on_status(scanned, q.qsize(), found, errors)
+            on_status(scanned, frontier.qsize(), found, errors)
 
-                soup = BeautifulSoup(html, "html.parser")
-                page_text = soup.get_text(" ", strip=True)
+            if sx is None:
+                with met.time("parse_seconds"):
+                    soup = BeautifulSoup(html, "html.parser")
+                    page_text = soup.get_text(" ", strip=True)
+            else:
+                soup, page_text = None, sx.text
+            dup_of = None
+            if ndi is not None:
+                tpl = url_template(url); was = tpl in ndi.throttled
+                with met.time("dedupe_seconds"):
+                    dup_of = ndi.check(url, page_text)
+                if dup_of:
+                    met.inc("near_dup_total"); emit("page.near_dup", url=url, of=dup_of)
+                    if not was and tpl in ndi.throttled:
+                        emit("dedupe.throttled", template=tpl, pages=ndi.pages[tpl], dups=ndi.dups[tpl])
+            t_ex = time.perf_counter()
+
+            # stats: path segment
+            try:
+                seg = (urlparse(url).path or "/").strip("/").split("/",1)[0]
+                st.add_path(seg)
+            except Exception: pass
 
-                # stats: path segment
-                try:
-                    seg = (urlparse(url).path or "/").strip("/").split("/",1)[0]
-                    path_counter[seg] += 1
-                except Exception: pass
-
-                phones=set()
-                if mode in (1,3):
-                    for m in PHONE_RE.finditer(page_text):
-                        ph=clean_phone(m.group(0))
+            phones=set()
+            if sx is not None:
+                if not dup_of: phones = sx.phones
+            elif mode in (1,3) and not dup_of:
+                for m in phone_re.finditer(page_text):
+                    ph=clean_ph(m.group(0))
+                    if ph: phones.add(ph)
+                for a in soup.find_all("a", href=True):
+                    href=a["href"].strip()
+                    if href.lower().startswith("tel:"):
+                        ph=clean_ph(unquote(href.split(":",1)[1]))
                         if ph: phones.add(ph)
-                    for a in soup.find_all("a", href=True):
-                        href=a["href"].strip()
-                        if href.lower().startswith("tel:"):
-                            ph=clean_phone(unquote(href.split(":",1)[1]))
-                            if ph: phones.add(ph)
-
-                emails=set()
-                if mode in (2,3):
-                    for m in EMAIL_RE.finditer(page_text):
-                        emails.add(m.group(0))
-                    for a in soup.find_all("a", href=True):
-                        href=a["href"].strip()
-                        if href.lower().startswith("mailto:"):
-                            addr=unquote(href.split(":",1)[1]).split("?",1)[0]
-                            if EMAIL_RE.fullmatch(addr): emails.add(addr)
-
-                # update UI stats
-                uniq_phones.update(phones)
-                uniq_emails.update(emails)
-                if on_stats:
-                    top_paths = sorted(path_counter.items(), key=lambda x:-x[1])[:5]
-                    on_stats(len(uniq_phones), len(uniq_emails), top_paths)
-
-                # ---- Extras (IP/FP) tylko jeśli ustawienie pozwala ----
-                should_collect_extras = True
-                if extras_only_on_phone:
-                    should_collect_extras = bool(phones)
-                if should_collect_extras:
-                    try:
-                        all_text = html or ""
-                        for sc in soup.find_all("script"):
-                            try:
-                                if sc.string:
-                                    all_text += " " + sc.string
-                            except Exception:
-                                pass
-                        for ip in find_ips(all_text):
-                            on_ip(IPHit(ip=ip, url=url))
-                    except Exception:
-                        pass
-                    try:
-                        for label, evid in detect_fingerprint_indicators(html or ""):
-                            on_fp(FPEvent(url=url, indicator=label, evidence=evid[:200]))
-                    except Exception:
-                        pass
-
-                # hits
-                if phones and emails:
-                    uname = guess_username(soup) if phones else ""
-                    for ph in phones:
-                        for em in emails:
-                            hit = Hit(domain, uname, ph, em, url)
-                            hits.append(hit); found += 1; on_found(hit)
-                elif phones:
-                    uname = guess_username(soup)
-                    for ph in phones:
-                        hit = Hit(domain, uname, ph, "", url)
-                        hits.append(hit); found += 1; on_found(hit)
-                elif emails:
-                    for em in emails:
-                        hit = Hit(domain, "", "", em, url)
-                        hits.append(hit); found += 1; on_found(hit)
 
-                # enqueue links
-                before = q.qsize()
+            emails=set()
+            if sx is not None:
+                if not dup_of: emails = sx.emails
+            elif mode in (2,3) and not dup_of:
+                for m in EMAIL_RE.finditer(page_text):
+                    emails.add(m.group(0))
                 for a in soup.find_all("a", href=True):
-                    nxt=defrag_and_norm(url, a["href"])
-                    if not nxt: continue
-                    if not same_domain(nxt, domain): continue
-                    if inc_re and not inc_re.search(nxt): continue
-                    if exc_re and exc_re.search(nxt): continue
-                    nd = depth + 1
-                    if (max_depth is not None) and (nd > max_depth): continue
-                    async with vlock:
-                        if nxt not in visited:
-                            await q.put((nxt, nd))
-                after = q.qsize()
-                if after>before: detail(f"enqueued: +{after-before} (queue={after})")
-
-                q.task_done()
-                if delay_ms: await asyncio.sleep(delay_ms/1000)
+                    href=a["href"].strip()
+                    if href.lower().startswith("mailto:"):
+                        addr=unquote(href.split(":",1)[1]).split("?",1)[0]
+                        if EMAIL_RE.fullmatch(addr): emails.add(addr)
+
+            # update UI stats (wysyła stats_loop)
+            st.add_found(phones, emails)
+
+            # ---- Extras (IP/FP) tylko jeśli ustawienie pozwala ----
+            should_collect_extras = not dup_of
+            if extras_only_on_phone:
+                should_collect_extras = bool(phones)
+            if should_collect_extras and sx is not None:
+                for ip in sx.ips:
+                    on_ip(IPHit(ip=ip, url=url))
+                for label, evid in sx.fp.items():
+                    on_fp(FPEvent(url=url, indicator=label, evidence=evid[:200]))
+            elif should_collect_extras:
+                try:
+                    # skrypty inline: cache po treści (ten sam bundle na każdej stronie skanowany raz)
+                    n_hits = script_cache.hits
+                    ips, fps = scan_extras(html or "", script_cache)
+                    met.inc("script_cache_hits_total", script_cache.hits - n_hits)
+                    for ip in ips:
+                        on_ip(IPHit(ip=ip, url=url))
+                    for label, evid in fps:
+                        on_fp(FPEvent(url=url, indicator=label, evidence=evid[:200]))
+                except Exception:
+                    pass
+
+            met.observe("extract_seconds", time.perf_counter() - t_ex)
+
+            # hits
+            if phones and emails:
+                uname = (guess_username(soup) if sx is None else sx.username) if phones else ""
+                for ph in phones:
+                    for em in emails:
+                        await _emit(Hit(domain, uname, ph, em, url))
+            elif phones:
+                uname = guess_username(soup) if sx is None else sx.username
+                for ph in phones:
+                    await _emit(Hit(domain, uname, ph, "", url))
+            elif emails:
+                for em in emails:
+                    await _emit(Hit(domain, "", "", em, url))
 
-        workers = [asyncio.create_task(worker(i)) for i in range(max(1,concurrency))]
-        await asyncio.gather(*workers, return_exceptions=True)
+            # enqueue links
+            hrefs = (a["href"] for a in soup.find_all("a", href=True)) if sx is None else sx.take_links()
+            added = await _enqueue_links(url, depth, hrefs if ndi is None or ndi.expand_links(url) else ())
+            if added: emit("links.enqueued", url=url, added=added, queue=frontier.qsize())
+
+            if delay_ms: await asyncio.sleep(delay_ms/1000)
+            return None
+
+        idle: set[asyncio.Task] = set()
+
+        async def worker(wid:int):
+            nonlocal errors
+            me = asyncio.current_task()
+            while scanned < max_pages:
+                # LocalFrontier: get() czeka na URL albo zwraca None, gdy nic nie ma w kolejce ani w toku
+                idle.add(me)
+                try:
+                    item = await frontier.get() if not frontier.shared else await frontier.get(timeout=1.0)
+                finally:
+                    idle.discard(me)
+                if item is None:
+                    if await frontier.drained(): break
+                    continue
+                url, depth = item
+                if scanned >= max_pages:
+                    # budżet wyczerpany, gdy czekaliśmy — URL wraca do kolejki (wspólny frontier: dla innych)
+                    await frontier.retry(url, depth, 0.0); break
+                met.set("queue_depth", frontier.qsize())
+                retry_in = None
+                try:
+                    retry_in = await _page(url, depth)
+                except Exception as e:
+                    errors += 1; met.inc("errors_total")
+                    emit("page.error", url=url, error=f"{type(e).__name__}: {e}")
+                finally:
+                    # zawsze rozliczamy URL — inaczej licznik „w toku” nie spadnie do zera i get() nie zwróci None
+                    if retry_in is None: await frontier.done(url)
+                    else: await frontier.retry(url, depth, retry_in)
+                # np. SinkWriter.wait_ready: pełna kolejka zapisu wstrzymuje workery, nie pętlę asyncio
+                if backpressure is not None: await backpressure()
+            # budżet stron: czekający w get() lokalnego frontiera nie dostaną już nic do zrobienia
+            if scanned >= max_pages and not frontier.shared:
+                for t in idle: t.cancel()
+
+        workers = [asyncio.create_task(worker(i), name=f"crawl-worker-{i}") for i in range(max(1,concurrency))]
+        ticker = asyncio.create_task(stats_loop(st, on_stats, stats_interval_s), name="crawl-stats") if on_stats else None
+        try:
+            results = await asyncio.gather(*workers, return_exceptions=True)
+        finally:
+            if ticker is not None: ticker.cancel()
+            if own_pool: await pool.close()
+            if own_warc: warc_w.close()
+        if on_stats: on_stats(*st.snapshot())
+        # błąd poza obsługą strony (np. frontier) nie znika po cichu
+        for r in results:
+            if isinstance(r, Exception): raise r
+
+    if err_classes:
+        emit("fetch.summary", errors=dict(err_classes), retries=dict(retried))
+    if own_warc and warc_w.files:
+        emit("warc.summary", records=warc_w.records, files=", ".join(warc_w.files))
+    if guard is not None and guard.rejected:
+        emit("trap.summary", rejected=sum(guard.rejected.values()), top=guard.report(5))
 
     if cookies_out_file:
         try:
@@ -0,0 +1,96 @@
+# phorn/dedupe.py
+"""
+Wykrywanie prawie-duplikatów stron (SimHash, 64 bity) — paginacje, widoki do druku, sortowania.
+
+    ndi = NearDupIndex()
+    dup_of = ndi.check(url, page_text)     # None = nowa treść (dodana do indeksu), inaczej URL „oryginału”
+    if ndi.expand_links(url): ...          # False, gdy szablon URL-a to głównie duplikaty
+
+Odcisk: zbiór 3-gramów słów → SimHash; wyszukiwanie przez 4 pasma po 16 bitów
+(odległość Hamminga ≤ 3 ⇒ co najmniej jedno pasmo identyczne). Szablon URL-a: net.url_template.
+"""
+import re
+import sys
+from array import array
+from collections import Counter
+
+from .net import url_template
+
+_WORD_RE = re.compile(r"\w+")
+
+BANDS = 4
+BAND_BITS = 64 // BANDS
+_BAND_MASK = (1 << BAND_BITS) - 1
+_MASK64 = (1 << 64) - 1
+
+def simhash(text: str, *, min_tokens: int = 50) -> int | None:
+    """SimHash 64-bit z 3-gramów słów; None, gdy tekstu za mało, by porównanie miało sens."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < min_tokens:
+        return None
+    feats = array("Q", {hash(t) & _MASK64 for t in zip(words, words[1:], words[2:])})
+    if sys.byteorder == "big": feats.byteswap()
+    n = len(feats)
+    buf = feats.tobytes()
+    # bit b ustawiony, gdy ma go większość cech; liczymy kolumnami bajtów jako jeden duży int
+    # (AND z maską + bit_count) zamiast pętli po cechach × 64 bity
+    out = 0
+    for i in range(8):
+        col = int.from_bytes(buf[i::8], "little")
+        for k in range(8):
+            if 2 * (col & int.from_bytes(bytes((1 << k,)) * n, "little")).bit_count() > n:
+                out |= 1 << (8 * i + k)
+    return out
+
+class NearDupIndex:
+    def __init__(self, *, max_distance: int = 3, min_tokens: int = 50,
+                 cluster_min_pages: int = 5, cluster_dup_ratio: float = 0.8, max_size: int = 200_000):
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance must be < {BANDS} (banded lookup)")
+        self.max_distance = max_distance
+        self.min_tokens = min_tokens
+        self.cluster_min_pages = cluster_min_pages
+        self.cluster_dup_ratio = cluster_dup_ratio
+        self.max_size = max_size
+        self._bands: list[dict[int, list[tuple[int, str]]]] = [{} for _ in range(BANDS)]
+        self._size = 0
+        self.pages: Counter = Counter()      # szablon → stron sprawdzonych
+        self.dups: Counter = Counter()       # szablon → prawie-duplikatów
+        self.throttled: set[str] = set()     # szablony, z których nie rozwijamy linków
+
+    def _find(self, fp: int) -> str | None:
+        for i, band in enumerate(self._bands):
+            for other, url in band.get((fp >> (i * BAND_BITS)) & _BAND_MASK, ()):
+                if (fp ^ other).bit_count() <= self.max_distance:
+                    return url
+        return None
+
+    def _add(self, fp: int, url: str):
+        if self._size >= self.max_size:
+            return
+        for i, band in enumerate(self._bands):
+            band.setdefault((fp >> (i * BAND_BITS)) & _BAND_MASK, []).append((fp, url))
+        self._size += 1
+
+    def check(self, url: str, text: str) -> str | None:
+        tpl = url_template(url)
+        self.pages[tpl] += 1
+        fp = simhash(text, min_tokens=self.min_tokens)
+        if fp is None:
+            return None
+        of = self._find(fp)
+        if of is None:
+            self._add(fp, url)
+            return None
+        self.dups[tpl] += 1
+        n = self.pages[tpl]
+        if n >= self.cluster_min_pages and self.dups[tpl] >= self.cluster_dup_ratio * n:
+            self.throttled.add(tpl)
+        return of
+
+    def expand_links(self, url: str) -> bool:
+        return not self.throttled or url_template(url) not in self.throttled
+
+    def report(self) -> list[tuple[str, int, int]]:
+        """(szablon, stron, duplikatów) dla szablonów z wyłączonym rozwijaniem linków."""
+        return sorted(((t, self.pages[t], self.dups[t]) for t in self.throttled), key=lambda x: -x[2])
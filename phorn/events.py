@@ -0,0 +1,128 @@
+# phorn/events.py
+"""
+Typowane zdarzenia crawl() zamiast swobodnych stringów detail().
+
+Zdarzenie = typ (klucz w EVENTS) + pola. Tekst dla on_detail (TUI) powstaje z szablonu
+dopiero gdy ktoś go czyta; do EventLog trafia NDJSON {"ts", "ev", "lvl", "domain", ...pola}.
+Bez on_detail i bez logu Events.active == False i crawl() w ogóle nie woła emit().
+"""
+import json
+import os
+import time
+
+DEBUG, INFO, WARN, ERROR = 10, 20, 30, 40
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARN: "warn", ERROR: "error"}
+LEVELS = {v: k for k, v in LEVEL_NAMES.items()}
+
+# typ → (poziom, szablon dla on_detail)
+EVENTS: dict[str, tuple[int, str]] = {
+    "page.start":        (DEBUG, "start"),
+    "page.skip_blocked": (INFO,  "skip: CF/timeout"),
+    "page.error":        (ERROR, "page failed: {error}"),
+    "fetch.http":        (DEBUG, "fetch: HTTP"),
+    "fetch.fallback":    (DEBUG, "fetch: HTTP (fallback first)"),
+    "fetch.prefetched":  (DEBUG, "fetch: reused startup probe"),
+    "fetch.replay":      (DEBUG, "fetch: WARC replay"),
+    "fetch.redirect":    (DEBUG, "redirect → {to} ({hops} hops)"),
+    "page.redirect_dup": (DEBUG, "redirect → {to} already seen → skip"),
+    "fetch.retry":       (INFO,  "retry {error} #{attempt} in {delay}s"),
+    "fetch.error":       (WARN,  "fetch failed: {error} (status={status}, attempts={attempts})"),
+    "fetch.summary":     (INFO,  "errors by class: {errors}, retried: {retries}"),
+    "render.always":     (DEBUG, "render: Playwright (always)"),
+    "render.failed":     (INFO,  "render failed → fallback HTTP"),
+    "render.cf":         (INFO,  "CF/JS detected → render headless"),
+    "unlock.start":      (INFO,  "still blocked → interactive unlock (opens browser)"),
+    "cookies.captured":  (DEBUG, "cookies: captured ({source})"),
+    "cookies.seeded":    (INFO,  "cookies: seeded ({source})"),
+    "cookies.error":     (WARN,  "cookies import error: {error}"),
+    "robots.rules":      (INFO,  "robots: {rules} disallow rules"),
+    "robots.disallow":   (DEBUG, "robots: disallow"),
+    "links.enqueued":    (DEBUG, "enqueued: +{added} (queue={queue})"),
+    "page.near_dup":     (DEBUG, "near-duplicate of {of} → skip extraction"),
+    "trap.throttled":    (INFO,  "trap: {reason} → throttling {pattern}"),
+    "trap.summary":      (INFO,  "trap: {rejected} URLs rejected, top: {top}"),
+    "warc.summary":      (INFO,  "warc: {records} pages → {files}"),
+    "dedupe.throttled":  (INFO,  "template {template}: {dups}/{pages} near-duplicates → links not expanded"),
+    "note":              (INFO,  "{text}"),
+}
+
+class _Fmt(dict):
+    def __missing__(self, k): return "?"
+
+def render_event(ev: str, fields: dict) -> str:
+    tpl = EVENTS.get(ev, (INFO, ev))[1]
+    try:
+        return tpl.format_map(_Fmt(fields))
+    except Exception:
+        return ev
+
+class EventLog:
+    """
+    NDJSON z rotacją po rozmiarze (path, path.1 … path.N) i próbkowaniem typów o dużym wolumenie:
+    sample={"links.enqueued": 10} → zapisywane co 10. zdarzenie tego typu (pole "sampled": 10).
+    """
+    def __init__(self, path: str, *, level: int | str = INFO, max_bytes: int = 50 * 1024 * 1024,
+                 backups: int = 3, sample: dict[str, int] | None = None):
+        self.path = path
+        self.level = LEVELS.get(level, INFO) if isinstance(level, str) else int(level)
+        self.max_bytes = int(max_bytes)
+        self.backups = int(backups)
+        self.sample = {k: max(1, int(v)) for k, v in (sample or {}).items()}
+        self._seq: dict[str, int] = {}
+        d = os.path.dirname(path)
+        if d: os.makedirs(d, exist_ok=True)
+        self._f = open(path, "a", encoding="utf-8")
+        self._size = self._f.tell()
+        self._closed = False
+
+    def enabled(self, level: int) -> bool:
+        return level >= self.level and not self._closed
+
+    def write(self, ev: str, level: int, domain: str, fields: dict):
+        n = self.sample.get(ev)
+        if n:
+            i = self._seq.get(ev, 0); self._seq[ev] = i + 1
+            if i % n: return
+        rec = {"ts": round(time.time(), 3), "ev": ev, "lvl": LEVEL_NAMES.get(level, level), "domain": domain}
+        rec.update(fields)
+        if n: rec["sampled"] = n
+        line = json.dumps(rec, ensure_ascii=False, default=str) + "\n"
+        self._f.write(line)
+        self._size += len(line)
+        if self._size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self._f.close()
+        for i in range(self.backups, 0, -1):
+            src = self.path if i == 1 else f"{self.path}.{i-1}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i}")
+        self._f = open(self.path, "w", encoding="utf-8")
+        self._size = 0
+
+    def close(self):
+        if not self._closed:
+            try: self._f.flush(); self._f.close()
+            except Exception: pass
+            self._closed = True
+
+class Events:
+    """Rozsyła zdarzenia do on_detail (tekst) i EventLog (NDJSON) zgodnie z poziomami."""
+    def __init__(self, domain: str = "", *, on_detail=None, log: EventLog | None = None, detail_level: int = DEBUG):
+        self.domain = domain
+        self.on_detail = on_detail
+        self.log = log
+        self.detail_level = detail_level
+        self.active = bool(on_detail) or bool(log and log.enabled(ERROR))
+
+    def emit(self, ev: str, **fields):
+        level = EVENTS.get(ev, (INFO,))[0]
+        if self.on_detail and level >= self.detail_level:
+            self.on_detail(render_event(ev, fields))
+        if self.log and self.log.enabled(level):
+            self.log.write(ev, level, self.domain, fields)
+
+    def note(self, text: str):
+        """Zgodność ze starymi callbackami tekstowymi (render pool, interactive unlock)."""
+        self.emit("note", text=text)
@@ -1,3 +1,4 @@
+import hashlib
 import re
 from bs4 import BeautifulSoup, NavigableString, Tag
 
@@ -143,22 +144,88 @@ _FP_PATTERNS = [
     ("GPU/Memory",    r"hardwareConcurrency|deviceMemory"),
 ]
 
+_FP_RX = [(label, re.compile(pat, re.I | re.S)) for label, pat in _FP_PATTERNS]
+
+def _fp_search(text: str, pos: int = 0, endpos: int | None = None, skip=()) -> list[tuple[str, str]]:
+    end = len(text) if endpos is None else endpos
+    out = []
+    for label, rx in _FP_RX:
+        if label in skip:
+            continue
+        m = rx.search(text, pos, end)
+        if m:
+            snippet = text[max(pos, m.start()-40): min(end, m.end()+40)]
+            out.append((label, " ".join(snippet.split())))
+    return out
+
 def detect_fingerprint_indicators(html: str) -> list[tuple[str, str]]:
     """
     Zwraca listę (indicator, evidence_snippet). Heurystyki – sygnały, nie dowód.
     """
     if not html:
         return []
-    out = []
-    low = html.lower()
-    for label, pat in _FP_PATTERNS:
-        try:
-            rx = re.compile(pat, re.I | re.S)
-            m = rx.search(html)
-            if m:
-                snippet = html[max(0, m.start()-40): m.end()+40]
-                out.append((label, " ".join(snippet.split())))
-        except Exception:
-            if re.search(pat, low):
-                out.append((label, label))
+    return _fp_search(html)
+
+# ---------- IP/FP dla całej strony: skrypty inline przez cache po treści ----------
+_SCRIPT_RE = re.compile(r"<script\b[^>]*>(.*?)</script\s*>", re.I | re.S)
+
+class ScriptScanCache:
+    """
+    Wyniki skanu IP/FP treści <script> po skrócie treści (blake2b, 128 bit) — biblioteki i analityka
+    są identyczne na każdej stronie serwisu, więc każdy blob skanujemy raz na crawl.
+    Krótkie skrypty (< min_len znaków) skanowane na miejscu: skrót kosztowałby tyle co skan.
+    """
+    def __init__(self, max_size: int = 5000, min_len: int = 256):
+        self.max_size = max_size
+        self.min_len = min_len
+        self._cache: dict[bytes, tuple[frozenset, tuple]] = {}
+        self.hits = self.misses = 0
+
+    def scan(self, text: str, start: int, end: int) -> tuple[frozenset, tuple]:
+        if end - start < self.min_len:
+            return frozenset(_ips_in(text, start, end)), tuple(_fp_search(text, start, end))
+        body = text[start:end]
+        key = hashlib.blake2b(body.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        hit = self._cache.get(key)
+        if hit is not None:
+            self.hits += 1
+            return hit
+        self.misses += 1
+        res = (frozenset(_ips_in(body)), tuple(_fp_search(body)))
+        if len(self._cache) >= self.max_size:
+            self._cache.clear()
+        self._cache[key] = res
+        return res
+
+def _ips_in(text: str, pos: int = 0, endpos: int | None = None, out: set | None = None) -> set[str]:
+    out = set() if out is None else out
+    end = len(text) if endpos is None else endpos
+    for rx in (IPV4_RE, IPV6_RE):
+        for m in rx.finditer(text, pos, end):
+            out.add(m.group(0))
     return out
+
+def scan_extras(html: str, cache: ScriptScanCache | None = None) -> tuple[set[str], list[tuple[str, str]]]:
+    """
+    IP-ki i wskaźniki FP strony. Tekst poza skryptami skanowany na miejscu (pos/endpos, bez kopii),
+    treść każdego <script> — przez cache. Wskaźnik FP: pierwsze wystąpienie w kolejności dokumentu;
+    wzorce nie sięgają ponad granicę skryptu.
+    """
+    ips: set[str] = set()
+    fps: dict[str, str] = {}
+    if not html:
+        return ips, []
+    cache = cache if cache is not None else ScriptScanCache()
+    pos = 0
+    for m in _SCRIPT_RE.finditer(html):
+        s, e = m.span(1)
+        _ips_in(html, pos, s, ips)
+        for label, evid in _fp_search(html, pos, s, fps): fps[label] = evid
+        if e > s:
+            sips, sfps = cache.scan(html, s, e)
+            ips |= sips
+            for label, evid in sfps: fps.setdefault(label, evid)
+        pos = e
+    _ips_in(html, pos, None, ips)
+    for label, evid in _fp_search(html, pos, None, fps): fps[label] = evid
+    return ips, list(fps.items())
@@ -0,0 +1,347 @@
+# phorn/frontier.py
+"""
+Frontier = kolejka URL-i + zbiór „już widziane” (+ opcjonalnie wspólny zbiór trafień).
+
+LocalFrontier  — w pamięci procesu (domyślny dla crawl()).
+SQLiteFrontier — plik SQLite współdzielony przez wiele procesów na jednej maszynie / NFS-ie
+                 (blokady SQLite; URL w stanie in-flight wraca do kolejki po `lease_s`).
+RedisFrontier  — opcjonalny (pip install redis), dla wielu maszyn; klient można wstrzyknąć
+                 (np. fakeredis jako lokalny zamiennik; skrypty Lua wymagają wtedy lupa).
+                 Jak w SQLite: URL w toku dłużej niż `lease_s` (proces padł) wraca do kolejki.
+
+put() dodaje URL tylko raz (atomowe sprawdź-i-dodaj), add_seen() oznacza URL jako widziany bez kolejkowania
+(cele przekierowań; False = już był), get() zwraca (url, depth) albo None po timeoucie
+(LocalFrontier: bez timeoutu czeka na URL albo na opróżnienie i wtedy zwraca None — bez odpytywania),
+done() kończy obsługę URL-a, retry(url, depth, delay) oddaje URL w toku z powrotem do kolejki
+po `delay` sekundach (z pominięciem „widzianych”), drained() = nic w kolejce, nic odłożonego
+i nic w toku (we wszystkich procesach). mark_seeded() ustawia koordynator po włożeniu seedów; do tego czasu
+wspólny frontier nigdy nie jest drained() (worker uruchomiony przed koordynatorem czeka, zamiast kończyć).
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+
+try:
+    import redis.asyncio as aioredis
+except Exception:
+    aioredis = None
+
+def _hit_key(hit) -> str:
+    return "\x1f".join((getattr(hit,"phone",""), getattr(hit,"email",""), getattr(hit,"url","")))
+
+def _hit_row(hit) -> list[str]:
+    return [getattr(hit,"source_domain",""), getattr(hit,"username",""),
+            getattr(hit,"phone",""), getattr(hit,"email",""), getattr(hit,"url","")]
+
+HIT_FIELDS = ["source_domain","username","phone","email","url"]
+
+class LocalFrontier:
+    shared = False
+
+    def __init__(self):
+        self._q: deque = deque()
+        self._seen: set[str] = set()
+        self._inflight = 0
+        self._delayed = 0
+        self._wake = asyncio.Event()     # nowy URL albo koniec obsługi — czekający w get() sprawdzają stan
+
+    async def put(self, url: str, depth: int) -> bool:
+        if url in self._seen:
+            return False
+        self._seen.add(url)
+        self._q.append((url, depth))
+        self._wake.set()
+        return True
+
+    async def add_seen(self, url: str) -> bool:
+        if url in self._seen:
+            return False
+        self._seen.add(url)
+        return True
+
+    async def get(self, timeout: float | None = None):
+        while not self._q:
+            if self._inflight == 0 and self._delayed == 0:
+                return None                          # opróżniony: nic w kolejce, w toku ani odłożonego
+            self._wake.clear()
+            if timeout is None:
+                await self._wake.wait()
+            else:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    return None
+        self._inflight += 1
+        return self._q.popleft()
+
+    async def done(self, url: str):
+        self._inflight -= 1
+        if self._inflight == 0:
+            self._wake.set()
+
+    async def retry(self, url: str, depth: int, delay: float):
+        self._inflight -= 1
+        self._delayed += 1
+        asyncio.get_running_loop().call_later(max(0.0, delay), self._requeue, url, depth)
+
+    def _requeue(self, url, depth):
+        self._delayed -= 1
+        self._q.append((url, depth))
+        self._wake.set()
+
+    async def mark_seeded(self): ...
+
+    async def drained(self) -> bool:
+        return not self._q and self._inflight == 0 and self._delayed == 0
+
+    def qsize(self) -> int:
+        return len(self._q)
+
+    async def add_hit(self, hit) -> bool:
+        return True
+
+    async def close(self): ...
+
+class SQLiteFrontier:
+    shared = True
+
+    def __init__(self, path: str, *, lease_s: float = 120.0):
+        self.path = path
+        self.lease_s = float(lease_s)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS frontier(
+                url TEXT PRIMARY KEY, depth INTEGER NOT NULL,
+                state INTEGER NOT NULL DEFAULT 0,      -- 0 pending, 1 in-flight, 2 done
+                ts REAL NOT NULL DEFAULT 0             -- in-flight: czas claimu; pending: najwcześniejszy start (retry)
+            );
+            CREATE INDEX IF NOT EXISTS frontier_state ON frontier(state, ts);
+            CREATE TABLE IF NOT EXISTS hits(
+                k TEXT PRIMARY KEY, source_domain TEXT, username TEXT, phone TEXT, email TEXT, url TEXT
+            );
+            CREATE TABLE IF NOT EXISTS meta(k TEXT PRIMARY KEY, v TEXT);
+        """)
+        self._pending = 0
+
+    def _run(self, fn, *args):
+        def call():
+            with self._lock:
+                return fn(*args)
+        return asyncio.to_thread(call)
+
+    def _put(self, url, depth):
+        cur = self._db.execute("INSERT OR IGNORE INTO frontier(url, depth) VALUES (?, ?)", (url, depth))
+        if cur.rowcount: self._pending += 1
+        return bool(cur.rowcount)
+
+    def _add_seen(self, url):
+        cur = self._db.execute("INSERT OR IGNORE INTO frontier(url, depth, state, ts) VALUES (?, 0, 2, ?)", (url, time.time()))
+        return bool(cur.rowcount)
+
+    def _claim(self):
+        now = time.time()
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                "SELECT url, depth FROM frontier WHERE (state=0 AND ts<=?) OR (state=1 AND ts<?) LIMIT 1",
+                (now, now - self.lease_s)
+            ).fetchone()
+            if row:
+                db.execute("UPDATE frontier SET state=1, ts=? WHERE url=?", (now, row[0]))
+            self._pending = db.execute("SELECT COUNT(*) FROM frontier WHERE state=0").fetchone()[0]
+            db.execute("COMMIT")
+            return row
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    def _done(self, url):
+        self._db.execute("UPDATE frontier SET state=2, ts=? WHERE url=?", (time.time(), url))
+
+    def _retry(self, url, delay):
+        self._db.execute("UPDATE frontier SET state=0, ts=? WHERE url=?", (time.time() + delay, url))
+
+    def _mark_seeded(self):
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('seeded', ?)", (str(time.time()),))
+
+    def _drained(self):
+        db = self._db
+        return (db.execute("SELECT 1 FROM meta WHERE k='seeded'").fetchone() is not None
+                and db.execute("SELECT 1 FROM frontier WHERE state IN (0,1) LIMIT 1").fetchone() is None)
+
+    def _add_hit(self, key, row):
+        cur = self._db.execute("INSERT OR IGNORE INTO hits VALUES (?,?,?,?,?,?)", (key, *row))
+        return bool(cur.rowcount)
+
+    async def put(self, url: str, depth: int) -> bool:
+        return await self._run(self._put, url, depth)
+
+    async def add_seen(self, url: str) -> bool:
+        return await self._run(self._add_seen, url)
+
+    async def get(self, timeout: float = 1.0):
+        deadline = time.monotonic() + timeout
+        while True:
+            row = await self._run(self._claim)
+            if row:
+                return (row[0], row[1])
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return None
+            await asyncio.sleep(min(0.2, left))
+
+    async def done(self, url: str):
+        await self._run(self._done, url)
+
+    async def retry(self, url: str, depth: int, delay: float):
+        await self._run(self._retry, url, max(0.0, delay))
+
+    async def mark_seeded(self):
+        await self._run(self._mark_seeded)
+
+    async def drained(self) -> bool:
+        return await self._run(self._drained)
+
+    def qsize(self) -> int:
+        return self._pending
+
+    async def add_hit(self, hit) -> bool:
+        return await self._run(self._add_hit, _hit_key(hit), _hit_row(hit))
+
+    def _hits(self):
+        return self._db.execute("SELECT source_domain, username, phone, email, url FROM hits ORDER BY rowid").fetchall()
+
+    async def hits(self) -> list[dict]:
+        return [dict(zip(HIT_FIELDS, r)) for r in await self._run(self._hits)]
+
+    async def close(self):
+        with self._lock:
+            try: self._db.close()
+            except Exception: pass
+
+# seen + kolejka jednym krokiem (padnięcie procesu między SADD a LPUSH gubiłoby URL)
+_PUT_LUA = """
+if redis.call('SADD', KEYS[1], ARGV[1]) == 1 then
+    redis.call('LPUSH', KEYS[2], ARGV[2]); return 1
+end
+return 0
+"""
+# przeterminowany lease → z powrotem do kolejki; ZSCORE sprawdzany w skrypcie, więc robi to jeden proces
+_REQUEUE_LUA = """
+local ts = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not ts or tonumber(ts) > tonumber(ARGV[2]) then return 0 end
+redis.call('ZREM', KEYS[1], ARGV[1])
+if redis.call('LREM', KEYS[2], 1, ARGV[1]) > 0 then
+    redis.call('RPUSH', KEYS[3], ARGV[1]); return 1
+end
+return 0
+"""
+
+class RedisFrontier:
+    shared = True
+
+    def __init__(self, url: str = "redis://localhost:6379/0", *, namespace: str = "phorn", client=None,
+                 lease_s: float = 120.0):
+        if client is None:
+            if aioredis is None:
+                raise RuntimeError("RedisFrontier: install redis (pip install redis)")
+            client = aioredis.from_url(url)
+        self.r = client
+        ns = namespace
+        self.k_seen, self.k_queue, self.k_proc, self.k_hits = f"{ns}:seen", f"{ns}:queue", f"{ns}:inflight", f"{ns}:hits"
+        self.k_delayed = f"{ns}:delayed"     # zset: payload → czas, od którego wolno ponowić
+        self.k_leases = f"{ns}:leases"       # zset: payload w toku → czas claimu
+        self.k_seeded = f"{ns}:seeded"       # ustawia koordynator po włożeniu seedów
+        self.lease_s = float(lease_s)
+        self._put_lua = client.register_script(_PUT_LUA)
+        self._requeue_lua = client.register_script(_REQUEUE_LUA)
+        self._swept = 0.0
+        self._pending = 0
+        self._claimed: dict[str, bytes] = {}
+
+    async def put(self, url: str, depth: int) -> bool:
+        return bool(await self._put_lua(keys=[self.k_seen, self.k_queue], args=[url, json.dumps([url, depth])]))
+
+    async def add_seen(self, url: str) -> bool:
+        return bool(await self.r.sadd(self.k_seen, url))
+
+    async def _promote_due(self):
+        now = time.time()
+        for raw in await self.r.zrangebyscore(self.k_delayed, 0, now, start=0, num=100):
+            # zrem == 1 tylko w jednym procesie → URL trafia do kolejki raz
+            if await self.r.zrem(self.k_delayed, raw):
+                await self.r.rpush(self.k_queue, raw)
+        cutoff = now - self.lease_s
+        for raw in await self.r.zrangebyscore(self.k_leases, 0, cutoff, start=0, num=100):
+            await self._requeue_lua(keys=[self.k_leases, self.k_proc, self.k_queue], args=[raw, cutoff])
+        if now - self._swept >= self.lease_s / 2:
+            # in-flight bez lease'a (proces padł między BLMOVE a ZADD) — lease od teraz
+            self._swept = now
+            for raw in await self.r.lrange(self.k_proc, 0, -1):
+                await self.r.zadd(self.k_leases, {raw: now}, nx=True)
+
+    async def get(self, timeout: float = 1.0):
+        await self._promote_due()
+        # atomowo kolejka → lista in-flight (drained() widzi URL przez cały czas obsługi)
+        raw = await self.r.blmove(self.k_queue, self.k_proc, timeout, "RIGHT", "LEFT")
+        self._pending = int(await self.r.llen(self.k_queue))
+        if raw is None:
+            return None
+        await self.r.zadd(self.k_leases, {raw: time.time()})
+        url, depth = json.loads(raw)
+        self._claimed[url] = raw
+        return (url, int(depth))
+
+    async def done(self, url: str):
+        raw = self._claimed.pop(url, None)
+        if raw is not None:
+            async with self.r.pipeline(transaction=True) as p:
+                p.lrem(self.k_proc, 1, raw); p.zrem(self.k_leases, raw)
+                await p.execute()
+
+    async def retry(self, url: str, depth: int, delay: float):
+        raw = self._claimed.pop(url, None) or json.dumps([url, depth]).encode()
+        async with self.r.pipeline(transaction=True) as p:
+            p.zadd(self.k_delayed, {raw: time.time() + max(0.0, delay)})
+            p.lrem(self.k_proc, 1, raw); p.zrem(self.k_leases, raw)
+            await p.execute()
+
+    async def mark_seeded(self):
+        await self.r.set(self.k_seeded, time.time())
+
+    async def drained(self) -> bool:
+        return (bool(await self.r.exists(self.k_seeded))
+                and (await self.r.llen(self.k_queue)) == 0 and (await self.r.llen(self.k_proc)) == 0
+                and (await self.r.zcard(self.k_delayed)) == 0)
+
+    def qsize(self) -> int:
+        return self._pending
+
+    async def add_hit(self, hit) -> bool:
+        return bool(await self.r.hsetnx(self.k_hits, _hit_key(hit), json.dumps(_hit_row(hit))))
+
+    async def hits(self) -> list[dict]:
+        vals = await self.r.hvals(self.k_hits)
+        return [dict(zip(HIT_FIELDS, json.loads(v))) for v in vals]
+
+    async def close(self):
+        try: await self.r.aclose()
+        except Exception: pass
+
+def open_frontier(spec: str | None):
+    """None/'' → LocalFrontier, 'sqlite:///ścieżka.db' → SQLiteFrontier, 'redis://…' → RedisFrontier."""
+    if not spec:
+        return LocalFrontier()
+    if spec.startswith("sqlite://"):
+        # jak w SQLAlchemy: sqlite:///plik.db (względna), sqlite:////abs/plik.db
+        return SQLiteFrontier(spec[len("sqlite:///"):] if spec.startswith("sqlite:///") else spec[len("sqlite://"):])
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisFrontier(spec)
+    raise ValueError(f"unknown frontier backend: {spec}")
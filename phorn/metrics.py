@@ -0,0 +1,206 @@
+# phorn/metrics.py
+"""
+Lekka instrumentacja crawl(): histogramy czasów (DNS/connect/TTFB/body/fetch/parse/extract/render),
+liczniki (bajty, strony, błędy) i gauge (kolejka, in-flight).
+
+    m = Metrics()
+    hits = await crawl(..., metrics=m)
+    runner = await start_metrics_server(m, port=9108)   # GET /metrics (Prometheus), /metrics.json
+    m.write_json("metrics.json")
+
+Bez metrics= crawl() używa NULL_METRICS (no-op).
+"""
+import bisect
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+import aiohttp
+
+# sekundy; ostatni kubełek +Inf jest dokładany w eksporcie
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "dns_seconds": "DNS resolve time",
+    "connect_seconds": "TCP/TLS connection setup time",
+    "ttfb_seconds": "request sent → response headers",
+    "body_seconds": "response body download + decode",
+    "fetch_seconds": "whole page fetch (HTTP path incl. fallbacks)",
+    "render_seconds": "Playwright render",
+    "parse_seconds": "HTML parse (BeautifulSoup)",
+    "extract_seconds": "phone/email/extras extraction",
+    "dedupe_seconds": "near-duplicate check (SimHash)",
+    "bytes_total": "response body bytes received",
+    "requests_total": "HTTP requests sent",
+    "pages_total": "pages processed",
+    "errors_total": "pages skipped as blocked/failed",
+    "retries_total": "fetches re-queued after a transient error",
+    "near_dup_total": "pages skipped as near-duplicates",
+    "trap_rejected_total": "links rejected by crawler-trap limits",
+    "redirect_dup_total": "pages whose redirect target was already seen",
+    "script_cache_hits_total": "inline scripts whose IP/FP scan came from the per-crawl cache",
+    "warc_records_total": "pages written to the WARC archive",
+    "queue_depth": "frontier size",
+    "inflight": "pages being fetched right now",
+}
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=TIME_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, v: float):
+        self.counts[bisect.bisect_left(self.buckets, v)] += 1
+        self.sum += v
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Przybliżenie z kubełków (interpolacja liniowa w kubełku)."""
+        if not self.count: return 0.0
+        rank = q * self.count
+        acc = 0
+        for i, c in enumerate(self.counts):
+            if acc + c >= rank and c:
+                lo = self.buckets[i-1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * ((rank - acc) / c)
+            acc += c
+        return self.buckets[-1]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": round(self.quantile(0.50), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "p99": round(self.quantile(0.99), 6),
+        }
+
+class Metrics:
+    enabled = True
+
+    def __init__(self):
+        self.hist: dict[str, Histogram] = {}
+        self.counters: dict[str, float] = {}
+        self.gauges: dict[str, float] = {}
+        self.started = time.time()
+
+    def observe(self, name: str, v: float):
+        h = self.hist.get(name)
+        if h is None:
+            h = self.hist[name] = Histogram()
+        h.observe(v)
+
+    def inc(self, name: str, n: float = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def set(self, name: str, v: float):
+        self.gauges[name] = v
+
+    def add(self, name: str, n: float):
+        self.gauges[name] = self.gauges.get(name, 0) + n
+
+    @contextmanager
+    def time(self, name: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t)
+
+    # ---- aiohttp tracing: DNS / connect / TTFB / liczba żądań ----
+    def trace_config(self) -> aiohttp.TraceConfig:
+        tc = aiohttp.TraceConfig()
+        m = self
+        async def dns_start(_s, ctx, _p): ctx.dns_t = time.perf_counter()
+        async def dns_end(_s, ctx, _p):
+            t = getattr(ctx, "dns_t", None)
+            if t is not None: m.observe("dns_seconds", time.perf_counter() - t)
+        async def conn_start(_s, ctx, _p): ctx.conn_t = time.perf_counter()
+        async def conn_end(_s, ctx, _p):
+            t = getattr(ctx, "conn_t", None)
+            if t is not None: m.observe("connect_seconds", time.perf_counter() - t)
+        async def req_start(_s, ctx, _p):
+            ctx.req_t = time.perf_counter(); m.inc("requests_total")
+        async def req_end(_s, ctx, _p):
+            t = getattr(ctx, "req_t", None)
+            if t is not None: m.observe("ttfb_seconds", time.perf_counter() - t)
+        tc.on_dns_resolvehost_start.append(dns_start)
+        tc.on_dns_resolvehost_end.append(dns_end)
+        tc.on_connection_create_start.append(conn_start)
+        tc.on_connection_create_end.append(conn_end)
+        tc.on_request_start.append(req_start)
+        tc.on_request_end.append(req_end)
+        return tc
+
+    # ---- eksport ----
+    def summary(self) -> dict:
+        return {
+            "uptime_s": round(time.time() - self.started, 3),
+            "histograms": {k: h.summary() for k, h in sorted(self.hist.items())},
+            "counters": dict(sorted(self.counters.items())),
+            "gauges": dict(sorted(self.gauges.items())),
+        }
+
+    def write_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def prometheus_text(self, prefix: str = "phorn_") -> str:
+        out = []
+        for name, h in sorted(self.hist.items()):
+            n = prefix + name
+            if name in HELP: out.append(f"# HELP {n} {HELP[name]}")
+            out.append(f"# TYPE {n} histogram")
+            acc = 0
+            for b, c in zip(h.buckets, h.counts):
+                acc += c
+                out.append(f'{n}_bucket{{le="{b}"}} {acc}')
+            out.append(f'{n}_bucket{{le="+Inf"}} {h.count}')
+            out.append(f"{n}_sum {h.sum:.6f}")
+            out.append(f"{n}_count {h.count}")
+        for name, v in sorted(self.counters.items()):
+            n = prefix + name
+            if name in HELP: out.append(f"# HELP {n} {HELP[name]}")
+            out.append(f"# TYPE {n} counter")
+            out.append(f"{n} {v:g}")
+        for name, v in sorted(self.gauges.items()):
+            n = prefix + name
+            if name in HELP: out.append(f"# HELP {n} {HELP[name]}")
+            out.append(f"# TYPE {n} gauge")
+            out.append(f"{n} {v:g}")
+        return "\n".join(out) + "\n"
+
+class _NullMetrics:
+    enabled = False
+    def observe(self, name, v): ...
+    def inc(self, name, n=1): ...
+    def set(self, name, v): ...
+    def add(self, name, n): ...
+    def time(self, name): return nullcontext()
+    def trace_config(self): return None
+
+NULL_METRICS = _NullMetrics()
+
+async def start_metrics_server(metrics: Metrics, *, host: str = "127.0.0.1", port: int = 9108):
+    """GET /metrics (Prometheus text), GET /metrics.json. Zwraca runner (await runner.cleanup())."""
+    from aiohttp import web
+
+    async def prom(_req):
+        return web.Response(text=metrics.prometheus_text(), content_type="text/plain", charset="utf-8")
+
+    async def js(_req):
+        return web.json_response(metrics.summary())
+
+    app = web.Application()
+    app.router.add_get("/metrics", prom)
+    app.router.add_get("/metrics.json", js)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
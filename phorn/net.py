@@ -1,15 +1,29 @@
 # phorn/net.py
 from __future__ import annotations
 
-from urllib.parse import urljoin, urlparse, urldefrag
+import codecs
+import importlib.util
+import re
+import time
+import warnings
+from collections import OrderedDict
+from dataclasses import dataclass, fields, replace
+from typing import NamedTuple
+from urllib.parse import urljoin, urlparse, urldefrag, parse_qsl
 import aiohttp
 
+from .retry import classify_exception, classify_status, parse_retry_after
+from .resolver import CachingResolver, resolving_backend
+
 # HTTP/2 client (aggressive mode)
 try:
     import httpx
 except Exception:
     httpx = None
 
+# http2=True bez pakietu h2 kończy się ImportError przy tworzeniu klienta
+_HAS_H2 = importlib.util.find_spec("h2") is not None
+
 UA = (
     "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
     "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
@@ -26,6 +40,46 @@ BASE_HEADERS = {
 
 BROWSER_HEADERS = dict(BASE_HEADERS)  # w aggr używamy tych samych „bezpiecznych” nagłówków
 
+# Accept-Encoding per klient — deklarujemy tylko to, co dany klient umie rozpakować (br/zstd opcjonalne)
+def _aiohttp_accept_encoding() -> str:
+    enc = ["gzip", "deflate"]
+    try:
+        from aiohttp.compression_utils import HAS_BROTLI
+    except Exception:
+        HAS_BROTLI = any(importlib.util.find_spec(m) for m in ("brotli", "brotlicffi"))
+    try:
+        from aiohttp.compression_utils import HAS_ZSTD
+    except Exception:
+        HAS_ZSTD = False
+    if HAS_BROTLI: enc.append("br")
+    if HAS_ZSTD: enc.append("zstd")
+    return ", ".join(enc)
+
+# prywatne API httpx/httpcore (dekodery, backend sieciowy puli) — sprawdzone dla wersji z requirements.txt
+_HTTPX_TESTED = "httpx>=0.27,<0.29, httpcore>=1.0,<1.1"
+
+def _httpx_internals_changed(what: str, fallback: str) -> None:
+    warnings.warn(f"httpx/httpcore internals changed ({what}); {fallback}. Tested with {_HTTPX_TESTED}",
+                  RuntimeWarning, stacklevel=3)
+
+def _httpx_accept_encoding() -> str:
+    try:
+        from httpx._decoders import SUPPORTED_DECODERS
+        return ", ".join(k for k in SUPPORTED_DECODERS if k != "identity")
+    except Exception as e:
+        _httpx_internals_changed(f"httpx._decoders.SUPPORTED_DECODERS: {type(e).__name__}",
+                                 "advertising only gzip, deflate to httpx")
+        return "gzip, deflate"
+
+AIOHTTP_ACCEPT_ENCODING = _aiohttp_accept_encoding()
+HTTPX_ACCEPT_ENCODING = _httpx_accept_encoding() if httpx is not None else "gzip, deflate"
+
+# sniffing z początku odpowiedzi (bez dekodowania i lower() całego dokumentu)
+SNIFF_BYTES = 8192
+_HTML_SNIFF_RE = re.compile(rb"<html", re.I)
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]{0,200}?charset\s*=\s*["']?\s*([A-Za-z0-9_.:-]+)""", re.I)
+_CT_CHARSET_RE = re.compile(r"""charset\s*=\s*["']?([^\s;"']+)""", re.I)
+
 _CF_BODY_SIGNS = (
     "attention required! | cloudflare",
     "checking your browser before accessing",
@@ -34,6 +88,157 @@ _CF_BODY_SIGNS = (
     "cf-browser-verification",
 )
 
+@dataclass(frozen=True)
+class NetProfile:
+    """Timeouty i limity połączeń dla wszystkich ścieżek pobierania (aiohttp, httpx, sondy)."""
+    total_s: float = 12.0          # pojedyncze żądanie
+    connect_s: float = 6.0
+    read_s: float = 8.0            # przerwa między kolejnymi porcjami odpowiedzi
+    probe_s: float = 8.0           # robots.txt, detect_cloudflare, sitemap
+    page_s: float = 25.0           # cała strona łącznie z fallbackiem httpx — wolny host nie blokuje workera dłużej
+    limit: int = 0                 # połączeń łącznie; 0 → max(20, 5*concurrency)
+    limit_per_host: int = 0        # 0 = bez limitu
+    dns_ttl_s: float = 300.0
+    dns_negative_ttl_s: float = 30.0
+    nameservers: tuple[str, ...] = ()
+    http2: bool = True             # httpx: HTTP/2, jeśli jest pakiet h2
+
+    @classmethod
+    def from_dict(cls, d: dict | None) -> "NetProfile":
+        known = {f.name for f in fields(cls)}
+        kw = {k: v for k, v in (d or {}).items() if k in known and v not in (None, "")}
+        if "nameservers" in kw:
+            ns = kw["nameservers"]
+            kw["nameservers"] = tuple(ns.split(",") if isinstance(ns, str) else ns)
+        return cls(**kw)
+
+    def aiohttp_timeout(self, total: float | None = None) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=total or self.total_s, connect=self.connect_s,
+                                     sock_connect=self.connect_s, sock_read=self.read_s)
+
+    def httpx_timeout(self, total: float | None = None):
+        return httpx.Timeout(total or self.total_s, connect=self.connect_s, read=self.read_s)
+
+    def probe(self) -> "NetProfile":
+        """Profil dla sond (robots/CF/sitemap): krótszy limit całego żądania."""
+        return replace(self, total_s=self.probe_s)
+
+    def max_connections(self, concurrency: int = 1) -> int:
+        return self.limit or max(20, 5 * max(1, concurrency))
+
+    def resolver(self) -> CachingResolver:
+        return CachingResolver(ttl_s=self.dns_ttl_s, negative_ttl_s=self.dns_negative_ttl_s,
+                               nameservers=list(self.nameservers) or None)
+
+    def connector(self, *, concurrency: int = 1, resolver: CachingResolver | None = None) -> aiohttp.TCPConnector:
+        return aiohttp.TCPConnector(limit=self.max_connections(concurrency), limit_per_host=self.limit_per_host,
+                                    ttl_dns_cache=int(self.dns_ttl_s), resolver=resolver)
+
+DEFAULT_NET = NetProfile()
+
+def make_httpx_client(profile: NetProfile = DEFAULT_NET, *, proxy: str | None = None,
+                      resolver: CachingResolver | None = None, concurrency: int = 1):
+    """Współdzielony klient httpx (pula połączeń + DNS przez `resolver`); None bez httpx."""
+    if httpx is None:
+        return None
+    n = profile.max_connections(concurrency)
+    transport = httpx.AsyncHTTPTransport(
+        http2=profile.http2 and _HAS_H2,
+        proxy=httpx.Proxy(proxy) if proxy else None,
+        limits=httpx.Limits(max_connections=n, max_keepalive_connections=n),
+    )
+    if resolver is not None:
+        backend = resolving_backend(resolver)
+        pool = getattr(transport, "_pool", None)
+        # httpx nie wystawia network_backend — podmieniamy w puli httpcore; inny kształt = głośno, nie po cichu
+        if backend is None or not hasattr(pool, "_network_backend"):
+            _httpx_internals_changed("no httpcore.AnyIOBackend" if backend is None else "no transport._pool._network_backend",
+                                     "httpx resolves DNS itself, bypassing the shared DNS cache")
+        else:
+            pool._network_backend = backend
+    return httpx.AsyncClient(transport=transport, follow_redirects=True, timeout=profile.httpx_timeout())
+
+# --- klasyfikacja strony: CF/challenge i „pusta bez JS” — jeden przebieg, bez kopii całego dokumentu ---
+class PageVerdict(NamedTuple):
+    cf: bool            # znaki CF/challenge w treści
+    js_or_cf: bool      # cf, <noscript> albo mało linków przy wielu skryptach
+
+_SCAN_WINDOW = 64 * 1024
+_SCAN_SIGNS = _CF_BODY_SIGNS + ("<noscript",)
+_SCAN_OVERLAP = max(map(len, _SCAN_SIGNS)) - 1
+_EMPTY_VERDICT = PageVerdict(False, True)
+_VERDICTS: "OrderedDict[int, tuple[str, PageVerdict]]" = OrderedDict()
+_VERDICTS_MAX = 8
+
+def _scan_page(html: str) -> PageVerdict:
+    # lower() po oknach 64 KiB (z zakładką na najdłuższy wzorzec) zamiast html.lower() całości;
+    # liczymy tylko wystąpienia zaczynające się w oknie, więc wynik = jak na całym dokumencie
+    n = len(html)
+    anchors = scripts = 0
+    noscript = False
+    pos = 0
+    while pos < n:
+        low = html[pos:pos + _SCAN_WINDOW + _SCAN_OVERLAP].lower()
+        if any(s in low for s in _CF_BODY_SIGNS):
+            return PageVerdict(True, True)
+        if not noscript and "<noscript" in low:
+            noscript = True
+        if anchors < 3: anchors += low.count("<a ", 0, _SCAN_WINDOW + 2)
+        if scripts < 3: scripts += low.count("<script", 0, _SCAN_WINDOW + 6)
+        pos += _SCAN_WINDOW
+    return PageVerdict(False, noscript or (anchors < 3 and scripts >= 3))
+
+class PageScanner:
+    """_scan_page dla treści przychodzącej kawałkami (extract_mode="stream"): ten sam werdykt, pamięć ~ jedno okno."""
+    def __init__(self):
+        self._parts: list[str] = []
+        self._n = 0
+        self._tail = ""
+        self.cf = self.noscript = False
+        self.anchors = self.scripts = 0
+
+    def feed(self, piece: str) -> None:
+        if self.cf:
+            return
+        self._parts.append(piece); self._n += len(piece)
+        if self._n >= _SCAN_WINDOW:
+            self._scan()
+
+    def _scan(self):
+        low = (self._tail + "".join(self._parts)).lower()
+        self._parts.clear(); self._n = 0
+        t = len(self._tail)
+        if any(s in low for s in _CF_BODY_SIGNS):
+            self.cf = True
+        if not self.noscript and "<noscript" in low:
+            self.noscript = True
+        # wystąpienia zaczynające się w zakładce policzone już w poprzednim oknie
+        if self.anchors < 3: self.anchors += low.count("<a ", max(0, t - 2))
+        if self.scripts < 3: self.scripts += low.count("<script", max(0, t - 6))
+        self._tail = low[-_SCAN_OVERLAP:]
+
+    def verdict(self) -> PageVerdict:
+        if self._parts:
+            self._scan()
+        if self.cf:
+            return PageVerdict(True, True)
+        if not self._tail:
+            return _EMPTY_VERDICT
+        return PageVerdict(False, self.noscript or (self.anchors < 3 and self.scripts >= 3))
+
+def classify_page(html: str | None) -> PageVerdict:
+    """Werdykt zapamiętany po tożsamości obiektu — kolejne wywołania dla tej samej strony nic nie skanują."""
+    if not html:
+        return _EMPTY_VERDICT
+    hit = _VERDICTS.get(id(html))
+    if hit is not None and hit[0] is html:
+        return hit[1]
+    v = _scan_page(html)
+    _VERDICTS[id(html)] = (html, v)
+    if len(_VERDICTS) > _VERDICTS_MAX:
+        _VERDICTS.popitem(last=False)
+    return v
+
 def same_domain(link: str, domain: str) -> bool:
     try:
         host = urlparse(link).netloc.lower().split(":", 1)[0]
@@ -49,6 +254,23 @@ def defrag_and_norm(base: str, href: str) -> str | None:
     except Exception:
         return None
 
+_NUM_SEG_RE = re.compile(r"^\d+$")
+_ID_SEG_RE = re.compile(r"^(?:[0-9a-f]{8,}|[0-9a-f-]{32,36}|.*\d.*\d.*\d.*)$", re.I)
+
+def url_template(url: str) -> str:
+    """Wzorzec URL-a: segmenty liczbowe → {n}, identyfikatory → {id}, posortowane nazwy parametrów query."""
+    try:
+        p = urlparse(url)
+    except Exception:
+        return url
+    segs = []
+    for seg in p.path.split("/"):
+        if _NUM_SEG_RE.match(seg): seg = "{n}"
+        elif _ID_SEG_RE.match(seg): seg = "{id}"
+        segs.append(seg)
+    keys = sorted({k for k, _ in parse_qsl(p.query, keep_blank_values=True)})
+    return "/".join(segs) + ("?" + "&".join(keys) if keys else "")
+
 def _looks_cloudflare(status: int, headers: dict[str, str], body: str | None) -> bool:
     h = {k.lower(): v for k, v in (headers or {}).items()}
     if h.get("server", "").lower().startswith("cloudflare"):
@@ -57,86 +279,235 @@ def _looks_cloudflare(status: int, headers: dict[str, str], body: str | None) ->
         return True
     if status in (403, 409, 429, 503):
         return True
-    if body:
-        low = body.lower()
-        if any(s in low for s in _CF_BODY_SIGNS):
-            return True
-    return False
+    return classify_page(body).cf
+
+@dataclass
+class FetchResult:
+    """Wynik pobrania: text=None → porażka, error = klasa błędu (phorn/retry.py).
+    final_url — adres po przekierowaniach, redirects — wcześniejsze adresy łańcucha (od żądanego), () bez przekierowań."""
+    text: str | None
+    status: int = 0
+    error: str | None = None
+    retry_after: float | None = None
+    final_url: str | None = None
+    redirects: tuple[str, ...] = ()
+    streamed: bool = False          # treść poszła do sink (text == "")
 
-async def detect_cloudflare(session: aiohttp.ClientSession, url: str, *, proxy: str | None = None) -> bool:
+def _sniff_charset(content_type: str, head: bytes) -> str:
+    """charset: nagłówek → BOM → <meta charset> w pierwszych bajtach → utf-8."""
+    m = _CT_CHARSET_RE.search(content_type or "")
+    cs = m.group(1) if m else None
+    if not cs:
+        if head.startswith(codecs.BOM_UTF8): cs = "utf-8-sig"
+        elif head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)): cs = "utf-16"
+    if not cs:
+        m = _META_CHARSET_RE.search(head, 0, SNIFF_BYTES)
+        cs = m.group(1).decode("ascii", "ignore") if m else "utf-8"
     try:
-        async with session.get(url, headers=BASE_HEADERS, allow_redirects=True, proxy=proxy, timeout=8) as r:
-            text = await r.text(errors="ignore")
-            return _looks_cloudflare(r.status, r.headers, text)
-    except Exception:
-        return False
+        codecs.lookup(cs)
+    except LookupError:
+        cs = "utf-8"
+    return cs
+
+async def _read_body(chunks, status: int, content_type: str, metrics=None,
+                     sink=None, url: str = "") -> tuple[str, bool]:
+    """
+    Strumieniowe czytanie odpowiedzi (chunks = async iterator bajtów, już rozpakowanych).
+    Z pierwszych SNIFF_BYTES: czy to HTML i jaki charset; dalej dekoder przyrostowy.
+    200 bez HTML (PDF, obrazki, …) → przerywamy po sniffie, zwracamy tylko początek.
+    sink (async sink(url, kawałek)) — 200 HTML nie jest zbierany, kawałki idą do sink w trakcie pobierania,
+    zwracany text == "".
+    Zwraca (text, is_html).
+    """
+    t0 = time.perf_counter()
+    head = bytearray()
+    parts: list[str] = []
+    dec = None
+    is_html = False
+    n = 0
+
+    async def out(piece: str):
+        if not piece:
+            return
+        if sink is not None and is_html:
+            await sink(url, piece)
+        else:
+            parts.append(piece)
+
+    async for chunk in chunks:
+        n += len(chunk)
+        if dec is not None:
+            await out(dec.decode(chunk))
+            continue
+        head += chunk
+        if len(head) < SNIFF_BYTES:
+            continue
+        is_html = status == 200 and ("text/html" in content_type.lower() or bool(_HTML_SNIFF_RE.search(head, 0, SNIFF_BYTES)))
+        dec = codecs.getincrementaldecoder(_sniff_charset(content_type, bytes(head)))(errors="ignore")
+        await out(dec.decode(bytes(head)))
+        if status == 200 and not is_html:
+            break
+    if dec is None:                       # krótka odpowiedź — całość zmieściła się w sniffie
+        is_html = status == 200 and ("text/html" in content_type.lower() or bool(_HTML_SNIFF_RE.search(head)))
+        dec = codecs.getincrementaldecoder(_sniff_charset(content_type, bytes(head)))(errors="ignore")
+        await out(dec.decode(bytes(head)))
+    await out(dec.decode(b"", final=True))
+    if metrics is not None:
+        metrics.observe("body_seconds", time.perf_counter() - t0)
+        metrics.inc("bytes_total", n)
+    return "".join(parts), is_html
+
+def _failed(status: int, headers, text: str | None) -> FetchResult:
+    if status == 200:
+        return FetchResult(None, status, "content")
+    return FetchResult(None, status, classify_status(status, blocked=classify_page(text).cf),
+                       parse_retry_after((headers or {}).get("Retry-After")))
+
+def _located(res: FetchResult, r, sink=None) -> FetchResult:
+    """Uzupełnia adres końcowy i łańcuch przekierowań (aiohttp i httpx: r.url, r.history)."""
+    res.final_url = str(r.url)
+    res.redirects = tuple(str(h.url) for h in r.history)
+    res.streamed = sink is not None and res.text == ""
+    return res
+
+def _aiohttp_body(r: aiohttp.ClientResponse, metrics=None, sink=None):
+    return _read_body(r.content.iter_chunked(64 * 1024), r.status, r.headers.get("Content-Type", ""), metrics,
+                      sink=sink, url=str(r.url))
 
 # --- standard fetch (aiohttp, szybki) + wewnętrzny fallback na httpx/h2, jeśli wykryje CF ---
-async def _fetch_html_httpx(url: str, *, proxy: str | None, headers: dict[str, str]) -> str | None:
-    if httpx is None:
-        return None
-    proxies = {"http://": proxy, "https://": proxy} if proxy else None
-    async with httpx.AsyncClient(http2=True, follow_redirects=True, proxies=proxies, headers=headers, timeout=10.0) as client:
-        try:
-            r = await client.get(url)
-            ct = r.headers.get("content-type", "")
-            txt = r.text
-            if r.status_code == 200 and ("text/html" in ct.lower() or "<html" in (txt.lower() if txt else "")):
-                return txt
-            return None
-        except Exception:
-            return None
+async def _httpx_get(client, url: str, headers: dict[str, str], sink=None) -> FetchResult:
+    headers = {**headers, "Accept-Encoding": HTTPX_ACCEPT_ENCODING}
+    try:
+        async with client.stream("GET", url, headers=headers) as r:
+            txt, is_html = await _read_body(r.aiter_bytes(), r.status_code, r.headers.get("content-type", ""),
+                                            sink=sink, url=str(r.url))
+            if is_html:
+                return _located(FetchResult(txt, r.status_code), r, sink)
+            return _located(_failed(r.status_code, r.headers, txt), r)
+    except Exception as e:
+        return FetchResult(None, 0, classify_exception(e))
 
-async def fetch_html(
+async def _fetch_page_httpx(url: str, *, proxy: str | None, headers: dict[str, str],
+                            client=None, profile: NetProfile = DEFAULT_NET, sink=None) -> FetchResult:
+    if client is not None:
+        return await _httpx_get(client, url, headers, sink)
+    # bez współdzielonego klienta: jednorazowy (jak dawniej)
+    try:
+        client = make_httpx_client(profile, proxy=proxy)
+    except Exception as e:
+        return FetchResult(None, 0, classify_exception(e))
+    if client is None:
+        return FetchResult(None, 0, "other")
+    async with client:
+        return await _httpx_get(client, url, headers, sink)
+
+async def fetch_page(
     session: aiohttp.ClientSession,
     url: str,
     *,
     proxy: str | None = None,
     extra_headers: dict[str, str] | None = None,
-) -> str | None:
+    metrics=None,
+    profile: NetProfile = DEFAULT_NET,
+    client=None,
+    sink=None,
+) -> FetchResult:
+    """sink — zob. _read_body; po przerwanym strumieniu nie ma fallbacku (sink dostałby stronę drugi raz)."""
     headers = dict(BASE_HEADERS)
     if extra_headers:
         headers.update(extra_headers)
 
+    started = False
+    async def _sink(u: str, piece: str):
+        nonlocal started
+        started = True
+        await sink(u, piece)
+
+    first: FetchResult | None = None
     try:
-        async with session.get(url, timeout=12, allow_redirects=True, headers=headers, proxy=proxy) as r:
-            text = await r.text(errors="ignore")
-            ct = r.headers.get("Content-Type", "")
-            if r.status == 200 and ("text/html" in ct or "<html" in (text.lower() if text else "")):
-                return text
+        async with session.get(url, timeout=profile.aiohttp_timeout(), allow_redirects=True,
+                               headers={**headers, "Accept-Encoding": AIOHTTP_ACCEPT_ENCODING}, proxy=proxy) as r:
+            text, is_html = await _aiohttp_body(r, metrics, _sink if sink is not None else None)
+            if is_html:
+                return _located(FetchResult(text, r.status), r, sink)
+            first = _located(_failed(r.status, r.headers, text), r)
             if _looks_cloudflare(r.status, r.headers, text):
-                return await _fetch_html_httpx(url, proxy=proxy, headers=headers)
-    except Exception:
-        pass
+                res = await _fetch_page_httpx(url, proxy=proxy, headers=headers, client=client, profile=profile, sink=sink)
+                return res if res.text is not None else first
+    except Exception as e:
+        first = FetchResult(None, 0, classify_exception(e))
+        if started:
+            return first
+
+    res = await _fetch_page_httpx(url, proxy=proxy, headers=headers, client=client, profile=profile, sink=sink)
+    # klasa błędu z pierwszej próby (aiohttp) jest pewniejsza niż z fallbacku
+    return res if res.text is not None or first is None else first
+
+async def fetch_html(
+    session: aiohttp.ClientSession,
+    url: str,
+    *,
+    proxy: str | None = None,
+    extra_headers: dict[str, str] | None = None,
+    metrics=None,
+    profile: NetProfile = DEFAULT_NET,
+    client=None,
+) -> str | None:
+    return (await fetch_page(session, url, proxy=proxy, extra_headers=extra_headers, metrics=metrics,
+                             profile=profile, client=client)).text
 
+# --- sonda startowa: werdykt CF + treść strony do ponownego użycia jako pierwsze pobranie ---
+async def probe_page(
+    session: aiohttp.ClientSession,
+    url: str,
+    *,
+    proxy: str | None = None,
+    extra_headers: dict[str, str] | None = None,
+    metrics=None,
+    profile: NetProfile = DEFAULT_NET,
+) -> tuple[bool, FetchResult]:
+    headers = dict(BASE_HEADERS, **{"Accept-Encoding": AIOHTTP_ACCEPT_ENCODING})
+    if extra_headers:
+        headers.update(extra_headers)
     try:
-        return await _fetch_html_httpx(url, proxy=proxy, headers=headers)
-    except Exception:
-        return None
+        async with session.get(url, headers=headers, allow_redirects=True, proxy=proxy,
+                               timeout=profile.aiohttp_timeout(profile.probe_s)) as r:
+            text, is_html = await _aiohttp_body(r, metrics)
+            cf = _looks_cloudflare(r.status, r.headers, text)
+            if is_html:
+                return cf, _located(FetchResult(text, r.status), r)
+            return cf, _located(_failed(r.status, r.headers, text), r)
+    except Exception as e:
+        return False, FetchResult(None, 0, classify_exception(e))
+
+async def detect_cloudflare(session: aiohttp.ClientSession, url: str, *, proxy: str | None = None,
+                            profile: NetProfile = DEFAULT_NET) -> bool:
+    return (await probe_page(session, url, proxy=proxy, profile=profile))[0]
 
 # --- agresywne pobieranie (włączane przełącznikiem aggr_net=True) ---
-async def fetch_html_aggr(
+async def fetch_page_aggr(
     url: str,
     *,
     proxy: str | None = None,
     extra_headers: dict[str, str] | None = None,
-) -> str | None:
-    if httpx is None:
-        return None
+    profile: NetProfile = DEFAULT_NET,
+    client=None,
+    sink=None,
+) -> FetchResult:
     headers = dict(BROWSER_HEADERS)
     if extra_headers:
         headers.update(extra_headers)
-    proxies = {"http://": proxy, "https://": proxy} if proxy else None
-    try:
-        async with httpx.AsyncClient(http2=True, follow_redirects=True, proxies=proxies, headers=headers, timeout=12.0) as client:
-            r = await client.get(url)
-            ct = r.headers.get("content-type", "").lower()
-            txt = r.text
-            if r.status_code == 200 and ("text/html" in ct or "<html" in (txt.lower() if txt else "")):
-                return txt
-            return None
-    except Exception:
-        return None
+    return await _fetch_page_httpx(url, proxy=proxy, headers=headers, client=client, profile=profile, sink=sink)
+
+async def fetch_html_aggr(
+    url: str,
+    *,
+    proxy: str | None = None,
+    extra_headers: dict[str, str] | None = None,
+    profile: NetProfile = DEFAULT_NET,
+    client=None,
+) -> str | None:
+    return (await fetch_page_aggr(url, proxy=proxy, extra_headers=extra_headers, profile=profile, client=client)).text
 
 # ------- Public IP helpers (do nagłówka UI) -------
 async def get_public_ip(session: aiohttp.ClientSession, family: str = "ipv4", proxy: str | None = None) -> str | None:
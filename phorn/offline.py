@@ -0,0 +1,158 @@
+# phorn/offline.py
+"""
+Ekstrakcja z lokalnych zrzutów HTML (katalogi, archiwa tar) — bez sieci, w puli procesów.
+
+    for r in extract_corpus(["dump/", "site.tar.gz"], mode=3, workers=8):
+        r.url, r.hits, r.ips, r.fps          # r.hits: (username, phone, email)
+
+Pliki (i członkowie nieskompresowanego tar-a) są mapowane w pamięci w procesie roboczym i dekodowane
+wprost z mapy (charset: BOM → <meta charset> → utf-8); skompresowany tar czytany strumieniowo w procesie głównym.
+Ekstrakcja jak w crawl(extract_mode="stream"): telefony/e-maile/nagłówek z StreamExtractor, IP/fingerprinting
+przez scan_extras z cache skryptów inline na proces (zrzuty jednej witryny mają wspólne bundle).
+Zadania idą paczkami (~files_per_task plików albo ~bytes_per_task bajtów), w locie najwyżej 4 paczki na proces.
+"""
+import mmap
+import os
+import tarfile
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+
+from .extract import PHONE_RE, clean_phone, scan_extras, ScriptScanCache
+from .net import _sniff_charset, SNIFF_BYTES
+from .phones import PhoneEngine
+from .stream import StreamExtractor
+
+HTML_SUFFIXES = (".html", ".htm", ".xhtml", ".shtml")
+TAR_SUFFIXES = (".tar", ".tgz", ".tar.gz", ".tar.bz2", ".tar.xz")
+
+@dataclass
+class DocResult:
+    url: str
+    size: int
+    hits: list[tuple[str, str, str]] = field(default_factory=list)
+    ips: list[str] = field(default_factory=list)
+    fps: list[tuple[str, str]] = field(default_factory=list)
+    error: str | None = None
+
+# ------------ źródła ------------
+def _is_html(name: str) -> bool:
+    return name.lower().endswith(HTML_SUFFIXES)
+
+def _tar_jobs(path: str):
+    """(plik, offset, rozmiar, nazwa) dla nieskompresowanego tar-a; (None, bajty, rozmiar, nazwa) dla skompresowanego."""
+    try:
+        tf, plain = tarfile.open(path, "r:"), True
+    except tarfile.ReadError:
+        tf, plain = tarfile.open(path, "r|*"), False
+    with tf:
+        for m in tf:
+            tf.members.clear()                  # TarFile trzyma listę członków — przy milionach plików to pamięć
+            if not m.isfile() or not _is_html(m.name): continue
+            name = f"{path}!{m.name}"
+            if plain:
+                yield path, m.offset_data, m.size, name
+            else:
+                yield None, tf.extractfile(m).read(), m.size, name
+
+def iter_jobs(paths):
+    for p in paths:
+        if os.path.isdir(p):
+            for root, dirs, files in os.walk(p):
+                dirs.sort()
+                for fn in sorted(files):
+                    full = os.path.join(root, fn)
+                    if _is_html(fn):
+                        yield full, 0, os.path.getsize(full), full
+                    elif fn.lower().endswith(TAR_SUFFIXES) and tarfile.is_tarfile(full):
+                        yield from _tar_jobs(full)
+        elif os.path.isfile(p) and tarfile.is_tarfile(p):
+            yield from _tar_jobs(p)
+        elif os.path.isfile(p):
+            yield p, 0, os.path.getsize(p), p
+
+# ------------ proces roboczy ------------
+_cache: ScriptScanCache | None = None
+
+def _decode(buf) -> str:
+    cs = _sniff_charset("", bytes(buf[:SNIFF_BYTES]))
+    return str(buf, cs, "replace")
+
+def _extract(text: str, url: str, size: int, mode: int, extras_only_on_phone: bool,
+             phone_countries=None) -> DocResult:
+    global _cache
+    eng = PhoneEngine.for_countries(phone_countries) if phone_countries else None
+    sx = StreamExtractor(phones=mode in (1, 3), emails=mode in (2, 3), extras=False,
+                         phone_re=eng.regex if eng else PHONE_RE, phone_clean=eng.clean if eng else clean_phone)
+    sx.feed(text); sx.close()
+    r = DocResult(url, size)
+    phones, emails = sx.phones, sx.emails
+    if phones and emails:
+        r.hits = [(sx.username, ph, em) for ph in phones for em in emails]
+    elif phones:
+        r.hits = [(sx.username, ph, "") for ph in phones]
+    elif emails:
+        r.hits = [("", "", em) for em in emails]
+    if phones or not extras_only_on_phone:
+        if _cache is None: _cache = ScriptScanCache()
+        ips, fps = scan_extras(text, _cache)
+        r.ips, r.fps = sorted(ips), fps
+    return r
+
+def _run_task(jobs, mode: int, extras_only_on_phone: bool, phone_countries=None) -> list[DocResult]:
+    out = []
+    for src, data, size, name in jobs:
+        try:
+            if src is None:
+                text = _decode(data)
+            elif not size:
+                text = ""
+            else:
+                with open(src, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as mv, mv[data:data + size] as view:
+                        text = _decode(view)
+            out.append(_extract(text, name, size, mode, extras_only_on_phone, phone_countries))
+        except Exception as e:
+            out.append(DocResult(name, size, error=f"{type(e).__name__}: {e}"))
+    return out
+
+# ------------ pula ------------
+def _tasks(jobs, files_per_task: int, bytes_per_task: int):
+    task, n = [], 0
+    for j in jobs:
+        task.append(j); n += j[2]
+        if len(task) >= files_per_task or n >= bytes_per_task:
+            yield task
+            task, n = [], 0
+    if task: yield task
+
+def extract_corpus(paths, mode: int = 3, *, workers: int | None = None, extras_only_on_phone: bool = False,
+                   phone_countries: list[str] | None = None,
+                   files_per_task: int = 64, bytes_per_task: int = 8 * 1024 * 1024, on_progress=None,
+                   progress_interval_s: float = 1.0):
+    """
+    Generator DocResult (kolejność nieustalona). on_progress(files, bytes, seconds) co progress_interval_s
+    i na koniec — MB/s = bytes / seconds / 2**20. phone_countries jak w crawl() (numery krajowe: pierwszy kraj).
+    """
+    workers = workers or os.cpu_count() or 1
+    files = nbytes = 0
+    t0 = last = time.perf_counter()
+    tasks = _tasks(iter_jobs(paths), files_per_task, bytes_per_task)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < 4 * workers:
+                t = next(tasks, None)
+                if t is None: exhausted = True; break
+                pending.add(ex.submit(_run_task, t, mode, extras_only_on_phone, phone_countries))
+            if not pending: break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                for r in fut.result():
+                    files += 1; nbytes += r.size
+                    yield r
+            now = time.perf_counter()
+            if on_progress and now - last >= progress_interval_s:
+                last = now; on_progress(files, nbytes, now - t0)
+    if on_progress: on_progress(files, nbytes, time.perf_counter() - t0)
@@ -0,0 +1,137 @@
+# phorn/phones.py
+"""
+Telefony z wielu krajów jednym skanem: plany numeracji (CountryPlan) kompilowane do jednego wzorca.
+
+    eng = PhoneEngine.for_countries(["PL", "DE", "FR"], default="DE")   # skompilowany raz (cache)
+    for m in eng.regex.finditer(text):
+        eng.clean(m.group(0))        # → "+4930123456" (E.164) albo None
+
+Wzorzec: numery międzynarodowe wszystkich krajów (+CC / 00CC) w jednej alternatywie po numerach kierunkowych,
+potem kraj domyślny: samo CC (jak dotąd "48…") i numer krajowy (z prefiksem krajowym, np. "0" we Francji).
+Samo CC innych krajów nie jest rozpoznawane — długie ciągi cyfr dawałyby fałszywe trafienia.
+Kraj domyślny: `default`, domena (country_for_domain) albo pierwszy z listy. Numery krajowe innych krajów
+bez +CC są nierozróżnialne — nie są rozpoznawane.
+Normalizacja: str.translate (usuwa separatory) zamiast re.sub na każdym kandydacie.
+
+Dla ["PL"] wynik = extract.PHONE_RE + clean_phone (poza "0048…", które teraz daje poprawny numer).
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+@dataclass(frozen=True)
+class CountryPlan:
+    country: str            # ISO 3166-1 alpha-2
+    cc: str                 # numer kierunkowy kraju
+    min_len: int            # długość numeru krajowego (bez prefiksu krajowego)
+    max_len: int
+    trunk: str = ""         # prefiks krajowy (pomijany w E.164)
+
+PLANS: dict[str, CountryPlan] = {p.country: p for p in (
+    CountryPlan("PL", "48", 9, 9),
+    CountryPlan("CZ", "420", 9, 9),
+    CountryPlan("SK", "421", 9, 9, "0"),
+    CountryPlan("DE", "49", 6, 13, "0"),        # numery zmiennej długości (+49 89 123456 … +49 30 12345678901)
+    CountryPlan("AT", "43", 5, 13, "0"),
+    CountryPlan("CH", "41", 9, 9, "0"),
+    CountryPlan("FR", "33", 9, 9, "0"),
+    CountryPlan("BE", "32", 8, 9, "0"),
+    CountryPlan("NL", "31", 9, 9, "0"),
+    CountryPlan("LU", "352", 8, 9),
+    CountryPlan("ES", "34", 9, 9),
+    CountryPlan("PT", "351", 9, 9),
+    CountryPlan("IT", "39", 6, 11),
+    CountryPlan("GR", "30", 10, 10),
+    CountryPlan("IE", "353", 9, 9, "0"),
+    CountryPlan("GB", "44", 10, 10, "0"),
+    CountryPlan("DK", "45", 8, 8),
+    CountryPlan("SE", "46", 6, 10, "0"),
+    CountryPlan("FI", "358", 5, 12, "0"),
+    CountryPlan("EE", "372", 7, 8),
+    CountryPlan("LV", "371", 8, 8),
+    CountryPlan("LT", "370", 8, 8, "8"),
+    CountryPlan("HU", "36", 8, 9, "06"),
+    CountryPlan("RO", "40", 9, 9, "0"),
+    CountryPlan("BG", "359", 8, 9, "0"),
+    CountryPlan("HR", "385", 8, 9, "0"),
+    CountryPlan("SI", "386", 8, 8, "0"),
+)}
+
+_TLD_COUNTRY = {"uk": "GB"}
+_SEP = r"[\s\-\.]"
+# separatory i "+" → usunięte; \s jak w wzorcu (także spacje Unicode)
+_STRIP = str.maketrans("", "", "+-." + "".join(c for c in map(chr, range(0x3001)) if c.isspace()))
+
+def _digits(n: int, m: int) -> str:
+    return f"(?:\\d{_SEP}?){{{n}}}" if n == m else f"(?:\\d{_SEP}?){{{n},{m}}}"
+
+def country_for_domain(domain: str, countries) -> str | None:
+    """Kraj z TLD domeny, jeśli jest na liście (example.de → "DE")."""
+    tld = domain.rsplit(".", 1)[-1].lower()
+    c = _TLD_COUNTRY.get(tld, tld.upper())
+    return c if c in countries else None
+
+class PhoneEngine:
+    def __init__(self, plans: list[CountryPlan], default: str | None = None, *, national: bool = True):
+        """national=False — tylko +CC/00CC (bez samego CC i numerów krajowych kraju domyślnego)."""
+        if not plans:
+            raise ValueError("PhoneEngine: no country plans")
+        self.plans = list(plans)
+        by_country = {p.country: p for p in self.plans}
+        self.default = by_country.get(default) if default else self.plans[0]
+        if self.default is None:
+            raise ValueError(f"PhoneEngine: default country {default!r} not in plans")
+        self.national = national
+        self._by_cc = sorted(self.plans, key=lambda p: -len(p.cc))      # 420 przed 42…, gdyby się trafiło
+        intl = "|".join(f"{p.cc}{_SEP}?{_digits(p.min_len, p.max_len)}" for p in self._by_cc)
+        d = self.default
+        alts = [f"(?:\\+|00)(?:{intl})"]
+        if national:
+            alts.append(f"{d.cc}{_SEP}?{_digits(d.min_len, d.max_len)}")
+            alts.append((re.escape(d.trunk) + f"{_SEP}?" if d.trunk else "") + _digits(d.min_len, d.max_len))
+        # (?=[+\d]) — sre szuka wtedy tylko od znaków z tej klasy (bez niej próbuje alternatyw na każdej pozycji)
+        self.regex = re.compile(f"(?=[+\\d])(?:{'|'.join(alts)})")
+
+    @classmethod
+    def for_countries(cls, countries, default: str | None = None) -> "PhoneEngine":
+        """Z kodów krajów (PLANS); skompilowane silniki są współdzielone."""
+        return _engine(tuple(c.upper() for c in countries), default.upper() if default else None)
+
+    def clean(self, raw: str) -> str | None:
+        """E.164 albo None. Bez "+"/"00" tylko kraj domyślny: numer krajowy, potem samo CC."""
+        s = raw.strip()
+        intl = s.startswith("+")
+        digits = s.translate(_STRIP)
+        if not digits.isdigit():
+            digits = re.sub(r"\D", "", digits)
+            if not digits: return None
+        if not intl and digits.startswith("00"):
+            intl, digits = True, digits[2:]
+        if not intl:
+            d = self.default
+            if not self.national: return None
+            nsn = digits[len(d.trunk):] if d.trunk and digits.startswith(d.trunk) else (None if d.trunk else digits)
+            if nsn is not None and d.min_len <= len(nsn) <= d.max_len:
+                return f"+{d.cc}{nsn}"
+            if digits.startswith(d.cc) and d.min_len <= len(digits) - len(d.cc) <= d.max_len:
+                return f"+{digits}"
+            return None
+        for p in self._by_cc:
+            if digits.startswith(p.cc) and p.min_len <= len(digits) - len(p.cc) <= p.max_len:
+                return f"+{digits}"
+        return None
+
+    def findall(self, text: str) -> set[str]:
+        out = set()
+        clean = self.clean
+        for m in self.regex.finditer(text):
+            ph = clean(m.group(0))
+            if ph: out.add(ph)
+        return out
+
+@lru_cache(maxsize=64)
+def _engine(countries: tuple[str, ...], default: str | None) -> PhoneEngine:
+    unknown = [c for c in countries if c not in PLANS]
+    if unknown:
+        raise ValueError(f"unknown phone countries: {', '.join(unknown)} (known: {', '.join(PLANS)})")
+    return PhoneEngine([PLANS[c] for c in countries], default)
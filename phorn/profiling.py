@@ -0,0 +1,129 @@
+# phorn/profiling.py
+"""
+Profilowanie przebiegu crawl() (CLI: --profile [prefiks]).
+
+Wątek próbkujący co `interval_ms` zrzuca stos wątku pętli asyncio i przypisuje go do bieżącego
+taska (nazwa taska = pierwszy element stosu, np. "crawl-worker-3"; "<idle>" gdy pętla czeka w selectorze).
+Na koniec:
+  <prefiks>.collapsed  — format „collapsed stacks” (flamegraph.pl / speedscope / inferno),
+  <prefiks>.top.txt    — top-N funkcji (self / total próbek),
+  <prefiks>.prof       — tylko mode="cprofile": pełny cProfile (pstats / snakeviz).
+"""
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+def _current_task_name(loop_thread_id: int) -> str | None:
+    cur = getattr(asyncio.tasks, "_current_tasks", None)
+    if not cur:
+        return None
+    try:
+        for loop, task in list(cur.items()):
+            if getattr(loop, "_thread_id", None) == loop_thread_id:
+                name = task.get_name()
+                # domyślne nazwy „Task-123” nic nie mówią i rozdrabniają raport
+                return "<task>" if name.startswith("Task-") else name
+    except Exception:
+        pass
+    return None
+
+def _frame_label(code) -> str:
+    fn = code.co_filename
+    parts = fn.replace("\\", "/").split("/")
+    short = "/".join(parts[-2:]) if "phorn" in parts or "bench" in parts else parts[-1]
+    return f"{code.co_name} ({short}:{code.co_firstlineno})".replace(";", ",")
+
+class CrawlProfiler:
+    def __init__(self, prefix: str = "phorn_profile", *, mode: str = "sample", interval_ms: float = 5.0, top: int = 30):
+        self.prefix = prefix
+        self.mode = mode
+        self.interval = max(0.0005, interval_ms / 1000)
+        self.top = top
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._tid = None
+        self._cprof: cProfile.Profile | None = None
+        self._t0 = 0.0
+        self.wall = 0.0
+
+    def _sample_loop(self):
+        frames = sys._current_frames
+        while not self._stop.wait(self.interval):
+            f = frames().get(self._tid)
+            if f is None:
+                continue
+            stack = []
+            while f is not None:
+                stack.append(f.f_code)
+                f = f.f_back
+            task = _current_task_name(self._tid) or "<idle>"
+            self.stacks[(task, tuple(reversed(stack)))] += 1
+            self.samples += 1
+
+    def __enter__(self):
+        self._tid = threading.get_ident()
+        self._t0 = time.perf_counter()
+        if self.mode == "cprofile":
+            self._cprof = cProfile.Profile()
+            self._cprof.enable()
+        self._thread = threading.Thread(target=self._sample_loop, name="phorn-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread: self._thread.join()
+        if self._cprof: self._cprof.disable()
+        self.wall = time.perf_counter() - self._t0
+        self.write()
+        return False
+
+    # ---- raporty ----
+    def collapsed_lines(self) -> list[str]:
+        out = []
+        for (task, codes), n in self.stacks.most_common():
+            out.append(";".join([f"task:{task}"] + [_frame_label(c) for c in codes]) + f" {n}")
+        return out
+
+    def top_report(self) -> str:
+        self_c, total_c, by_task = Counter(), Counter(), Counter()
+        for (task, codes), n in self.stacks.items():
+            by_task[task] += n
+            if codes:
+                self_c[_frame_label(codes[-1])] += n
+            for lbl in {_frame_label(c) for c in codes}:
+                total_c[lbl] += n
+        total = max(1, self.samples)
+        lines = [f"PHORN profile: wall={self.wall:.2f}s samples={self.samples} interval={self.interval*1000:.1f}ms", ""]
+        lines.append("== samples per asyncio task ==")
+        for task, n in by_task.most_common(self.top):
+            lines.append(f"{n:8d} {n/total*100:6.1f}%  {task}")
+        lines += ["", f"== top {self.top} by self samples =="]
+        for lbl, n in self_c.most_common(self.top):
+            lines.append(f"{n:8d} {n/total*100:6.1f}%  {lbl}")
+        lines += ["", f"== top {self.top} by total (inclusive) samples =="]
+        for lbl, n in total_c.most_common(self.top):
+            lines.append(f"{n:8d} {n/total*100:6.1f}%  {lbl}")
+        if self._cprof:
+            buf = io.StringIO()
+            pstats.Stats(self._cprof, stream=buf).sort_stats("cumulative").print_stats(self.top)
+            lines += ["", "== cProfile (cumulative) ==", buf.getvalue()]
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        d = os.path.dirname(self.prefix)
+        if d: os.makedirs(d, exist_ok=True)
+        with open(f"{self.prefix}.collapsed", "w", encoding="utf-8") as f:
+            f.write("\n".join(self.collapsed_lines()) + "\n")
+        with open(f"{self.prefix}.top.txt", "w", encoding="utf-8") as f:
+            f.write(self.top_report())
+        if self._cprof:
+            self._cprof.dump_stats(f"{self.prefix}.prof")
@@ -0,0 +1,330 @@
+# phorn/render.py
+import asyncio
+import time
+from pathlib import Path
+
+from .net import UA
+
+LAUNCH_ARGS = ["--disable-blink-features=AutomationControlled","--no-sandbox","--disable-dev-shm-usage"]
+
+def _cookie_header_from(pw_cookies: list[dict]) -> str:
+    parts = []
+    for c in pw_cookies:
+        n,v = c.get("name"), c.get("value")
+        if n and v: parts.append(f"{n}={v}")
+    return "; ".join(parts)
+
+def _has_cf_clearance(cookies: list[dict]) -> bool:
+    return any(c.get("name","").lower().startswith("cf_clearance") for c in cookies)
+
+def _profile_dir_for(domain: str) -> str:
+    base = Path.home() / ".phorn" / "profiles"
+    base.mkdir(parents=True, exist_ok=True)
+    return str(base / domain.replace(":", "_"))
+
+def _cleanup_chrome_singleton(profile_dir: str, on_detail=None):
+    if not profile_dir: return
+    for name in ("SingletonLock","SingletonCookie","SingletonSocket"):
+        p = Path(profile_dir) / name
+        try:
+            if p.exists():
+                p.unlink()
+        except Exception as e:
+            if on_detail: on_detail(f"cleanup warn: {e}")
+
+# ------------ blokowanie zasobów + gotowość strony ------------
+# potrzebujemy tylko DOM (tekst + linki) — obrazki/fonty/media/trackery to czysty koszt
+BLOCK_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+TRACKER_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "googlesyndication.com", "facebook.net", "connect.facebook.com",
+    "hotjar.com", "clarity.ms", "scorecardresearch.com", "criteo.com",
+    "adnxs.com", "taboola.com", "outbrain.com", "tiktok.com/i18n/pixel",
+)
+
+# selektor „kontakt już jest w DOM” — wystarczy, nie czekamy dalej
+READY_SELECTOR = "a[href^='tel:'], a[href^='mailto:']"
+
+# Promise: resolve gdy pojawi się selektor albo DOM nie zmienia się przez quietMs (limit maxMs).
+# Strona challenge (CF „Just a moment…”) nie jest uznawana za stabilną.
+_READY_JS = """
+([quietMs, maxMs, sel]) => new Promise((resolve) => {
+  const blocked = () => /just a moment|attention required|checking your browser/i.test(document.title || "");
+  const hit = () => { try { return !!document.querySelector(sel); } catch (e) { return false; } };
+  if (hit()) return resolve("selector");
+  let t = null, obs = null, cap = null;
+  const done = (why) => { if (obs) obs.disconnect(); clearTimeout(t); clearTimeout(cap); resolve(why); };
+  const arm = () => { clearTimeout(t); t = setTimeout(() => blocked() ? arm() : done("stable"), quietMs); };
+  obs = new MutationObserver(() => { if (hit()) done("selector"); else arm(); });
+  obs.observe(document.documentElement || document, {childList: true, subtree: true, characterData: true});
+  cap = setTimeout(() => done("timeout"), maxMs);
+  arm();
+})
+"""
+
+def _is_tracker(url: str) -> bool:
+    return any(h in url for h in TRACKER_HOSTS)
+
+async def _block_route(route):
+    try:
+        req = route.request
+        if req.resource_type in BLOCK_RESOURCE_TYPES or _is_tracker(req.url):
+            await route.abort()
+        else:
+            await route.continue_()
+    except Exception:
+        pass
+
+# ------------ Playwright helpers ------------
+async def _render_html(
+    browser_ctx, url: str, timeout_ms: int, *,
+    settle_ms: int | None = None, ready_max_ms: int = 5000, ready_selector: str = READY_SELECTOR,
+) -> str | None:
+    """settle_ms=None → stare zachowanie (networkidle + 1.2 s), inaczej DOM-ready + stabilizacja."""
+    try:
+        page = browser_ctx["page"]
+        if settle_ms is None:
+            await page.goto(url, wait_until="networkidle", timeout=timeout_ms)
+            await page.wait_for_timeout(1200)
+            return await page.content()
+        await page.goto(url, wait_until="domcontentloaded", timeout=timeout_ms)
+        cap = max(0, min(ready_max_ms, timeout_ms))
+        for _ in range(2):
+            try:
+                await page.evaluate(_READY_JS, [settle_ms, cap, ready_selector])
+                break
+            except Exception:
+                # nawigacja w trakcie (JS redirect / challenge) → poczekaj na nowy DOM i spróbuj raz jeszcze
+                try: await page.wait_for_load_state("domcontentloaded", timeout=cap or 1)
+                except Exception: pass
+        return await page.content()
+    except Exception:
+        return None
+
+async def _stealth(page):
+    try:
+        from playwright_stealth import stealth_async
+        await stealth_async(page)
+    except Exception:
+        pass
+
+async def _launch_context(proxy, *, headless=True, domain_for_profile=None, on_detail=None):
+    """Startuje Playwright + kontekst (persistent profil jeśli podano domenę). Zwraca (pw, browser, context)."""
+    from playwright.async_api import async_playwright
+    pw = await async_playwright().start()
+    ctx_opts = dict(locale="pl-PL", user_agent=UA, viewport={"width":1366,"height":768})
+    if proxy: ctx_opts["proxy"] = {"server": proxy}
+    context = None; browser = None
+    profile_dir = _profile_dir_for(domain_for_profile) if domain_for_profile else None
+    use_channel = "chrome"
+    if profile_dir: _cleanup_chrome_singleton(profile_dir, on_detail)
+    if profile_dir:
+        try:
+            context = await pw.chromium.launch_persistent_context(
+                profile_dir, channel=use_channel, headless=headless, args=LAUNCH_ARGS, **ctx_opts
+            )
+        except Exception:
+            pass
+    if context is None:
+        try:
+            browser = await pw.chromium.launch(channel=use_channel, headless=headless, args=LAUNCH_ARGS)
+        except Exception:
+            browser = await pw.chromium.launch(headless=headless, args=LAUNCH_ARGS)
+        context = await browser.new_context(**ctx_opts)
+    return pw, browser, context
+
+async def _ensure_browser(existing_ctx, proxy, *, headless=True, domain_for_profile=None, on_detail=None):
+    if existing_ctx is not None:
+        return existing_ctx, None
+    try:
+        pw, browser, context = await _launch_context(
+            proxy, headless=headless, domain_for_profile=domain_for_profile, on_detail=on_detail
+        )
+        page = await context.new_page()
+        await _stealth(page)
+        return {"browser": browser, "context": context, "page": page}, pw
+    except Exception as e:
+        if on_detail: on_detail(f"browser launch failed: {e}")
+        return None, None
+
+# ------------ pula stron headless (render_mode 1/2) ------------
+class BrowserPool:
+    """
+    Jedna przeglądarka/kontekst + N stron renderujących równolegle.
+    Strona jest zamykana i otwierana na nowo po `recycle_after` nawigacjach (limit pamięci),
+    każdy render ma własny timeout. Startuje leniwie przy pierwszym render().
+    block_resources: abort obrazków/fontów/mediów/trackerów (route na kontekście).
+    settle_ms: render kończy się gdy DOM jest stabilny przez settle_ms albo widać READY_SELECTOR
+               (None → stare networkidle + 1.2 s).
+    """
+    def __init__(
+        self,
+        proxy: str | None = None,
+        *,
+        size: int = 1,
+        recycle_after: int = 50,
+        timeout_ms: int = 15000,
+        headless: bool = True,
+        domain_for_profile: str | None = None,
+        on_detail=None,
+        block_resources: bool = True,
+        settle_ms: int | None = 400,
+        ready_max_ms: int = 5000,
+    ):
+        self.proxy = proxy
+        self.size = max(1, int(size))
+        self.recycle_after = max(0, int(recycle_after))
+        self.timeout_ms = int(timeout_ms)
+        self.headless = headless
+        self.domain_for_profile = domain_for_profile
+        self.on_detail = on_detail
+        self.block_resources = block_resources
+        self.settle_ms = settle_ms
+        self.ready_max_ms = int(ready_max_ms)
+        self._pw = None; self._browser = None; self._context = None
+        self._slots: asyncio.Queue | None = None
+        self._start_lock = asyncio.Lock()
+        self._started = False
+        self._failed = False
+        self._closed = False
+
+    def _detail(self, msg: str):
+        if self.on_detail: self.on_detail(msg)
+
+    @property
+    def context(self):
+        return self._context
+
+    async def start(self) -> bool:
+        if self._started: return True
+        if self._failed or self._closed: return False
+        async with self._start_lock:
+            if self._started: return True
+            if self._failed: return False
+            try:
+                self._pw, self._browser, self._context = await _launch_context(
+                    self.proxy, headless=self.headless,
+                    domain_for_profile=self.domain_for_profile, on_detail=self.on_detail,
+                )
+                if self.block_resources:
+                    await self._context.route("**/*", _block_route)
+                self._slots = asyncio.Queue()
+                for _ in range(self.size):
+                    await self._slots.put({"page": await self._new_page(), "uses": 0})
+                self._started = True
+                self._detail(f"render pool: {self.size} page(s) ready")
+                return True
+            except Exception as e:
+                self._failed = True
+                self._detail(f"browser launch failed: {e}")
+                await self._shutdown()
+                return False
+
+    async def _new_page(self):
+        page = await self._context.new_page()
+        await _stealth(page)
+        return page
+
+    async def _recycle(self, slot: dict):
+        try: await slot["page"].close()
+        except Exception: pass
+        try:
+            slot["page"] = await self._new_page()
+        except Exception as e:
+            slot["page"] = None
+            self._detail(f"render pool: page reopen failed: {e}")
+        slot["uses"] = 0
+
+    async def render(self, url: str, *, timeout_ms: int | None = None) -> str | None:
+        if not await self.start():
+            return None
+        to_ms = int(timeout_ms or self.timeout_ms)
+        slot = await self._slots.get()
+        broken = False
+        try:
+            if slot["page"] is None:
+                await self._recycle(slot)
+                if slot["page"] is None:
+                    return None
+            slot["uses"] += 1
+            # twardy limit na całą operację (goto + czekanie + content)
+            return await asyncio.wait_for(
+                _render_html(
+                    {"page": slot["page"]}, url, timeout_ms=to_ms,
+                    settle_ms=self.settle_ms, ready_max_ms=self.ready_max_ms,
+                ),
+                timeout=to_ms / 1000 + 5,
+            )
+        except Exception:
+            broken = True
+            return None
+        finally:
+            if broken or (self.recycle_after and slot["uses"] >= self.recycle_after):
+                await self._recycle(slot)
+            self._slots.put_nowait(slot)
+
+    async def cookies(self, url: str | None = None) -> list[dict]:
+        if not self._context: return []
+        try:
+            return await (self._context.cookies(url) if url else self._context.cookies())
+        except Exception:
+            return []
+
+    async def _shutdown(self):
+        try:
+            if self._context: await self._context.close()
+        except Exception: pass
+        try:
+            if self._browser: await self._browser.close()
+        except Exception: pass
+        try:
+            if self._pw: await self._pw.stop()
+        except Exception: pass
+        self._pw = self._browser = self._context = None
+
+    async def close(self):
+        if self._closed: return
+        self._closed = True
+        self._started = False
+        await self._shutdown()
+
+# ------------ interactive unlock (headful) ------------
+async def _interactive_unlock(url, proxy, *, timeout_s, on_detail, domain_for_profile):
+    ctx, pw = await _ensure_browser(None, proxy, headless=False, domain_for_profile=domain_for_profile, on_detail=on_detail)
+    if not ctx:
+        on_detail("interactive: cannot start browser (missing deps?)")
+        return None, None
+    try:
+        page = ctx["page"]
+        await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+        start = time.time()
+        while time.time() - start < timeout_s:
+            try:
+                sel = ("button:has-text('Akceptuj'), button:has-text('Zgadzam'), "
+                       "button:has-text('Accept'),   button:has-text('I agree'), "
+                       "button:has-text('OK'),       button:has-text('Got it')")
+                btn = page.locator(sel).first
+                if await btn.is_visible():
+                    await btn.click(); on_detail("interactive: clicked cookie banner")
+                    await page.wait_for_timeout(500); await page.reload(wait_until="domcontentloaded")
+            except Exception: pass
+            try:
+                cookies = await ctx["context"].cookies()
+                if _has_cf_clearance(cookies):
+                    html = await page.content()
+                    return html, _cookie_header_from(cookies)
+            except Exception: pass
+            waited = int(time.time() - start)
+            if waited and waited % 5 == 0:
+                on_detail(f"interactive: waiting… {waited}s/{timeout_s}s → reload")
+                try: await page.reload(wait_until="domcontentloaded")
+                except Exception: pass
+            await page.wait_for_timeout(1000)
+        on_detail("interactive: timeout")
+        return None, None
+    finally:
+        try:
+            await ctx["context"].close()
+            if ctx.get("browser"): await ctx["browser"].close()
+            if pw: await pw.stop()
+        except Exception: pass
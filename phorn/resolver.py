@@ -0,0 +1,153 @@
+# phorn/resolver.py
+"""
+Wspólny cache DNS dla aiohttp i httpx.
+
+CachingResolver — aiohttp AbstractResolver: aiodns (jeśli zainstalowany) albo getaddrinfo w wątku,
+                  cache z TTL, krótki cache negatywny, równoległe zapytania o ten sam host łączone w jedno.
+resolving_backend(resolver) — backend sieciowy httpcore, który rozwiązuje nazwy przez ten sam cache
+                  (TLS/SNI nadal używa nazwy hosta, łączymy się tylko pod gotowy adres IP).
+"""
+import asyncio
+import ipaddress
+import socket
+import time
+
+from aiohttp.abc import AbstractResolver
+from aiohttp.resolver import ThreadedResolver
+
+try:
+    import aiodns  # noqa: F401
+    from aiohttp.resolver import AsyncResolver
+except Exception:
+    AsyncResolver = None
+
+try:
+    import httpcore
+except Exception:
+    httpcore = None
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+def _retrieve(task: asyncio.Task) -> None:
+    # wyjątek odebrany, nawet gdy wszyscy czekający zostali anulowani (bez „exception was never retrieved”)
+    if not task.cancelled(): task.exception()
+
+class CachingResolver(AbstractResolver):
+    def __init__(self, *, ttl_s: float = 300.0, negative_ttl_s: float = 30.0,
+                 nameservers: list[str] | None = None, use_aiodns: bool = True, max_size: int = 10000):
+        self.ttl_s = float(ttl_s)
+        self.negative_ttl_s = float(negative_ttl_s)
+        self.nameservers = nameservers
+        self.use_aiodns = use_aiodns and AsyncResolver is not None
+        self.max_size = int(max_size)
+        self._inner = None          # tworzony leniwie (resolvery aiohttp wiążą się z bieżącą pętlą)
+        self._cache: dict[tuple, tuple[float, object]] = {}
+        self._pending: dict[tuple, asyncio.Future] = {}
+        self.hits = self.misses = 0
+
+    @property
+    def backend(self) -> str:
+        return "aiodns" if self.use_aiodns else "threaded"
+
+    def _resolver(self):
+        if self._inner is None:
+            if self.use_aiodns:
+                try:
+                    self._inner = AsyncResolver(nameservers=self.nameservers) if self.nameservers else AsyncResolver()
+                except Exception:
+                    self.use_aiodns = False
+            if self._inner is None:
+                self._inner = ThreadedResolver()
+        return self._inner
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET):
+        key = (host, port, family)
+        ent = self._cache.get(key)
+        if ent is not None and ent[0] > time.monotonic():
+            self.hits += 1
+            if isinstance(ent[1], OSError):
+                raise type(ent[1])(*ent[1].args)
+            return list(ent[1])
+        task = self._pending.get(key)
+        if task is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            # zapytanie jako osobny task: anulowanie jednego z czekających nie anuluje pozostałych
+            task = self._pending[key] = asyncio.ensure_future(self._lookup(key))
+            task.add_done_callback(_retrieve)
+        return list(await asyncio.shield(task))
+
+    async def _lookup(self, key):
+        host, port, family = key
+        try:
+            res = await self._resolver().resolve(host, port, family)
+        except OSError as e:
+            self._store(key, e, self.negative_ttl_s)
+            raise
+        else:
+            self._store(key, res, self.ttl_s)
+            return res
+        finally:
+            self._pending.pop(key, None)
+
+    def _store(self, key, value, ttl):
+        # kolejność wstawiania = wiek: przy limicie wypada najstarszy wpis, przeterminowane z początku przy okazji
+        now = time.monotonic()
+        cache = self._cache
+        cache.pop(key, None)
+        while cache and len(cache) >= self.max_size:
+            del cache[next(iter(cache))]
+        while cache:
+            k = next(iter(cache))
+            if cache[k][0] > now: break
+            del cache[k]
+        cache[key] = (now + ttl, value)
+
+    async def addresses(self, host: str, port: int) -> list[str]:
+        """Adresy IP dla hosta (bez DNS dla literałów IP)."""
+        if _is_ip(host):
+            return [host.strip("[]")]
+        return [r["host"] for r in await self.resolve(host, port, socket.AF_UNSPEC)]
+
+    async def close(self):
+        if self._inner is not None:
+            try: await self._inner.close()
+            except Exception: pass
+            self._inner = None
+
+class _ResolvingBackend:
+    """httpcore.AsyncNetworkBackend (duck typing): connect_tcp przez CachingResolver, reszta bez zmian."""
+    def __init__(self, resolver: CachingResolver):
+        self.resolver = resolver
+        self.inner = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            addrs = await self.resolver.addresses(host, port)
+        except OSError as e:
+            raise httpcore.ConnectError(str(e)) from e
+        last = None
+        for ip in addrs:
+            try:
+                return await self.inner.connect_tcp(ip, port, timeout=timeout,
+                                                    local_address=local_address, socket_options=socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                last = e
+        raise last or httpcore.ConnectError(f"no address for {host}")
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self.inner.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds):
+        await self.inner.sleep(seconds)
+
+def resolving_backend(resolver: CachingResolver | None):
+    if resolver is None or httpcore is None or not hasattr(httpcore, "AnyIOBackend"):
+        return None
+    return _ResolvingBackend(resolver)
@@ -0,0 +1,86 @@
+# phorn/retry.py
+"""
+Klasyfikacja błędów pobierania + polityka ponowień (exponential backoff z pełnym jitterem).
+
+Klasy: dns, connect, timeout, 5xx, 429 (ponawialne) oraz blocked, http, content, other (nie).
+crawl() nie czeka na ponowienie w workerze — URL wraca do frontiera z opóźnieniem (frontier.retry()).
+"""
+import asyncio
+import random
+import socket
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+
+try:
+    import httpx
+except Exception:
+    httpx = None
+
+RETRYABLE = frozenset({"dns", "connect", "timeout", "5xx", "429"})
+
+def _caused_by_gaierror(exc: BaseException) -> bool:
+    seen = 0
+    while exc is not None and seen < 8:
+        if isinstance(exc, socket.gaierror):
+            return True
+        exc = exc.__cause__ or exc.__context__ or getattr(exc, "os_error", None)
+        seen += 1
+    return False
+
+def classify_exception(exc: BaseException) -> str:
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, aiohttp.ServerTimeoutError)):
+        return "timeout"
+    if httpx is not None and isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    if _caused_by_gaierror(exc):
+        return "dns"
+    if isinstance(exc, (aiohttp.ClientConnectorError, aiohttp.ServerDisconnectedError,
+                        aiohttp.ClientOSError, ConnectionError)):
+        return "connect"
+    if httpx is not None and isinstance(exc, (httpx.ConnectError, httpx.RemoteProtocolError, httpx.ReadError)):
+        return "connect"
+    return "other"
+
+def classify_status(status: int, *, blocked: bool = False) -> str | None:
+    if status == 200:
+        return None
+    if blocked:
+        return "blocked"
+    if status == 429:
+        return "429"
+    if 500 <= status <= 599:
+        return "5xx"
+    return "http"
+
+def parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    v = value.strip()
+    if v.isdigit():
+        return float(v)
+    try:
+        return max(0.0, parsedate_to_datetime(v).timestamp() - time.time())
+    except Exception:
+        return None
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 2                 # ponowień na URL (łącznie prób = max_retries + 1)
+    base_s: float = 0.5
+    cap_s: float = 30.0
+    per_class: dict[str, int] = field(default_factory=lambda: {"dns": 1})   # niższe limity dla klas
+    rng: random.Random = field(default_factory=random.Random, repr=False)
+
+    def should_retry(self, cls: str | None, attempt: int) -> bool:
+        """attempt = liczba dotychczasowych nieudanych prób (1 po pierwszej porażce)."""
+        if cls not in RETRYABLE:
+            return False
+        return attempt <= min(self.max_retries, self.per_class.get(cls, self.max_retries))
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float:
+        if retry_after is not None:
+            return min(self.cap_s, max(0.0, retry_after))
+        return self.rng.uniform(0, min(self.cap_s, self.base_s * (2 ** max(0, attempt - 1))))
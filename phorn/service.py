@@ -0,0 +1,317 @@
+# phorn/service.py
+"""
+Tryb usługi (python main.py --cli --serve [HOST:PORT]): jeden proces, kolejka zadań crawl i lokalne API HTTP/JSON.
+
+    POST   /jobs                 {"domain": "...", "mode": 1, "max_pages": 200, ...}  → 202 {"id": ...}
+    GET    /jobs                 lista zadań (bez wyników)
+    GET    /jobs/{id}            stan + ostatni on_status
+    GET    /jobs/{id}/events     NDJSON na żywo: status / found / detail / done (?since=seq — wznowienie)
+    GET    /jobs/{id}/results    {"hits", "ips", "fps"}; ?format=csv → CSV jak StreamSaver
+    DELETE /jobs/{id}            anulowanie (w kolejce albo w trakcie)
+    GET    /health
+
+Między zadaniami zostają: sesja aiohttp i klient httpx (pule połączeń, cache DNS), pula Playwright
+(startuje leniwie, raz), cache skanu skryptów inline i skompilowane wzorce ekstrakcji.
+Naraz najwyżej max_jobs zadań; wspólny budżet pobrań total_concurrency jak w batchu.
+"""
+import asyncio
+import csv
+import io
+import itertools
+import json
+import re
+import time
+from collections import deque
+from dataclasses import asdict
+
+import aiohttp
+from aiohttp import web
+
+from .crawl import crawl
+from .extract import ScriptScanCache
+from .net import DEFAULT_NET, make_httpx_client
+from .render import BrowserPool
+
+# parametry crawl(), które wolno nadpisać per zadanie (reszta — z konfiguracji usługi) → typ wartości;
+# None dozwolone tylko dla opcjonalnych (Optional w crawl())
+JOB_PARAMS = {
+    "start_url": str, "delay_ms": int, "render_mode": int, "use_sitemap": bool, "obey_robots": bool,
+    "max_depth": int, "include_re": str, "exclude_re": str, "concurrency": int, "extras_only_on_phone": bool,
+    "near_dup": bool, "near_dup_distance": int, "traps": bool, "extract_mode": str,
+    "seed_cookie_header": str, "max_retries": int, "phone_countries": list,
+}
+_OPTIONAL = frozenset({"start_url", "max_depth", "seed_cookie_header", "phone_countries"})
+_MIN = {"concurrency": 1, "delay_ms": 0, "max_depth": 0, "near_dup_distance": 0, "max_retries": 0}
+_BOOL_STR = {"true": True, "1": True, "yes": True, "false": False, "0": False, "no": False}
+_STATUS_EVERY_S = 0.5
+_HIT_FIELDS = ["source_domain", "username", "phone", "email", "url"]
+
+def _noop(*_a, **_kw): ...
+
+def _job_param(name: str, v):
+    """Wartość parametru zadania po sprawdzeniu typu (JSON: liczby/flagi bywają stringami); zły typ → ValueError."""
+    kind = JOB_PARAMS[name]
+    if v is None:
+        if name in _OPTIONAL: return None
+    elif kind is bool:
+        if isinstance(v, bool): return v
+        if isinstance(v, str) and v.strip().lower() in _BOOL_STR: return _BOOL_STR[v.strip().lower()]
+    elif kind is int:
+        if isinstance(v, str) and v.strip().lstrip("-").isdigit(): v = int(v)
+        if isinstance(v, int) and not isinstance(v, bool):
+            if v < _MIN.get(name, v):
+                raise ValueError(f"{name} must be >= {_MIN[name]}")
+            if name == "render_mode" and v not in (0, 1, 2):
+                raise ValueError("render_mode must be 0, 1 or 2")
+            return v
+    elif kind is list:
+        if isinstance(v, str): v = [c for c in v.replace(",", " ").split() if c]
+        if isinstance(v, list) and all(isinstance(c, str) for c in v): return v
+    elif isinstance(v, str):
+        if name.endswith("_re"):
+            try: re.compile(v)
+            except re.error as e: raise ValueError(f"{name}: bad regex: {e}") from None
+        return v
+    raise ValueError(f"{name} must be {kind.__name__}, got {type(v).__name__} {v!r}")
+
+class Job:
+    def __init__(self, jid: str, domain: str, mode: int, max_pages: int, params: dict, *,
+                 details: bool = False, event_buffer: int = 1000):
+        self.id, self.domain, self.mode, self.max_pages, self.params = jid, domain, mode, max_pages, params
+        self.details = details
+        self.state = "queued"               # queued | running | done | failed | cancelled
+        self.error: str | None = None
+        self.created, self.started, self.finished = time.time(), None, None
+        self.status = (0, 0, 0, 0)          # scanned, queue, found, errors
+        self.hits: list = []
+        self.ips: list[tuple[str, str]] = []
+        self.fps: list[tuple[str, str, str]] = []
+        self.task: asyncio.Task | None = None
+        self._events: deque = deque(maxlen=event_buffer)
+        self._seq = 0
+        self._wake = asyncio.Event()
+        self._status_t = 0.0
+
+    @property
+    def ended(self) -> bool:
+        return self.state in ("done", "failed", "cancelled")
+
+    def _push(self, ev: str, **fields) -> None:
+        self._seq += 1
+        self._events.append({"seq": self._seq, "ts": round(time.time(), 3), "ev": ev, **fields})
+        self._wake.set(); self._wake = asyncio.Event()     # budzi wszystkich czekających
+
+    # callbacki crawl()
+    def on_status(self, s, q, f, e):
+        self.status = (s, q, f, e)
+        now = time.monotonic()
+        if now - self._status_t >= _STATUS_EVERY_S:
+            self._status_t = now
+            self._push("status", scanned=s, queue=q, found=f, errors=e)
+
+    def on_found(self, h):
+        self.hits.append(h); self._push("found", **asdict(h))
+
+    def on_detail(self, msg: str):
+        self._push("detail", text=msg)
+
+    def on_ip(self, ih):
+        self.ips.append((ih.ip, ih.url))
+
+    def on_fp(self, ev):
+        self.fps.append((ev.url, ev.indicator, ev.evidence))
+
+    def summary(self) -> dict:
+        s, q, f, e = self.status
+        return {"id": self.id, "domain": self.domain, "mode": self.mode, "max_pages": self.max_pages,
+                "params": self.params, "state": self.state, "error": self.error,
+                "created": self.created, "started": self.started, "finished": self.finished,
+                "scanned": s, "queue": q, "found": f, "errors": e}
+
+    async def events(self, since: int = 0):
+        """Zdarzenia o seq > since, potem kolejne na bieżąco, aż do "done"."""
+        while True:
+            wake = self._wake
+            for ev in list(self._events):
+                if ev["seq"] > since:
+                    since = ev["seq"]; yield ev
+            if self.ended and since >= self._seq:
+                return
+            await wake.wait()
+
+class CrawlService:
+    def __init__(self, crawl_kwargs: dict | None = None, *, max_jobs: int = 2, total_concurrency: int = 16,
+                 max_queued: int = 100, keep_jobs: int = 200, event_buffer: int = 1000):
+        self.crawl_kwargs = {k: v for k, v in (crawl_kwargs or {}).items()
+                             if k not in ("session", "httpx_client", "render_pool", "budget", "script_cache")}
+        self.max_jobs = max(1, max_jobs)
+        self.total_concurrency = max(1, total_concurrency)
+        self.max_queued = max_queued
+        self.keep_jobs = keep_jobs
+        self.event_buffer = event_buffer
+        self.jobs: dict[str, Job] = {}
+        self._ids = itertools.count(1)
+        self._slots = asyncio.Semaphore(self.max_jobs)
+        self._budget = asyncio.Semaphore(self.total_concurrency)
+        self.script_cache = ScriptScanCache()
+        self.session = self.client = self.pool = self._resolver = None
+
+    async def start(self) -> None:
+        kw = self.crawl_kwargs
+        net = kw.get("net") or DEFAULT_NET
+        proxy = kw.get("proxy")
+        self._resolver = net.resolver()
+        traces = [kw["metrics"].trace_config()] if kw.get("metrics") is not None else None
+        self.session = aiohttp.ClientSession(
+            timeout=net.aiohttp_timeout(), trace_configs=traces,
+            connector=net.connector(concurrency=self.total_concurrency, resolver=self._resolver),
+        )
+        try: self.client = make_httpx_client(net, proxy=proxy, resolver=self._resolver, concurrency=self.total_concurrency)
+        except Exception: self.client = None
+        self.pool = BrowserPool(
+            proxy,
+            size=kw.pop("render_pool_size", None) or min(self.total_concurrency, 4),
+            recycle_after=kw.pop("render_recycle_after", 50),
+            timeout_ms=kw.pop("render_timeout_ms", 15000),
+            block_resources=kw.pop("render_block_resources", True),
+            settle_ms=kw.pop("render_settle_ms", 400),
+        )
+
+    async def close(self) -> None:
+        tasks = [j.task for j in self.jobs.values() if j.task is not None and not j.task.done()]
+        for t in tasks: t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.client is not None: await self.client.aclose()
+        if self.session is not None: await self.session.close()
+        if self._resolver is not None: await self._resolver.close()
+        if self.pool is not None: await self.pool.close()
+
+    # ---- zadania ----
+    def submit(self, domain: str, mode: int = 1, max_pages: int = 200, *, details: bool = False, **params) -> Job:
+        bad = params.keys() - JOB_PARAMS.keys()
+        if bad:
+            raise ValueError(f"unsupported job parameters: {', '.join(sorted(bad))}")
+        params = {k: _job_param(k, v) for k, v in params.items()}
+        if mode not in (1, 2, 3):
+            raise ValueError("mode must be 1, 2 or 3")
+        if sum(1 for j in self.jobs.values() if j.state == "queued") >= self.max_queued:
+            raise OverflowError("job queue is full")
+        job = Job(str(next(self._ids)), domain, int(mode), int(max_pages), params,
+                  details=details, event_buffer=self.event_buffer)
+        self.jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job), name=f"job-{job.id}")
+        self._prune()
+        return job
+
+    def cancel(self, jid: str) -> Job | None:
+        job = self.jobs.get(jid)
+        if job is not None and job.task is not None and not job.task.done():
+            job.task.cancel()
+        return job
+
+    def _prune(self) -> None:
+        done = [j for j in self.jobs.values() if j.ended]
+        for j in done[:max(0, len(done) - self.keep_jobs)]:
+            del self.jobs[j.id]
+
+    async def _run(self, job: Job) -> None:
+        try:
+            async with self._slots:
+                job.state, job.started = "running", time.time()
+                job._push("state", state="running")
+                await crawl(
+                    job.domain, job.mode, job.max_pages,
+                    _noop, job.on_found, job.on_status,
+                    on_detail=job.on_detail if job.details else None, on_ip=job.on_ip, on_fp=job.on_fp,
+                    session=self.session, httpx_client=self.client, render_pool=self.pool,
+                    budget=self._budget, script_cache=self.script_cache,
+                    **{**self.crawl_kwargs, **job.params},
+                )
+            job.state = "done"
+        except asyncio.CancelledError:
+            job.state = "cancelled"
+        except Exception as e:
+            job.state, job.error = "failed", f"{type(e).__name__}: {e}"
+        finally:
+            job.finished = time.time()
+            s, q, f, e = job.status
+            job._push("status", scanned=s, queue=q, found=f, errors=e)
+            job._push("done", state=job.state, error=job.error)
+
+    # ---- HTTP ----
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/health", self._h_health)
+        app.router.add_post("/jobs", self._h_submit)
+        app.router.add_get("/jobs", self._h_list)
+        app.router.add_get("/jobs/{id}", self._h_get)
+        app.router.add_delete("/jobs/{id}", self._h_cancel)
+        app.router.add_get("/jobs/{id}/events", self._h_events)
+        app.router.add_get("/jobs/{id}/results", self._h_results)
+        return app
+
+    def _job(self, req: web.Request) -> Job:
+        job = self.jobs.get(req.match_info["id"])
+        if job is None:
+            raise web.HTTPNotFound(text='{"error": "no such job"}', content_type="application/json")
+        return job
+
+    async def _h_health(self, _req):
+        states = {}
+        for j in self.jobs.values(): states[j.state] = states.get(j.state, 0) + 1
+        return web.json_response({"ok": True, "max_jobs": self.max_jobs, "jobs": states})
+
+    async def _h_submit(self, req):
+        try:
+            body = await req.json()
+            if not isinstance(body, dict) or not body.get("domain"):
+                raise ValueError("'domain' is required")
+            job = self.submit(str(body.pop("domain")).strip().lower(), **body)
+        except OverflowError as e:
+            return web.json_response({"error": str(e)}, status=429)
+        except (ValueError, TypeError) as e:
+            return web.json_response({"error": str(e)}, status=400)
+        return web.json_response(job.summary(), status=202)
+
+    async def _h_list(self, _req):
+        return web.json_response([j.summary() for j in self.jobs.values()])
+
+    async def _h_get(self, req):
+        return web.json_response(self._job(req).summary())
+
+    async def _h_cancel(self, req):
+        return web.json_response(self.cancel(self._job(req).id).summary())
+
+    async def _h_events(self, req):
+        job = self._job(req)
+        try: since = int(req.query.get("since", 0))
+        except ValueError: since = 0
+        resp = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await resp.prepare(req)
+        async for ev in job.events(since):
+            await resp.write((json.dumps(ev, ensure_ascii=False) + "\n").encode("utf-8"))
+        await resp.write_eof()
+        return resp
+
+    async def _h_results(self, req):
+        job = self._job(req)
+        if req.query.get("format") == "csv":
+            buf = io.StringIO()
+            w = csv.DictWriter(buf, fieldnames=_HIT_FIELDS)
+            w.writeheader()
+            for h in job.hits: w.writerow(asdict(h))
+            return web.Response(text=buf.getvalue(), content_type="text/csv", charset="utf-8")
+        return web.json_response({
+            "id": job.id, "state": job.state,
+            "hits": [asdict(h) for h in job.hits],
+            "ips": [{"ip": ip, "url": u} for ip, u in job.ips],
+            "fps": [{"url": u, "indicator": i, "evidence": ev} for u, i, ev in job.fps],
+        })
+
+async def serve(service: CrawlService, *, host: str = "127.0.0.1", port: int = 8765) -> web.AppRunner:
+    """Startuje usługę i serwer HTTP. Zwraca runner (await runner.cleanup(); await service.close())."""
+    await service.start()
+    runner = web.AppRunner(service.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
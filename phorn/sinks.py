@@ -0,0 +1,159 @@
+# phorn/sinks.py
+import asyncio
+import atexit
+import csv
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+def save_csv(domain: str, hits: list, filename: str | None = None):
+    fname = filename or f"contacts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    with open(fname, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=["source_domain","username","phone","email","url"])
+        w.writeheader()
+        for h in hits:
+            w.writerow(dict(
+                source_domain=h.source_domain, username=h.username,
+                phone=h.phone, email=h.email, url=h.url
+            ))
+    return fname
+
+# ---------- Wątek zapisu ----------
+_STOP = object()
+
+class SinkWriter:
+    """
+    Jeden wątek zapisujący pliki wynikowe: callbacki crawl() tylko wrzucają wiersze do ograniczonej kolejki,
+    zapis i flush idą poza pętlą asyncio (wolny dysk / NFS nie wstrzymuje pobrań).
+    policy="block" — przy pełnej kolejce wywołujący czeka (nic nie ginie); w pętli asyncio wiersz trafia do
+    zaległości, a czekają korutyny przez `await wait_ready()` (crawl(backpressure=...)) — pętla nigdy.
+    policy="drop" — wiersz odrzucany (dropped).
+    Flush po opróżnieniu kolejki, najpóźniej co flush_interval_s. close() dopisuje kolejkę i zamyka pliki.
+    """
+    def __init__(self, *, max_queue: int = 10000, policy: str = "block", flush_interval_s: float = 1.0):
+        if policy not in ("block", "drop"):
+            raise ValueError("sink policy must be 'block' or 'drop'")
+        self.policy = policy
+        self.flush_interval_s = flush_interval_s
+        self.dropped = self.errors = 0
+        self.error: str | None = None
+        self._q = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._sinks: list = []
+        self._backlog: deque = deque()      # "block" w pętli asyncio: czeka na miejsce w kolejce
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="phorn-sinks", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)         # wyjątek spoza KeyboardInterrupt — kolejka i tak trafia na dysk
+
+    def attach(self, sink) -> None:
+        self._sinks.append(sink)
+
+    def put(self, sink, row) -> None:
+        if self._closed: return
+        if self.policy == "drop":
+            try: self._q.put_nowait((sink, row))
+            except queue.Full: self.dropped += 1
+            return
+        if not self._backlog:
+            try: self._q.put_nowait((sink, row)); return
+            except queue.Full: pass
+        try: asyncio.get_running_loop()
+        except RuntimeError:
+            self._q.put((sink, row))            # zwykły wątek — może czekać
+        else:
+            self._backlog.append((sink, row))   # pętla asyncio — nie blokujemy; po kolei za zaległymi
+
+    async def wait_ready(self) -> None:
+        """Przenosi zaległości do kolejki, czekając (bez blokowania pętli), aż zwolni się miejsce."""
+        while self._backlog:
+            try: self._q.put_nowait(self._backlog[0])
+            except queue.Full:
+                await asyncio.sleep(0.01); continue
+            self._backlog.popleft()
+
+    def _run(self):
+        dirty, last = set(), time.monotonic()
+        while True:
+            try: item = self._q.get(timeout=self.flush_interval_s)
+            except queue.Empty: item = None
+            if item is _STOP: break
+            if item is not None:
+                sink, row = item
+                try:
+                    if row is None: sink._close_file(); dirty.discard(sink)
+                    else: sink._emit(row); dirty.add(sink)
+                except Exception as e:
+                    self.errors += 1; self.error = f"{type(e).__name__}: {e}"
+            now = time.monotonic()
+            if dirty and (self._q.empty() or now - last >= self.flush_interval_s):
+                self._flush(dirty); last = now
+        self._flush(dirty)
+
+    def _flush(self, sinks) -> None:
+        for s in sinks:
+            try: s._f.flush()
+            except Exception as e: self.errors += 1; self.error = f"{type(e).__name__}: {e}"
+        sinks.clear()
+
+    def close(self) -> None:
+        """Czeka na zapis całej kolejki (także przy policy="drop"), potem zamyka wszystkie pliki."""
+        if not self._closed:
+            while self._backlog: self._q.put(self._backlog.popleft())
+            self._q.put(_STOP); self._closed = True
+        self._thread.join()
+        for s in self._sinks: s._close_file()
+
+# ---------- Uniwersalny CSV stream saver ----------
+class CSVStream:
+    def __init__(self, filename: str, fieldnames: list[str], *, writer: SinkWriter | None = None):
+        self.filename = filename
+        self._f = open(filename, "w", newline="", encoding="utf-8")
+        self._w = csv.DictWriter(self._f, fieldnames=fieldnames)
+        self._w.writeheader()
+        self._writer = writer
+        if writer is not None: writer.attach(self)
+        self._closed = False
+    def write(self, row: dict):
+        if self._closed: return
+        if self._writer is not None: self._writer.put(self, row)
+        else: self._emit(row); self._f.flush()
+    def _emit(self, row: dict):
+        self._w.writerow(row)
+    def _close_file(self):
+        if not self._f.closed:
+            try: self._f.flush()
+            except Exception: pass
+            try: self._f.close()
+            except Exception: pass
+    def close(self):
+        # z wątkiem zapisu: zamknięcie w kolejce, po wcześniejszych wierszach
+        if not self._closed:
+            self._closed = True
+            if self._writer is not None: self._writer.put(self, None)
+            else: self._close_file()
+
+# ---------- STREAMING AUTOSAVE kontaktów ----------
+class StreamSaver(CSVStream):
+    def __init__(self, domain: str, *, dedupe: bool = True, writer: SinkWriter | None = None):
+        super().__init__(f"contacts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                         ["source_domain","username","phone","email","url"], writer=writer)
+        self._dedupe = dedupe
+        self._seen = set() if dedupe else None
+
+    def write_hit(self, h):
+        if self._closed:
+            return
+        key = (getattr(h,"phone",""), getattr(h,"email",""), getattr(h,"url",""))
+        if self._seen is not None:
+            if key in self._seen:
+                return
+            self._seen.add(key)
+        self.write(dict(
+            source_domain=getattr(h,"source_domain",""),
+            username=getattr(h,"username",""),
+            phone=getattr(h,"phone",""),
+            email=getattr(h,"email",""),
+            url=getattr(h,"url",""),
+        ))
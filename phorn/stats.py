@@ -0,0 +1,99 @@
+# phorn/stats.py
+"""
+Statystyki crawla liczone przyrostowo (koszt na stronę stały, niezależny od rozmiaru crawla).
+
+TopK        — space-saving (Metwally i in.): k liczników, przybliżony top najczęstszych elementów.
+HyperLogLog — licznik unikatów w stałej pamięci (2^p bajtów, błąd ~1.04/sqrt(2^p); p=14 → ~0.8%).
+CrawlStats  — unikalne telefony/e-maile (dokładnie: set, albo HLL dla batcha) + top segmentów ścieżek.
+stats_loop  — on_stats(u_phones, u_emails, top_paths) co `interval_s` sekund, tylko gdy coś się zmieniło.
+
+hash() napisów jest solony per proces — HLL scalamy (merge) tylko w obrębie jednego procesu.
+"""
+import asyncio
+import heapq
+import math
+
+_MASK64 = (1 << 64) - 1
+
+class TopK:
+    def __init__(self, k: int = 32):
+        self.k = k
+        self._c: dict[str, int] = {}
+
+    def add(self, item: str, n: int = 1) -> None:
+        c = self._c
+        if item in c:
+            c[item] += n
+        elif len(c) < self.k:
+            c[item] = n
+        else:
+            # space-saving: nowy element przejmuje najmniejszy licznik (górne oszacowanie jego częstości)
+            low = min(c, key=c.__getitem__)
+            c[item] = c.pop(low) + n
+
+    def top(self, n: int = 5) -> list[tuple[str, int]]:
+        return heapq.nlargest(n, self._c.items(), key=lambda x: x[1])
+
+class HyperLogLog:
+    def __init__(self, p: int = 14):
+        if not 4 <= p <= 18:
+            raise ValueError("p must be in 4..18")
+        self.p = p
+        self.m = 1 << p
+        self.reg = bytearray(self.m)
+        self._alpha = 0.7213 / (1 + 1.079 / self.m)
+        self._low_bits = 64 - p
+        self._low_mask = (1 << self._low_bits) - 1
+
+    def add(self, item) -> None:
+        x = hash(item) & _MASK64
+        idx = x >> self._low_bits
+        rank = self._low_bits - (x & self._low_mask).bit_length() + 1
+        if rank > self.reg[idx]:
+            self.reg[idx] = rank
+
+    def update(self, items) -> None:
+        for it in items:
+            self.add(it)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.p != self.p:
+            raise ValueError("HyperLogLog.merge: different p")
+        self.reg = bytearray(map(max, self.reg, other.reg))
+
+    def __len__(self) -> int:
+        m = self.m
+        e = self._alpha * m * m / sum(map(_POW2_NEG.__getitem__, self.reg))
+        if e <= 2.5 * m:
+            zeros = self.reg.count(0)
+            if zeros:
+                e = m * math.log(m / zeros)          # mała liczność: linear counting
+        return int(e + 0.5)
+
+_POW2_NEG = [2.0 ** -r for r in range(65)]
+
+class CrawlStats:
+    def __init__(self, *, hll: bool = False, hll_p: int = 14, top_k: int = 32):
+        self.phones = HyperLogLog(hll_p) if hll else set()
+        self.emails = HyperLogLog(hll_p) if hll else set()
+        self.paths = TopK(top_k)
+        self.version = 0                     # rośnie przy każdej zmianie — stats_loop pomija puste tyknięcia
+
+    def add_path(self, seg: str) -> None:
+        self.paths.add(seg); self.version += 1
+
+    def add_found(self, phones, emails) -> None:
+        if phones: self.phones.update(phones); self.version += 1
+        if emails: self.emails.update(emails); self.version += 1
+
+    def snapshot(self, top: int = 5) -> tuple[int, int, list[tuple[str, int]]]:
+        return len(self.phones), len(self.emails), self.paths.top(top)
+
+async def stats_loop(stats: CrawlStats, on_stats, interval_s: float = 1.0):
+    """Do anulowania przez wywołującego; ostatni stan wysyła on sam (po zakończeniu crawla)."""
+    seen = -1
+    while True:
+        await asyncio.sleep(interval_s)
+        if stats.version != seen:
+            seen = stats.version
+            on_stats(*stats.snapshot())
@@ -0,0 +1,244 @@
+# phorn/stream.py
+"""
+Ekstrakcja strumieniowa (extract_mode="stream"): tokenizer HTML (html.parser) karmiony kawałkami
+w trakcie pobierania, bez DOM-u i bez get_text() całej strony.
+
+    sx = StreamExtractor(phones=True, emails=True)
+    sx.feed(kawałek) ...          # np. jako sink w net.fetch_page
+    for href in sx.take_links(): ...
+    sx.close()
+    sx.phones, sx.emails, sx.username, sx.ips, sx.fp, sx.verdict
+
+Tekst = jak get_text(" ", strip=True) (bez script/style/template); PHONE_RE/EMAIL_RE przez RegexStream —
+te same trafienia co na całym tekście, w pamięci tylko okno + zakładka.
+Znaczniki fingerprintingu szukane w oknach surowego HTML-a — wzorce rozciągnięte dalej niż okno mogą umknąć.
+"""
+from html.parser import HTMLParser
+from urllib.parse import unquote
+
+from .extract import PHONE_RE, EMAIL_RE, IPV4_RE, IPV6_RE, clean_phone, detect_fingerprint_indicators
+from .net import PageScanner
+
+_SKIP_TEXT = frozenset({"script", "style", "template"})
+_HEADINGS = ("h1", "h2", "h3", "title")
+
+class RegexStream:
+    """
+    finditer kilku wzorców po tekście podawanym kawałkami. Dopasowanie kończące się w ostatnich `carry`
+    znakach czeka na dalszy tekst, więc wynik = finditer na całości, o ile dopasowania są krótsze niż carry.
+    """
+    def __init__(self, patterns, on_match, *, carry: int = 512, window: int = 32 * 1024):
+        self.patterns = patterns
+        self.on_match = on_match            # on_match(indeks wzorca, tekst)
+        self.carry = carry
+        self.window = window
+        self._parts: list[str] = []
+        self._n = 0
+        self._buf = ""
+        self._pos = [0] * len(patterns)     # skąd wznowić każdy wzorzec (indeks w _buf)
+
+    def feed(self, s: str) -> None:
+        self._parts.append(s); self._n += len(s)
+        if self._n >= self.window:
+            self._run(False)
+
+    def close(self) -> None:
+        self._run(True)
+
+    def _run(self, final: bool):
+        buf = self._buf + "".join(self._parts)
+        self._parts.clear(); self._n = 0
+        limit = len(buf) if final else len(buf) - self.carry
+        for i, rx in enumerate(self.patterns):
+            pos = self._pos[i]
+            for m in rx.finditer(buf, pos):
+                if m.end() > limit:
+                    pos = m.start(); break      # może się jeszcze wydłużyć
+                self.on_match(i, m.group(0)); pos = m.end()
+            else:
+                pos = max(pos, limit)           # przed limitem nic się już nie zacznie
+            self._pos[i] = pos
+        keep = max(0, min(self._pos) - 1)       # znak przed wznowieniem zostaje dla \b
+        self._buf = buf[keep:]
+        self._pos = [p - keep for p in self._pos]
+
+class StreamExtractor(HTMLParser):
+    def __init__(self, *, phones: bool = True, emails: bool = True, extras: bool = True,
+                 keep_text: int = 0, fp_window: int = 64 * 1024, phone_re=PHONE_RE, phone_clean=clean_phone):
+        super().__init__(convert_charrefs=True)
+        self.want_phones, self.want_emails, self.extras = phones, emails, extras
+        self.phone_re, self.phone_clean = phone_re, phone_clean      # np. phones.PhoneEngine: .regex, .clean
+        self.phones: set[str] = set()
+        self.emails: set[str] = set()
+        self.ips: set[str] = set()
+        self.fp: dict[str, str] = {}        # wskaźnik → fragment (pierwsze wystąpienie)
+        self.links: list[str] = []          # hrefy od ostatniego take_links()
+        self.scan = PageScanner()
+        self.bytes = 0
+
+        pats = []
+        if phones: pats.append(phone_re)
+        if emails: pats.append(EMAIL_RE)
+        self._text = RegexStream(pats, self._on_text) if pats else None
+        self._raw = RegexStream([IPV4_RE, IPV6_RE], self._on_ip, carry=64) if extras else None
+        self._fp_parts: list[str] = []
+        self._fp_n = 0
+        self._fp_tail = ""
+        self._fp_window = fp_window
+
+        self._skip = 0                      # głębokość script/style/template
+        self._node: list[str] = []          # bieżący węzeł tekstowy (html.parser dzieli go na granicach kawałków)
+        self._node_n = 0
+        self._node_open = False
+        self._caps: dict[str, list[str]] = {}   # otwarte nagłówki/tytuł → ich tekst (pierwsze wystąpienie)
+        self._cap_depth: dict[str, int] = {}     # <h1> wewnątrz zbieranego <h1> — zamyka je najbliższy </h1>
+        self._heads: dict[str, str] = {}
+        self.keep_text = keep_text          # >0: prefiks tekstu (np. dla SimHash), nie więcej niż tyle znaków
+        self._kept: list[str] = []
+        self._kept_n = 0
+
+    # ---- wejście ----
+    def feed(self, data: str) -> None:
+        self.bytes += len(data)
+        self.scan.feed(data)
+        if self.extras:
+            self._raw.feed(data)
+            self._fp_parts.append(data); self._fp_n += len(data)
+            if self._fp_n >= self._fp_window:
+                self._scan_fp()
+        super().feed(data)
+
+    def take_links(self) -> list[str]:
+        out, self.links = self.links, []
+        return out
+
+    def close(self) -> None:
+        super().close()
+        self._flush_node()
+        for tag in list(self._caps):
+            self._end_cap(tag)
+        if self._text is not None: self._text.close()
+        if self.extras:
+            self._raw.close()
+            self._scan_fp()
+
+    # ---- wyniki ----
+    @property
+    def username(self) -> str:
+        """Jak extract.guess_username: pierwszy h1 → h2 → h3 → title."""
+        for tag in _HEADINGS:
+            t = self._heads.get(tag)
+            if t:
+                return " ".join(t.split())[:80]
+        return ""
+
+    @property
+    def verdict(self):
+        return self.scan.verdict()
+
+    @property
+    def text(self) -> str:
+        return "".join(self._kept)
+
+    # ---- tekst ----
+    def _on_text(self, i: int, s: str):
+        if self._text.patterns[i] is self.phone_re:
+            ph = self.phone_clean(s)
+            if ph: self.phones.add(ph)
+        else:
+            self.emails.add(s)
+
+    def _emit_text(self, s: str):
+        if self._text is not None: self._text.feed(s)
+        for parts in self._caps.values():
+            if len(parts) < 200: parts.append(s)
+        if self._kept_n < self.keep_text:
+            s = s[:self.keep_text - self._kept_n]
+            self._kept.append(s); self._kept_n += len(s)
+
+    def _flush_node(self, final: bool = True):
+        # get_text(" ", strip=True): każdy niepusty węzeł po strip(), rozdzielone spacją
+        if not self._node:                  # najczęstsze: dwa znaczniki obok siebie
+            if final and self._node_open:
+                self._emit_text(" "); self._node_open = False
+            return
+        s = "".join(self._node)
+        self._node.clear(); self._node_n = 0
+        if not self._node_open:
+            s = s.lstrip()
+        if final:
+            s = s.rstrip()
+            if s or self._node_open:
+                self._emit_text(s + " ")
+            self._node_open = False
+        elif s:
+            self._emit_text(s); self._node_open = True
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        self._node.append(data); self._node_n += len(data)
+        if self._node_n >= 16 * 1024:       # bardzo długi węzeł — nie trzymamy całego
+            self._flush_node(final=False)
+
+    # ---- znaczniki ----
+    def handle_starttag(self, tag, attrs):
+        self._flush_node()
+        if tag in _SKIP_TEXT:
+            self._skip += 1
+        elif tag in self._caps:
+            self._cap_depth[tag] += 1
+        elif tag in _HEADINGS and tag not in self._heads:
+            self._caps[tag] = []; self._cap_depth[tag] = 1
+        elif tag == "a":
+            self._anchor(attrs)
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush_node()
+        if tag == "a":
+            self._anchor(attrs)
+
+    def handle_endtag(self, tag):
+        self._flush_node()
+        if tag in _SKIP_TEXT and self._skip:
+            self._skip -= 1
+        elif tag in self._caps:
+            self._cap_depth[tag] -= 1
+            if not self._cap_depth[tag]:
+                self._end_cap(tag)
+
+    def _end_cap(self, tag: str):
+        self._heads[tag] = " ".join("".join(self._caps.pop(tag)).split())
+
+    def handle_comment(self, data):
+        self._flush_node()
+
+    def _anchor(self, attrs):
+        for k, v in attrs:
+            if k == "href" and v is not None:
+                self._href(v)
+                return
+
+    def _href(self, href: str):
+        self.links.append(href)
+        h = href.strip()
+        low = h[:7].lower()
+        if self.want_phones and low.startswith("tel:"):
+            ph = self.phone_clean(unquote(h.split(":", 1)[1]))
+            if ph: self.phones.add(ph)
+        elif self.want_emails and low.startswith("mailto:"):
+            addr = unquote(h.split(":", 1)[1]).split("?", 1)[0]
+            if EMAIL_RE.fullmatch(addr): self.emails.add(addr)
+
+    # ---- extras (IP / fingerprinting) na surowym HTML-u ----
+    def _on_ip(self, i: int, s: str):
+        self.ips.add(s)
+
+    def _scan_fp(self):
+        if not self._fp_parts:
+            return
+        win = self._fp_tail + "".join(self._fp_parts)
+        self._fp_parts.clear(); self._fp_n = 0
+        for label, evid in detect_fingerprint_indicators(win):
+            self.fp.setdefault(label, evid)
+        self._fp_tail = win[-256:]
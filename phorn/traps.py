@@ -0,0 +1,96 @@
+# phorn/traps.py
+"""
+Pułapki na crawler: kalendarze, wyszukiwarki fasetowe, identyfikatory sesji w URL-u.
+
+    guard = TrapGuard()
+    url, reason = guard.admit(url)      # url None = odrzucony (reason, licznik w guard.rejected), inaczej URL kanoniczny
+
+Reguły (w kolejności):
+  - tylko http(s), długość ≤ max_url_len, liczba segmentów ścieżki ≤ max_segments,
+  - segment powtórzony ≥ max_repeat razy (/a/b/a/b/a/b, /x/x/x) → pętla względnych linków,
+  - usunięcie parametrów sesji/śledzenia (PHPSESSID, ;jsessionid=, utm_*, fbclid, …),
+  - ≤ max_param_values różnych wartości każdego parametru w obrębie wzorca ścieżki (kalendarze, fasety),
+  - ≤ max_per_pattern różnych URL-i na wzorzec (net.url_template).
+"""
+import re
+from collections import Counter
+from urllib.parse import urlparse, urlsplit, urlunsplit, parse_qsl, urlencode
+
+from .net import url_template
+
+SESSION_PARAMS = frozenset({
+    "sid", "sessid", "sessionid", "session_id", "phpsessid", "jsessionid", "aspsessionid",
+    "cfid", "cftoken", "zenid", "oscsid", "fbclid", "gclid", "msclkid", "yclid", "_ga",
+})
+_PATH_SESSION_RE = re.compile(r";(?:jsessionid|sid|phpsessid)=[^/?#]*", re.I)
+
+class TrapGuard:
+    def __init__(self, *, max_per_pattern: int = 500, max_param_values: int = 50, max_repeat: int = 3,
+                 max_url_len: int = 2048, max_segments: int = 20, strip_params=SESSION_PARAMS):
+        self.max_per_pattern = max_per_pattern
+        self.max_param_values = max_param_values
+        self.max_repeat = max_repeat
+        self.max_url_len = max_url_len
+        self.max_segments = max_segments
+        self.strip_params = frozenset(p.lower() for p in strip_params)
+        self._per_pattern: dict[str, set[int]] = {}
+        self._param_values: dict[tuple[str, str], set[str]] = {}
+        self.rejected: Counter = Counter()      # (powód, wzorzec) → odrzuconych URL-i
+
+    def _reject(self, reason: str, pattern: str) -> tuple[None, str]:
+        self.rejected[(reason, pattern)] += 1
+        return None, reason
+
+    def canonical(self, url: str) -> str:
+        p = urlsplit(url)                   # urlparse przeniósłby ";jsessionid=…" z ostatniego segmentu do params
+        path = _PATH_SESSION_RE.sub("", p.path)
+        if p.query:
+            q = [(k, v) for k, v in parse_qsl(p.query, keep_blank_values=True)
+                 if k.lower() not in self.strip_params and not k.lower().startswith("utm_")]
+            query = urlencode(q)
+        else:
+            query = ""
+        if path == p.path and query == p.query:
+            return url
+        return urlunsplit(p._replace(path=path, query=query))
+
+    def admit(self, url: str) -> tuple[str | None, str | None]:
+        """(URL kanoniczny, None) albo (None, powód); limity liczą tylko przyjęte URL-e."""
+        try:
+            p = urlparse(url)
+        except Exception:
+            return self._reject("invalid", "")
+        if p.scheme not in ("http", "https"):
+            return None, None                            # tel:/mailto:/javascript: — nie liczymy jako pułapki
+        if len(url) > self.max_url_len:
+            return self._reject("length", url_template(url))
+        segs = [s for s in p.path.split("/") if s]
+        if len(segs) > self.max_segments:
+            return self._reject("segments", url_template(url))
+        if segs and max(Counter(segs).values()) >= self.max_repeat:
+            return self._reject("repeat", url_template(url))
+
+        url = self.canonical(url)
+        pattern = url_template(url)
+        new_vals = []                                    # zapisywane dopiero, gdy URL przejdzie wszystkie limity
+        if p.query:
+            path_pattern = pattern.split("?", 1)[0]
+            for k, v in parse_qsl(urlparse(url).query, keep_blank_values=True):
+                vals = self._param_values.setdefault((path_pattern, k), set())
+                if v not in vals:
+                    if len(vals) >= self.max_param_values:
+                        return self._reject(f"param:{k}", path_pattern)
+                    new_vals.append((vals, v))
+
+        seen = self._per_pattern.setdefault(pattern, set())
+        h = hash(url)
+        if h not in seen:
+            if len(seen) >= self.max_per_pattern:
+                return self._reject("pattern", pattern)
+            seen.add(h)
+        for vals, v in new_vals: vals.add(v)
+        return url, None
+
+    def report(self, top: int = 20) -> list[tuple[str, str, int]]:
+        """(powód, wzorzec, odrzuconych) — najczęściej dławione wzorce."""
+        return [(r, pat, n) for (r, pat), n in self.rejected.most_common(top)]
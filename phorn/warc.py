@@ -0,0 +1,309 @@
+# phorn/warc.py
+"""
+Archiwum WARC stron widzianych przez ekstrakcję + odtwarzanie bez sieci.
+
+    w = WarcWriter("warc/", prefix="example.com")       # crawl(warc=...) — zapis w trakcie crawla
+    w.write_page(url, html, status=200, final_url=..., redirects=(...), source="http")
+    await w.write_page_async(url, html, ...)            # to samo w wątku zapisu (crawl — poza pętlą asyncio)
+    w.close()
+
+    a = WarcArchive(["warc/"])                          # crawl(replay=...) — zamiast sieci
+    a.get(url)  → FetchResult | None;  url in a;  a.urls()
+
+Zapis: WARC/1.1, rekord `resource` na stronę (HTML po dekodowaniu, UTF-8; po renderze — HTML z przeglądarki),
+każdy rekord osobnym członem gzip (.warc.gz — standardowy dostęp swobodny), rotacja po max_bytes.
+Pola rozszerzeń: Phorn-Status, Phorn-Source (http|render), Phorn-Requested-URI, Phorn-Redirects.
+Odczyt: także rekordy `response` z innych narzędzi (status 200, text/html; chunked i gzip/deflate rozpakowywane).
+"""
+import asyncio
+import base64
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .net import FetchResult
+
+_CHUNK = 1024 * 1024
+_CHARSET_RE = re.compile(rb"charset=[\"']?([\w.:-]+)", re.I)
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+# ------------ zapis ------------
+class WarcWriter:
+    def __init__(self, directory: str, *, prefix: str = "phorn", max_bytes: int = 1024 ** 3, compress: bool = True):
+        self.directory = Path(directory)
+        self.prefix = re.sub(r"[^\w.-]+", "_", prefix) or "phorn"
+        self.max_bytes = int(max_bytes)
+        self.compress = compress
+        self.files: list[str] = []
+        self.records = 0
+        self._f = None
+        self._size = 0
+        self._pool: ThreadPoolExecutor | None = None
+        self._stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+
+    def spool(self):
+        """Bufor na treść strumieniowaną (extract_mode="stream") — do 1 MB w pamięci, dalej na dysku."""
+        return tempfile.SpooledTemporaryFile(max_size=_CHUNK)
+
+    def write_page(self, url: str, body, *, status: int = 200, final_url: str | None = None,
+                   redirects=(), source: str = "http") -> None:
+        """body: str albo plik binarny z UTF-8 (spool())."""
+        if isinstance(body, str):
+            data, n = body.encode("utf-8"), None
+            digest = hashlib.sha1(data)
+        else:
+            data, n = None, body.tell()
+            body.seek(0); digest = hashlib.sha1()
+            while chunk := body.read(_CHUNK): digest.update(chunk)
+        target = final_url or url
+        fields = [
+            ("WARC-Type", "resource"),
+            ("WARC-Record-ID", f"<urn:uuid:{uuid.uuid4()}>"),
+            ("WARC-Date", _now()),
+            ("WARC-Target-URI", target),
+            ("WARC-Payload-Digest", "sha1:" + base64.b32encode(digest.digest()).decode()),
+            ("Content-Type", "text/html; charset=utf-8"),
+            ("Content-Length", str(len(data) if data is not None else n)),
+            ("Phorn-Status", str(status)),
+            ("Phorn-Source", source),
+        ]
+        if target != url: fields.append(("Phorn-Requested-URI", url))
+        if redirects: fields.append(("Phorn-Redirects", " ".join(redirects)))
+        self._record(fields, data, body if data is None else None)
+
+    async def write_page_async(self, url: str, body, **kw) -> None:
+        """
+        write_page w wątku zapisu (jeden na writer — rekordy po kolei): gzip i dysk nie blokują pętli asyncio.
+        Plik z treścią (spool()) przechodzi na własność writera i jest zamykany po zapisie.
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="phorn-warc")
+        def job():
+            try: self.write_page(url, body, **kw)
+            finally:
+                if not isinstance(body, str): body.close()
+        await asyncio.get_running_loop().run_in_executor(self._pool, job)
+
+    def _record(self, fields, data: bytes | None, fobj=None) -> None:
+        if self._f is None or self._size >= self.max_bytes:
+            self._open()
+        head = "WARC/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in fields) + "\r\n"
+        z = zlib.compressobj(6, zlib.DEFLATED, 31) if self.compress else None
+        out = self._f
+        def put(b: bytes):
+            b = z.compress(b) if z is not None else b
+            if b: out.write(b); self._size += len(b)
+        put(head.encode("utf-8"))
+        if data is not None:
+            put(data)
+        else:
+            fobj.seek(0)
+            while chunk := fobj.read(_CHUNK): put(chunk)
+        put(b"\r\n\r\n")
+        if z is not None:
+            b = z.flush(); out.write(b); self._size += len(b)
+        self.records += 1
+
+    def _open(self) -> None:
+        self._close_file()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        ext = ".warc.gz" if self.compress else ".warc"
+        path = self.directory / f"{self.prefix}-{self._stamp}-{len(self.files):05d}{ext}"
+        self._f = open(path, "ab"); self._size = self._f.tell()
+        self.files.append(str(path))
+        info = b"software: phorn\r\nformat: WARC File Format 1.1\r\n"
+        self._record([
+            ("WARC-Type", "warcinfo"),
+            ("WARC-Record-ID", f"<urn:uuid:{uuid.uuid4()}>"),
+            ("WARC-Date", _now()),
+            ("WARC-Filename", path.name),
+            ("Content-Type", "application/warc-fields"),
+            ("Content-Length", str(len(info))),
+        ], info)
+        self.records -= 1                   # warcinfo nie jest stroną
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)      # najpierw zapisy z kolejki wątku
+            self._pool = None
+        self._close_file()
+
+    def _close_file(self) -> None:
+        if self._f is not None:
+            try: self._f.close()
+            except Exception: pass
+            self._f = None
+
+# ------------ odczyt ------------
+def _parse_records(buf, pos: int = 0):
+    """(początek, nagłówki, treść) kolejnych rekordów w buforze (bytes albo mmap)."""
+    end = len(buf)
+    while pos < end:
+        while buf[pos:pos + 2] == b"\r\n": pos += 2
+        if pos >= end: return
+        h_end = buf.find(b"\r\n\r\n", pos)
+        if h_end < 0 or not buf[pos:pos + 5] == b"WARC/":
+            raise ValueError(f"WARC: bad record at {pos}")
+        headers = {}
+        for line in bytes(buf[pos:h_end]).decode("utf-8", "replace").split("\r\n")[1:]:
+            k, _, v = line.partition(":")
+            headers[k.strip().lower()] = v.strip()
+        b0 = h_end + 4
+        b1 = b0 + int(headers.get("content-length", 0))
+        yield pos, headers, buf[b0:b1]
+        pos = b1
+
+def _gzip_members(f, start: int = 0):
+    """(offset, rozpakowany człon) kolejnych członów gzip; offset — do późniejszego f.seek()."""
+    f.seek(start)
+    offset, pending = start, b""
+    while True:
+        d = zlib.decompressobj(31)
+        out, fed = [], 0
+        while not d.eof:
+            data = pending or f.read(_CHUNK)
+            pending = b""
+            if not data:
+                if fed: raise ValueError(f"WARC: truncated gzip member at {offset}")
+                return
+            fed += len(data)
+            out.append(d.decompress(data))
+        pending = d.unused_data
+        yield offset, b"".join(out)
+        offset += fed - len(pending)
+
+def iter_records(path: str):
+    """(pozycja, nagłówki, treść) — pozycja = (offset członu gzip | offset rekordu, nr rekordu w członie)."""
+    with open(path, "rb") as f:
+        if path.endswith(".gz"):
+            for off, data in _gzip_members(f):
+                for k, (_p, headers, body) in enumerate(_parse_records(data)):
+                    yield (off, k), headers, body
+        elif os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for p, headers, body in _parse_records(mm):
+                    yield (p, 0), headers, bytes(body)
+
+def _read_at(path: str, loc: tuple[int, int]):
+    off, k = loc
+    with open(path, "rb") as f:
+        if path.endswith(".gz"):
+            _off, data = next(_gzip_members(f, off))
+            for i, (_p, headers, body) in enumerate(_parse_records(data)):
+                if i == k: return headers, body
+            raise ValueError(f"WARC: no record {k} in member at {off}")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            _p, headers, body = next(_parse_records(mm, off))
+            return headers, bytes(body)
+
+def _dechunk(b: bytes) -> bytes:
+    out, pos = [], 0
+    while True:
+        eol = b.find(b"\r\n", pos)
+        if eol < 0: break
+        n = int(b[pos:eol].split(b";", 1)[0] or b"0", 16)
+        if n == 0: break
+        out.append(b[eol + 2:eol + 2 + n]); pos = eol + 4 + n
+    return b"".join(out)
+
+def _http_page(block: bytes) -> tuple[int, bytes, str] | None:
+    """Rekord `response`: (status, treść, charset) albo None, jeśli to nie strona HTML."""
+    h_end = block.find(b"\r\n\r\n")
+    if h_end < 0: return None
+    lines = block[:h_end].decode("latin-1").split("\r\n")
+    try: status = int(lines[0].split()[1])
+    except Exception: return None
+    hdr = {}
+    for line in lines[1:]:
+        k, _, v = line.partition(":"); hdr[k.strip().lower()] = v.strip()
+    ctype = hdr.get("content-type", "")
+    if "html" not in ctype.lower(): return None
+    body = block[h_end + 4:]
+    if "chunked" in hdr.get("transfer-encoding", "").lower(): body = _dechunk(body)
+    enc = hdr.get("content-encoding", "").lower()
+    try:
+        if enc in ("gzip", "x-gzip"): body = zlib.decompress(body, 47)
+        elif enc == "deflate": body = zlib.decompress(body)
+        elif enc not in ("", "identity"): return None
+    except zlib.error:
+        return None
+    m = _CHARSET_RE.search(ctype.encode("latin-1", "replace"))
+    return status, body, (m.group(1).decode() if m else "utf-8")
+
+def _page(headers: dict, body: bytes) -> FetchResult | None:
+    wtype = headers.get("warc-type")
+    if wtype == "resource":
+        m = _CHARSET_RE.search(headers.get("content-type", "").encode("latin-1", "replace"))
+        status, cs = int(headers.get("phorn-status", 200)), (m.group(1).decode() if m else "utf-8")
+    elif wtype == "response":
+        page = _http_page(body)
+        if page is None: return None
+        status, body, cs = page
+    else:
+        return None
+    try: text = body.decode(cs, "replace")
+    except LookupError: text = body.decode("utf-8", "replace")
+    final = headers.get("warc-target-uri", "")
+    redirects = tuple(headers.get("phorn-redirects", "").split())
+    return FetchResult(text, status, final_url=final, redirects=redirects)
+
+def iter_pages(path: str):
+    """(żądany URL, FetchResult) wszystkich stron z pliku, po kolei."""
+    for _loc, headers, body in iter_records(path):
+        res = _page(headers, body)
+        if res is not None:
+            yield headers.get("phorn-requested-uri") or res.final_url, res
+
+def warc_files(paths) -> list[str]:
+    """Pliki .warc/.warc.gz z listy plików i katalogów (katalogi — posortowane)."""
+    if isinstance(paths, (str, os.PathLike)): paths = [paths]
+    out = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            out += sorted(str(x) for x in p.iterdir() if x.name.endswith((".warc", ".warc.gz")))
+        else:
+            out.append(str(p))
+    return out
+
+class WarcArchive:
+    """Indeks URL → rekord (żądany adres, adres końcowy i adresy pośrednie przekierowań); treść czytana przy get()."""
+    def __init__(self, paths):
+        self.files = warc_files(paths)
+        self._index: dict[str, tuple[str, tuple[int, int]]] = {}
+        self._pages: list[str] = []
+        for path in self.files:
+            for loc, headers, _body in iter_records(path):
+                wtype = headers.get("warc-type")
+                if wtype == "resource" and "html" not in headers.get("content-type", ""): continue
+                if wtype == "response" and _http_page(_body) is None: continue
+                if wtype not in ("resource", "response"): continue
+                target = headers.get("warc-target-uri")
+                if not target: continue
+                req = headers.get("phorn-requested-uri") or target
+                self._pages.append(req)
+                for u in (req, target, *headers.get("phorn-redirects", "").split()):
+                    self._index.setdefault(u, (path, loc))
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._index
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def urls(self) -> list[str]:
+        """Żądane adresy stron w kolejności archiwum."""
+        return list(self._pages)
+
+    def get(self, url: str) -> FetchResult | None:
+        at = self._index.get(url)
+        if at is None: return None
+        return _page(*_read_at(*at))
@@ -0,0 +1,18 @@
+# tests/test_service.py
+import pytest
+
+from phorn.service import _job_param
+
+def test_job_param_coercion():
+    assert _job_param("concurrency", "4") == 4
+    assert _job_param("obey_robots", "false") is False
+    assert _job_param("phone_countries", "pl, de") == ["pl", "de"]
+    assert _job_param("max_depth", None) is None
+
+@pytest.mark.parametrize("name,value", [
+    ("concurrency", "four"), ("concurrency", 0), ("concurrency", True), ("use_sitemap", 2),
+    ("render_mode", 5), ("include_re", "("), ("phone_countries", [1]), ("delay_ms", None),
+])
+def test_job_param_rejects(name, value):
+    with pytest.raises(ValueError):
+        _job_param(name, value)
@@ -0,0 +1,28 @@
+# tests/test_traps.py
+from phorn.traps import TrapGuard
+
+def test_session_id_on_last_segment():
+    g = TrapGuard()
+    assert g.admit("http://x.pl/a/b;jsessionid=ABC?x=1") == ("http://x.pl/a/b?x=1", None)
+    assert g.admit("http://x.pl/a/b;jsessionid=DEF?x=1") == ("http://x.pl/a/b?x=1", None)
+
+def test_session_id_mid_path_and_query():
+    g = TrapGuard()
+    assert g.canonical("http://x.pl/a;jsessionid=Q/b?sid=3&y=2") == "http://x.pl/a/b?y=2"
+    assert g.canonical("http://x.pl/a/b;v=1") == "http://x.pl/a/b;v=1"
+
+def test_reject_reason():
+    g = TrapGuard(max_param_values=2)
+    assert g.admit("http://x.pl/cal?d=1")[1] is None
+    assert g.admit("http://x.pl/cal?d=2")[1] is None
+    assert g.admit("http://x.pl/cal?d=3") == (None, "param:d")
+    assert g.admit("http://x.pl/cal?d=1") == ("http://x.pl/cal?d=1", None)
+    assert g.admit("mailto:a@x.pl") == (None, None)
+
+def test_param_values_recorded_only_for_admitted():
+    g = TrapGuard(max_per_pattern=1, max_param_values=2)
+    assert g.admit("http://x.pl/p?q=1")[0]
+    for v in range(2, 10):
+        assert g.admit(f"http://x.pl/p?q={v}") == (None, "pattern")
+    # odrzucone przez limit wzorca nie zużyły limitu wartości parametru
+    assert g._param_values[("/p", "q")] == {"1"}